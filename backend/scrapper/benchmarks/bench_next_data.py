@@ -0,0 +1,76 @@
+"""
+Benchmark: __NEXT_DATA__ extraction
+Compares the byte-level fast path against lxml and BeautifulSoup on pages
+rebuilt from debug_output/
+
+Usage: python benchmarks/bench_next_data.py [--filler-kb 200] [--repeat 3]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+import lxml.html
+
+from benchmarks.corpus import load_pages
+from next_data import extract_next_data
+
+
+def with_html_parser(html: bytes):
+    soup = BeautifulSoup(html.decode("utf-8"), "html.parser")
+    return json.loads(soup.find("script", id="__NEXT_DATA__").string)
+
+
+def with_lxml(html: bytes):
+    tree = lxml.html.fromstring(html)
+    return json.loads(tree.xpath('//script[@id="__NEXT_DATA__"]')[0].text_content())
+
+
+EXTRACTORS = {
+    "fast_path": extract_next_data,
+    "lxml": with_lxml,
+    "bs4_html_parser": with_html_parser,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark __NEXT_DATA__ extraction")
+    parser.add_argument("--filler-kb", type=int, default=200, help="Markup added around each payload")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over the corpus per extractor")
+    args = parser.parse_args()
+
+    pages = load_pages(filler_kb=args.filler_kb)
+    if not pages:
+        print("No dumps found in debug_output/")
+        return
+
+    total_mb = sum(len(page["html"]) for page in pages) / (1024 * 1024)
+    print(f"Corpus: {len(pages)} pages, {total_mb:.1f} MB")
+
+    baseline = None
+    for name, extract in EXTRACTORS.items():
+        for page in pages:
+            if extract(page["html"]) != page["document"]:
+                raise AssertionError(f"{name} extracted the wrong payload for {page['company']}")
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for page in pages:
+                extract(page["html"])
+        elapsed = (time.perf_counter() - start) / args.repeat
+
+        per_page_ms = elapsed / len(pages) * 1000
+        baseline = baseline or elapsed
+        print(
+            f"{name:>16}: {elapsed:7.3f}s/pass  {per_page_ms:7.2f} ms/page  "
+            f"{total_mb / elapsed:8.1f} MB/s  ({elapsed / baseline:.1f}x fast_path)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Benchmark: scrape pipeline stages
+Times HTML extraction, JSON decoding, normalization and ingestion on the
+pages captured in debug_output/ and on large synthetic pages. Ingestion
+runs the real SupabaseClient against a localhost stub of /api/salaries and
+the Supabase REST API.
+
+Results are saved as JSON tagged with the git commit, so two commits can be
+compared:
+
+    python benchmarks/bench_pipeline.py                       # -> benchmarks/results/<commit>.json
+    git checkout other-branch
+    python benchmarks/bench_pipeline.py --compare benchmarks/results/<commit>.json
+
+Usage: python benchmarks/bench_pipeline.py [--repeat 5] [--scale 1] [--ingest-records 2000]
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import SCRAPER_DIR, load_pages, synthetic_pages
+from benchmarks.stubs import StubServer
+from next_data import find_next_data
+from sources import SOURCES
+
+RESULTS_DIR = os.path.join(SCRAPER_DIR, "benchmarks", "results")
+
+
+def git_revision() -> str:
+    """Short commit hash, with -dirty if the scraper has uncommitted changes"""
+    try:
+        commit = subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=SCRAPER_DIR, text=True
+        ).strip()
+        dirty = subprocess.call(["git", "diff", "--quiet", "HEAD", "--", "."], cwd=SCRAPER_DIR)
+        return f"{commit}-dirty" if dirty else commit
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def measure(run: Callable[[], Any], repeat: int) -> List[float]:
+    """Wall-clock seconds of each of `repeat` runs, after one warm-up run"""
+    run()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def result(times: List[float], items: int, unit: str) -> Dict[str, Any]:
+    median = statistics.median(times)
+    return {
+        "median_s": round(median, 6),
+        "min_s": round(min(times), 6),
+        "items": items,
+        "unit": unit,
+        "per_item_us": round(median / items * 1e6, 2) if items else 0.0,
+    }
+
+
+def bench_parsing(pages: List[Dict[str, Any]], repeat: int) -> Dict[str, Dict[str, Any]]:
+    """extract, decode and normalize stages for a set of pages"""
+    slices = [find_next_data(page["html"]) for page in pages]
+    documents = [json.loads(raw) for raw in slices]
+    payloads = [SOURCES[page["source"]].payload_from_next_data(doc) for page, doc in zip(pages, documents)]
+    total_mb = sum(len(page["html"]) for page in pages) / (1024 * 1024)
+
+    def normalize():
+        return [
+            SOURCES[page["source"]].parse(payload, page["company"], None, "https://example.invalid")
+            for page, payload in zip(pages, payloads)
+        ]
+
+    records = sum(len(batch) for batch in normalize())
+    results = {
+        "extract": result(measure(lambda: [find_next_data(page["html"]) for page in pages], repeat), len(pages), "page"),
+        "decode": result(measure(lambda: [json.loads(raw) for raw in slices], repeat), len(pages), "page"),
+        "normalize": result(measure(normalize, repeat), records, "record"),
+    }
+    results["extract"]["mb_per_s"] = round(total_mb / results["extract"]["median_s"], 1)
+    return results
+
+
+def bench_ingest(records: List[Dict[str, Any]], repeat: int, batch_size: int) -> Dict[str, Dict[str, Any]]:
+    """ingest_api (one POST per record) and ingest_bulk (chunked inserts) against the stub"""
+    with StubServer() as stub:
+        os.environ["NEXT_PUBLIC_SUPABASE_URL"] = stub.url
+        os.environ["SUPABASE_SERVICE_ROLE_KEY"] = "benchmark"
+        os.environ["SALARIS_API_URL"] = stub.url
+
+        from supabase_client import SupabaseClient
+        api_client = SupabaseClient(ingest_mode="api")
+        bulk_client = SupabaseClient(ingest_mode="bulk", batch_size=batch_size)
+
+        return {
+            "ingest_api": result(measure(lambda: api_client.insert_salaries(records), repeat), len(records), "record"),
+            "ingest_bulk": result(measure(lambda: bulk_client.insert_salaries(records), repeat), len(records), "record"),
+        }
+
+
+def print_results(results: Dict[str, Dict[str, Any]], previous: Dict[str, Dict[str, Any]] = None):
+    for name, stats in results.items():
+        line = (
+            f"{name:>28}: {stats['median_s'] * 1000:10.2f} ms  "
+            f"{stats['per_item_us']:10.2f} us/{stats['unit']}  ({stats['items']} {stats['unit']}s)"
+        )
+        if previous and name in previous:
+            line += f"  {stats['median_s'] / previous[name]['median_s']:.2f}x previous"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark scraper parsing, normalization and ingestion")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per stage; the median is reported")
+    parser.add_argument("--scale", type=int, default=1, help="Size multiplier for the synthetic pages")
+    parser.add_argument("--filler-kb", type=int, default=200, help="Markup added around each payload")
+    parser.add_argument("--ingest-records", type=int, default=2000, help="Records sent per ingestion run")
+    parser.add_argument("--batch-size", type=int, default=500, help="Rows per insert in bulk ingestion")
+    parser.add_argument("--output", default=None, help="Results file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", default=None, help="Previous results file to compare against")
+    args = parser.parse_args()
+
+    # Per-request INFO logs would be timed along with the work
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger().setLevel(logging.WARNING)
+
+    cases = {"captured": load_pages(filler_kb=args.filler_kb), "synthetic": synthetic_pages(args.scale, args.filler_kb)}
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for case, pages in cases.items():
+        if not pages:
+            print(f"No pages for {case}, skipping")
+            continue
+        for stage, stats in bench_parsing(pages, args.repeat).items():
+            results[f"{case}/{stage}"] = stats
+
+    # Normalized synthetic records, so ingestion does not depend on what is captured
+    ingest_records = []
+    for page in cases["synthetic"]:
+        payload = SOURCES[page["source"]].payload_from_next_data(page["document"])
+        ingest_records.extend(SOURCES[page["source"]].parse(payload, page["company"], None, "https://example.invalid"))
+    ingest_records = ingest_records[:args.ingest_records]
+    for stage, stats in bench_ingest(ingest_records, args.repeat, args.batch_size).items():
+        results[f"ingest/{stage}"] = stats
+
+    revision = git_revision()
+    report = {
+        "revision": revision,
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "args": vars(args),
+        "results": results,
+    }
+
+    previous = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            previous_report = json.load(f)
+        previous = previous_report["results"]
+        print(f"Comparing {revision} against {previous_report['revision']}")
+        if previous_report.get("args", {}).get("scale") != args.scale:
+            print("Warning: --scale differs from the previous run, per-item times are the fair comparison")
+
+    print_results(results, previous)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{revision}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
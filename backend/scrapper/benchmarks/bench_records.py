@@ -0,0 +1,174 @@
+"""
+Benchmark: salary record representation
+Compares normalize_salary_data dicts with SalaryRecordBatch records on the
+same synthetic page contents: time to build a page's records, memory held
+by them, and time to turn them into API payloads and salary_submissions
+rows at the ingest edge
+
+Usage: python benchmarks/bench_records.py [--records 100000] [--repeat 5]
+"""
+
+import argparse
+import gc
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import synthetic_levels_fyi, synthetic_weekday
+from salary_record import SalaryRecordBatch
+from sources import parse_levels_fyi_payload, parse_weekday_payload
+from supabase_client import SupabaseClient, normalize_salary_data
+
+URL = "https://example.invalid"
+
+
+def page_inputs(records: int) -> List[Dict[str, Any]]:
+    """
+    What each source hands the normalizer per record, taken from synthetic
+    levels.fyi and weekday pages (half the records each)
+    """
+    levels = parse_levels_fyi_payload(synthetic_levels_fyi(records // 2), "Google", "company-id", URL)
+    weekday = parse_weekday_payload(
+        synthetic_weekday(max(records // 2 // 100, 1), 100), "Google", "company-id", URL
+    )
+    inputs = []
+    for record in levels + weekday:
+        inputs.append({
+            "designation": record.designation,
+            "location": record.location,
+            "source_platform": record.source_platform,
+            "base": record.base_salary,
+            "bonus": record.bonus,
+            "stock": record.stock_compensation,
+            "total_compensation": record.total_compensation,
+            "years_of_experience": record.years_of_experience,
+            "level": record.level,
+            "data_points": record.data_points_count,
+            "role_category": record.get("role_category"),
+        })
+    return inputs[:records]
+
+
+def as_dicts(inputs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [
+        normalize_salary_data(
+            company_id="company-id",
+            company_name="Google",
+            designation=item["designation"],
+            location=item["location"],
+            source_platform=item["source_platform"],
+            compensation={
+                "base": item["base"],
+                "bonus": item["bonus"],
+                "stock": item["stock"],
+                "total_compensation": item["total_compensation"],
+            },
+            years_of_experience=item["years_of_experience"],
+            level=item["level"],
+            data_points=item["data_points"],
+            role_category=item["role_category"],
+            source_url=URL
+        )
+        for item in inputs
+    ]
+
+
+def as_records(inputs: List[Dict[str, Any]]) -> list:
+    # One batch per source, as each page gets its own
+    batches = {}
+    for item in inputs:
+        batch = batches.get(item["source_platform"])
+        if batch is None:
+            batch = batches[item["source_platform"]] = SalaryRecordBatch(
+                "company-id", "Google", item["source_platform"], source_url=URL
+            )
+        batch.add(
+            designation=item["designation"],
+            location=item["location"],
+            base=item["base"],
+            bonus=item["bonus"],
+            stock=item["stock"],
+            total_compensation=item["total_compensation"],
+            years_of_experience=item["years_of_experience"],
+            level=item["level"],
+            data_points=item["data_points"],
+            role_category=item["role_category"]
+        )
+    return [record for batch in batches.values() for record in batch]
+
+
+def median_time(run: Callable[[], Any], repeat: int) -> float:
+    """Median wall-clock seconds of `repeat` runs, after one warm-up run"""
+    run()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def held_bytes(build: Callable[[], list]) -> int:
+    """Bytes still allocated once build()'s result is kept, i.e. what holding the records costs"""
+    gc.collect()
+    tracemalloc.start()
+    records = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del records
+    return current
+
+
+def submission_rows(records: list) -> int:
+    rows = 0
+    for record in records:
+        try:
+            SupabaseClient._to_submission_row(record)
+            rows += 1
+        except ValueError:
+            pass
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dict vs slotted salary records")
+    parser.add_argument("--records", type=int, default=100000, help="Records per run")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case; the median is reported")
+    args = parser.parse_args()
+
+    inputs = page_inputs(args.records)
+    builders = {"dict": as_dicts, "SalaryRecord": as_records}
+    print(f"{len(inputs)} records")
+
+    results = {}
+    for name, build in builders.items():
+        records = build(inputs)
+        results[name] = {
+            "normalize": median_time(lambda: build(inputs), args.repeat),
+            "memory": held_bytes(lambda: build(inputs)),
+            "api_payload": median_time(lambda: [SupabaseClient._to_api_payload(r) for r in records], args.repeat),
+            "submission_row": median_time(lambda: submission_rows(records), args.repeat),
+        }
+
+    baseline = results["dict"]
+    for name, stats in results.items():
+        print(
+            f"{name:>13}: normalize {len(inputs) / stats['normalize'] / 1000:8.1f} k records/s  "
+            f"memory {stats['memory'] / len(inputs):6.0f} B/record  "
+            f"api payload {stats['api_payload'] / len(inputs) * 1e6:5.2f} us/record  "
+            f"submission row {stats['submission_row'] / len(inputs) * 1e6:5.2f} us/record"
+        )
+    records = results["SalaryRecord"]
+    print(
+        f"SalaryRecord vs dict: normalize {baseline['normalize'] / records['normalize']:.2f}x faster, "
+        f"{records['memory'] / baseline['memory']:.2f}x the memory"
+    )
+
+
+if __name__ == "__main__":
+    main()
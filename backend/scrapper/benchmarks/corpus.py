@@ -0,0 +1,139 @@
+"""
+Benchmark Corpus
+Rebuilds source pages from the dumps captured in debug_output/, and
+generates large synthetic payloads with the same shape
+"""
+
+import json
+import os
+import random
+from typing import Any, Dict, List
+
+from debug_store import iter_legacy_dumps
+
+SCRAPER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEBUG_DIR = os.path.join(SCRAPER_DIR, "debug_output")
+
+
+def next_data_document(source: str, raw_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Wrap a dump's raw_data back into the __NEXT_DATA__ document it came from"""
+    if source == "weekday":
+        page_props = {"salaryData": raw_data}
+    else:
+        page_props = raw_data
+
+    return {
+        "props": {"pageProps": page_props, "__N_SSP": True},
+        "page": "/benchmark",
+        "query": {},
+        "buildId": "benchmark",
+        "isFallback": False,
+        "gssp": True,
+        "scriptLoader": [],
+    }
+
+
+def render_page(next_data: Dict[str, Any], filler_kb: int = 200) -> bytes:
+    """
+    Render a Next.js-style HTML page around a __NEXT_DATA__ document.
+    filler_kb of server-rendered markup is added so the parsers have a
+    realistic amount of DOM to walk past.
+    """
+    payload = json.dumps(next_data, separators=(",", ":")).replace("<", "\\u003c")
+
+    row = (
+        '<div class="salary-row"><span class="level">L{0}</span>'
+        '<span class="value">&#8377;{0},00,000</span><a href="/l/{0}">details</a></div>'
+    )
+    rows: List[str] = []
+    size = 0
+    i = 0
+    while size < filler_kb * 1024:
+        rows.append(row.format(i))
+        size += len(rows[-1])
+        i += 1
+
+    page = (
+        "<!DOCTYPE html><html lang=\"en\"><head><meta charSet=\"utf-8\"/>"
+        "<title>Salaries</title>"
+        "<script src=\"/_next/static/chunks/main.js\" defer=\"\"></script></head>"
+        "<body><div id=\"__next\"><main>" + "".join(rows) + "</main></div>"
+        "<script id=\"__NEXT_DATA__\" type=\"application/json\">" + payload + "</script>"
+        "</body></html>"
+    )
+    return page.encode("utf-8")
+
+
+def load_pages(debug_dir: str = DEBUG_DIR, filler_kb: int = 200) -> List[Dict[str, Any]]:
+    """Rendered HTML for every dump, with the document it should extract to"""
+    pages = []
+    for dump in iter_legacy_dumps(debug_dir):
+        raw_data = dump["payload"].get("raw_data")
+        if raw_data is None:
+            continue
+
+        document = next_data_document(dump["source"], raw_data)
+        pages.append({
+            "company": dump["company"],
+            "source": dump["source"],
+            "document": document,
+            "html": render_page(document, filler_kb),
+        })
+    return pages
+
+
+def synthetic_levels_fyi(averages: int, seed: int = 0) -> Dict[str, Any]:
+    """A levels.fyi pageProps payload with `averages` salary entries"""
+    rng = random.Random(seed)
+    entries = []
+    for i in range(averages):
+        base = rng.randint(20_000, 200_000)
+        bonus = rng.randint(0, base // 5)
+        stock = rng.randint(0, base)
+        entries.append({
+            "primaryLevelName": f"L{3 + i % 6}",
+            "secondaryLevelName": f"Track {i % 7}" if i % 3 else None,
+            "rawValues": {"base": base, "bonus": bonus, "stock": stock, "total": base + bonus + stock},
+            "yearsOfExperience": rng.randint(0, 20),
+            "location": rng.choice(["Bengaluru, KA, India", "Hyderabad, TS, India", "India"]),
+            "numDataPoints": rng.randint(1, 50),
+        })
+    return {"averages": entries, "locationExchangeRate": 83.2}
+
+
+def synthetic_weekday(roles: int, salaries_per_role: int, seed: int = 0) -> Dict[str, Any]:
+    """A weekday salaryData payload with roles x salaries_per_role individual salaries"""
+    rng = random.Random(seed)
+    return {
+        "roles": [
+            {
+                "role": f"Role {r}",
+                "individualSalaries": [
+                    {
+                        "role": f"Role {r} - {rng.choice(['I', 'II', 'III', 'Senior', 'Staff'])}",
+                        "yearsOfExperience": rng.randint(0, 20),
+                        "salary": round(rng.uniform(4, 120), 2),
+                    }
+                    for _ in range(salaries_per_role)
+                ],
+            }
+            for r in range(roles)
+        ]
+    }
+
+
+def synthetic_pages(scale: int = 1, filler_kb: int = 200) -> List[Dict[str, Any]]:
+    """Large synthetic pages: a levels.fyi page and a weekday page per scale step"""
+    pages = []
+    for source, raw_data in (
+        ("levels_fyi", synthetic_levels_fyi(5000 * scale)),
+        ("weekday", synthetic_weekday(50, 200 * scale)),
+    ):
+        document = next_data_document(source, raw_data)
+        pages.append({
+            "company": f"synthetic-{source}",
+            "source": source,
+            "document": document,
+            "html": render_page(document, filler_kb),
+        })
+    return pages
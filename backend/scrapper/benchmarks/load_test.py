@@ -0,0 +1,146 @@
+"""
+Load test: SupabaseClient write path
+Runs scrape-shaped jobs (start_scrape, insert_salaries, complete_scrape)
+for many synthetic companies against the local Supabase stand-in, for each
+combination of ingest mode and concurrency, and reports throughput.
+
+Usage:
+    python benchmarks/load_test.py --scale 10 --modes api,bulk --concurrency 1,8
+    python benchmarks/load_test.py --scale 100 --latency 0.02 --error-rate 0.01
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import SCRAPER_DIR, synthetic_levels_fyi
+from benchmarks.local_supabase import LocalSupabase
+from http_session import HttpTransport
+from sources import parse_levels_fyi_payload
+
+
+def company_names(scale: int) -> List[str]:
+    """companies.json repeated `scale` times, with a suffix to keep names unique"""
+    with open(os.path.join(SCRAPER_DIR, "companies.json"), "r") as f:
+        base = json.load(f)
+    return [name if copy == 0 else f"{name} {copy}" for copy in range(scale) for name in base]
+
+
+def run_config(
+    companies: List[str],
+    records_per_company: int,
+    mode: str,
+    concurrency: int,
+    args: argparse.Namespace
+) -> Dict[str, Any]:
+    """One load test run against a fresh stand-in"""
+    with LocalSupabase(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, seed=args.seed) as server:
+        os.environ["NEXT_PUBLIC_SUPABASE_URL"] = server.url
+        os.environ["SUPABASE_SERVICE_ROLE_KEY"] = "load-test"
+        os.environ["SALARIS_API_URL"] = server.url
+
+        from company_resolver import CompanyResolver
+        from supabase_client import SupabaseClient
+
+        transport = HttpTransport(pool_maxsize=max(10, concurrency))
+        db = SupabaseClient(transport=transport, ingest_mode=mode, batch_size=args.batch_size)
+
+        start = time.perf_counter()
+        resolver = CompanyResolver(db)
+        resolver.resolve_many(companies)
+        companies_seconds = time.perf_counter() - start
+
+        def job(index_and_name):
+            index, name = index_and_name
+            records = parse_levels_fyi_payload(
+                synthetic_levels_fyi(records_per_company, seed=index), name, resolver.get_id(name), "https://example.invalid"
+            )
+            scrape_id = db.start_scrape(name, "levels_fyi", resolver.get_id(name))
+            count = db.insert_salaries(records)
+            db.complete_scrape(scrape_id, "success", count)
+            return count
+
+        failed_jobs = 0
+        written = 0
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            futures = [pool.submit(job, item) for item in enumerate(companies)]
+            for future in futures:
+                try:
+                    written += future.result()
+                except Exception:
+                    failed_jobs += 1
+        jobs_seconds = time.perf_counter() - start
+
+        transport_stats = transport.stats().get(urlparse(server.url).netloc, {})
+        return {
+            "mode": mode,
+            "concurrency": concurrency,
+            "companies": len(companies),
+            "records": len(companies) * records_per_company,
+            "written": written,
+            "stored": len(server.tables["salary_submissions"]),
+            "failed_jobs": failed_jobs,
+            "companies_seconds": round(companies_seconds, 3),
+            "jobs_seconds": round(jobs_seconds, 3),
+            "records_per_second": round(written / jobs_seconds, 1) if jobs_seconds else 0.0,
+            "jobs_per_second": round(len(companies) / jobs_seconds, 1) if jobs_seconds else 0.0,
+            "server_requests": sum(v for k, v in server.stats.items() if k.startswith(("GET", "POST", "PATCH", "DELETE"))),
+            "injected_errors": server.stats.get("injected_errors", 0),
+            "transport_retries": transport_stats.get("retries", 0),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test SupabaseClient against a local Supabase stand-in")
+    parser.add_argument("--scale", type=int, default=10, help="Multiple of the companies in companies.json")
+    parser.add_argument("--records-per-company", type=int, default=20, help="Salary records ingested per company")
+    parser.add_argument("--modes", default="api,bulk", help="Ingest modes to compare")
+    parser.add_argument("--concurrency", default="1,8", help="Comma-separated worker counts to compare")
+    parser.add_argument("--batch-size", type=int, default=500, help="Rows per insert in bulk mode")
+    parser.add_argument("--latency", type=float, default=0.005, help="Seconds added to every request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Up to this many extra seconds per request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with 503")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for latency jitter and injected errors")
+    parser.add_argument("--output", default=None, help="Also write the results as JSON here")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger().setLevel(logging.WARNING)
+
+    companies = company_names(args.scale)
+    print(
+        f"{len(companies)} companies x {args.records_per_company} records, "
+        f"latency {args.latency * 1000:.0f}ms (+{args.jitter * 1000:.0f}ms jitter), "
+        f"error rate {args.error_rate:.1%}"
+    )
+
+    results = []
+    for mode in args.modes.split(","):
+        for concurrency in (int(c) for c in args.concurrency.split(",")):
+            result = run_config(companies, args.records_per_company, mode, concurrency, args)
+            results.append(result)
+            print(
+                f"{mode:>5} x{concurrency:<3}: {result['records_per_second']:9.1f} records/s  "
+                f"{result['jobs_per_second']:7.1f} jobs/s  {result['server_requests']:7d} requests  "
+                f"{result['failed_jobs']} failed jobs  {result['transport_retries']} retries  "
+                f"(companies loaded in {result['companies_seconds']:.2f}s, "
+                f"{result['stored']}/{result['records']} records stored)"
+            )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+        print(f"Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,548 @@
+"""
+Local Supabase Stand-in
+An in-memory, localhost implementation of the Supabase REST (PostgREST)
+table operations SupabaseClient uses, plus the Next.js POST /api/salaries
+endpoint, with configurable latency and error injection.
+
+Point SupabaseClient at it with:
+    NEXT_PUBLIC_SUPABASE_URL=<url>  SUPABASE_SERVICE_ROLE_KEY=<anything>  SALARIS_API_URL=<url>
+
+Supported: select (column lists, eq/neq/lt/lte/gt/gte/in/is filters,
+or=(...) / and=(...) logic trees, order, limit/offset), insert, upsert
+(on_conflict + ignore-duplicates), update and delete, Prefer
+return=minimal and count=exact (on delete), and the
+latest_successful_scrapes view. Unique and NOT NULL / CHECK constraints
+the scraper can hit are enforced, so bad rows fail like they would in
+Postgres.
+"""
+
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlparse
+
+TABLES = (
+    "companies", "salaries", "scrape_runs", "scrape_history", "data_sources", "salary_submissions", "salary_trends",
+    "salary_sketches",
+)
+
+# Columns with UNIQUE constraints, per table; every table's id is its primary key.
+# A tuple is a multi-column key whose NULLs are not distinct.
+UNIQUE = {
+    "companies": ("id", "name", "slug"),
+    "salaries": ("id",),
+    "scrape_runs": ("id",),
+    "scrape_history": ("id",),
+    "data_sources": ("id", "name"),
+    "salary_submissions": ("id",),
+    "salary_trends": ("id", ("company_id", "designation", "level", "location", "year", "quarter")),
+    "salary_sketches": ("id", ("company_id", "experience_bracket")),
+}
+
+# Columns that must be present, per table (NOT NULL without a default)
+NOT_NULL = {
+    "companies": ("name", "slug"),
+    "salaries": ("company_name", "designation", "location", "source_platform"),
+    "scrape_runs": ("status",),
+    "scrape_history": ("company_name", "source_platform", "status"),
+    "data_sources": ("name", "base_url"),
+    "salary_submissions": ("company", "role", "location", "total_compensation"),
+    "salary_trends": ("designation", "location", "year"),
+    "salary_sketches": ("company_id", "experience_bracket", "sketch"),
+}
+
+# Tables with an updated_at column, which defaults to the insert time
+UPDATED_AT = ("companies", "salaries", "data_sources", "salary_trends", "salary_sketches")
+
+# Seeded like schema.sql
+DATA_SOURCES = [
+    {"name": "levels_fyi", "base_url": "https://www.levels.fyi", "scrape_frequency_hours": 168, "reliability_score": 0.95},
+    {"name": "weekday", "base_url": "https://www.weekday.works", "scrape_frequency_hours": 168, "reliability_score": 0.85},
+    {"name": "ambitionbox", "base_url": "https://www.ambitionbox.com", "scrape_frequency_hours": 168, "reliability_score": 0.80},
+    {"name": "glassdoor", "base_url": "https://www.glassdoor.co.in", "scrape_frequency_hours": 168, "reliability_score": 0.75},
+]
+
+REQUIRED_API_FIELDS = ("company", "role", "location", "totalCompensation")
+
+LOGIC_OPERATORS = ("or", "and", "not.or", "not.and")
+
+_FILTER = re.compile(r"^(not\.)?(eq|neq|lt|lte|gt|gte|in|is)\.(.*)$", re.DOTALL)
+
+
+class PostgrestError(Exception):
+    def __init__(self, status: int, code: str, message: str):
+        super().__init__(message)
+        self.status = status
+        self.body = {"code": code, "message": message, "details": None, "hint": None}
+
+
+def _unique_value(row: Dict[str, Any], column) -> Any:
+    """Value of a UNIQUE column, or of a multi-column key, in a row; None is never a conflict"""
+    if isinstance(column, tuple):
+        return tuple(row.get(c) for c in column)
+    return row.get(column)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _split_in_list(value: str) -> List[str]:
+    """Items of an in.(a,"b,c") filter"""
+    items, current, quoted, escaped = [], "", False, False
+    for char in value.strip("()"):
+        if escaped:
+            current += char
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char == '"':
+            quoted = not quoted
+        elif char == "," and not quoted:
+            items.append(current)
+            current = ""
+        else:
+            current += char
+    items.append(current)
+    return items
+
+
+def _split_logic_tree(value: str) -> List[str]:
+    """Top-level items of an or=(...) / and(...) list; commas inside parentheses or quotes don't split"""
+    items, current, depth, quoted, escaped = [], "", 0, False, False
+    for char in value:
+        if escaped:
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char == '"':
+            quoted = not quoted
+        elif char == "(" and not quoted:
+            depth += 1
+        elif char == ")" and not quoted:
+            depth -= 1
+        elif char == "," and depth == 0 and not quoted:
+            items.append(current)
+            current = ""
+            continue
+        current += char
+    items.append(current)
+    return items
+
+
+def _unquote(value: str) -> str:
+    """A filter value with its surrounding double quotes and backslash escapes removed"""
+    if len(value) < 2 or not (value.startswith('"') and value.endswith('"')):
+        return value
+    return re.sub(r"\\(.)", r"\1", value[1:-1])
+
+
+def _coerce(value: str, like: Any) -> Any:
+    """A filter value converted to the type of the stored value it is compared to"""
+    if isinstance(like, bool):
+        return value == "true"
+    if isinstance(like, (int, float)):
+        try:
+            return float(value)
+        except ValueError:
+            return value
+    return value
+
+
+def _parse_filter(column: str, expression: str) -> Tuple[str, bool, str, Any]:
+    """(column, negated, operator, value) for a PostgREST filter like eq.x or in.(a,b)"""
+    match = _FILTER.match(expression)
+    if not match:
+        raise PostgrestError(400, "PGRST100", f"unsupported filter: {column}={expression}")
+    negate, op, value = match.groups()
+    if op == "in":
+        value = set(_split_in_list(value))
+    else:
+        value = _unquote(value)
+    return column, bool(negate), op, value
+
+
+def _parse_logic_tree(operator: str, expression: str) -> Tuple[None, bool, str, List]:
+    """(None, negated, "or"/"and", conditions) for a logic tree like or=(a.eq.1,and(b.gt.2,c.is.null))"""
+    negate = operator.startswith("not.")
+    conditions = []
+    for item in _split_logic_tree(expression.strip()[1:-1]):
+        match = re.match(r"^((?:not\.)?(?:and|or))(\(.*\))$", item, re.DOTALL)
+        if match:
+            conditions.append(_parse_logic_tree(*match.groups()))
+        else:
+            column, _, filter_expression = item.partition(".")
+            conditions.append(_parse_filter(column, filter_expression))
+    return None, negate, operator[4:] if negate else operator, conditions
+
+
+def _matches(row: Dict[str, Any], condition: Tuple[str, bool, str, Any]) -> bool:
+    column, negate, op, value = condition
+    actual = row.get(column)
+
+    if op in ("and", "or"):
+        results = (_matches(row, child) for child in value)
+        result = all(results) if op == "and" else any(results)
+    elif op == "is":
+        result = actual is None if value == "null" else actual is (value == "true")
+    elif op == "in":
+        result = actual is not None and str(actual) in value
+    elif actual is None:
+        result = False
+    else:
+        expected = _coerce(value, actual)
+        if isinstance(actual, (int, float)) and not isinstance(expected, float):
+            actual = str(actual)
+        result = {
+            "eq": lambda: actual == expected,
+            "neq": lambda: actual != expected,
+            "lt": lambda: actual < expected,
+            "lte": lambda: actual <= expected,
+            "gt": lambda: actual > expected,
+            "gte": lambda: actual >= expected,
+        }[op]()
+    return not result if negate else result
+
+
+def _sort_key(value: Any) -> Tuple:
+    # Postgres sorts NULLs last ascending; mixed types never compare
+    return (value is None, str(type(value)), value if value is not None else 0)
+
+
+class LocalSupabase(ThreadingHTTPServer):
+    """
+    Run with `with LocalSupabase(latency=0.02, error_rate=0.01) as db:`
+    latency: seconds added to every request, plus up to `jitter` more
+    error_rate: share of requests answered with error_status before doing
+        anything, like an overloaded gateway (503 is safe to retry)
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        seed: Optional[int] = None,
+        port: int = 0
+    ):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.url = f"http://127.0.0.1:{self.server_address[1]}"
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._random = random.Random(seed)
+
+        self.tables: Dict[str, List[Dict[str, Any]]] = {name: [] for name in TABLES}
+        # table -> column -> value -> row, for the UNIQUE columns
+        self._unique: Dict[str, Dict[str, Dict[Any, Dict[str, Any]]]] = {
+            table: {column: {} for column in columns} for table, columns in UNIQUE.items()
+        }
+        self.stats: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+        for source in DATA_SOURCES:
+            self.insert_rows("data_sources", [dict(source)])
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+    # --- request hooks -------------------------------------------------
+
+    def count(self, name: str, value: int = 1):
+        with self._lock:
+            self.stats[name] = self.stats.get(name, 0) + value
+
+    def delay_or_fail(self) -> bool:
+        """Apply injected latency; True if this request should fail"""
+        with self._lock:
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+            fail = self.error_rate > 0 and self._random.random() < self.error_rate
+        if delay:
+            time.sleep(delay)
+        return fail
+
+    # --- table operations ----------------------------------------------
+
+    def _defaults(self, table: str, row: Dict[str, Any]) -> Dict[str, Any]:
+        row = dict(row)
+        row.setdefault("id", str(uuid.uuid4()))
+        row.setdefault("created_at", _now())
+        if table in UPDATED_AT:
+            row.setdefault("updated_at", row["created_at"])
+        if table == "salary_submissions":
+            row.setdefault("status", "pending")
+        if table == "data_sources":
+            row.setdefault("is_active", True)
+            row.setdefault("last_scraped_at", None)
+        return row
+
+    def _check(self, table: str, row: Dict[str, Any]):
+        for column in NOT_NULL.get(table, ()):
+            if row.get(column) in (None, ""):
+                raise PostgrestError(
+                    400, "23502", f'null value in column "{column}" of relation "{table}" violates not-null constraint'
+                )
+        if table == "salaries" and row.get("total_compensation") is not None and float(row["total_compensation"]) <= 0:
+            raise PostgrestError(400, "23514", 'new row for relation "salaries" violates check constraint "positive_salary"')
+
+    def _conflict(self, table: str, row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        for column, index in self._unique.get(table, {}).items():
+            value = _unique_value(row, column)
+            if value is not None and value in index:
+                return index[value]
+        return None
+
+    def _reindex(self, table: str):
+        for column, index in self._unique.get(table, {}).items():
+            index.clear()
+            for row in self.tables[table]:
+                value = _unique_value(row, column)
+                if value is not None:
+                    index[value] = row
+
+    def insert_rows(
+        self,
+        table: str,
+        rows: List[Dict[str, Any]],
+        on_conflict: Optional[str] = None,
+        ignore_duplicates: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Insert rows atomically: one bad row fails the whole statement"""
+        with self._lock:
+            prepared = [self._defaults(table, row) for row in rows]
+            for row in prepared:
+                self._check(table, row)
+
+            unique = self._unique.get(table, {})
+            in_statement = {column: {} for column in unique}
+            written, pending, updated = [], [], False
+            for row in prepared:
+                existing = self._conflict(table, row)
+                if existing is None:
+                    # Duplicates within the same statement conflict too
+                    existing = next(
+                        (in_statement[c][_unique_value(row, c)] for c in unique
+                         if _unique_value(row, c) is not None and _unique_value(row, c) in in_statement[c]),
+                        None
+                    )
+                if existing is not None:
+                    if on_conflict and ignore_duplicates:
+                        continue
+                    if on_conflict:
+                        existing.update({k: v for k, v in row.items() if k not in ("id", "created_at")})
+                        written.append(existing)
+                        updated = True
+                        continue
+                    raise PostgrestError(409, "23505", f"duplicate key value violates unique constraint on {table}")
+                pending.append(row)
+                for column in unique:
+                    if _unique_value(row, column) is not None:
+                        in_statement[column][_unique_value(row, column)] = row
+
+            self.tables[table].extend(pending)
+            if updated:
+                self._reindex(table)
+            else:
+                for column, index in unique.items():
+                    index.update((_unique_value(row, column), row) for row in pending if _unique_value(row, column) is not None)
+            return [dict(row) for row in written + pending]
+
+    def select_rows(self, table: str, params: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        if table == "latest_successful_scrapes":
+            rows = self._latest_successful_scrapes()
+        else:
+            with self._lock:
+                rows = list(self._candidates(table, params))
+
+        rows = self._filter(rows, params)
+        options = dict(params)
+
+        for part in reversed([p for p in options.get("order", "").split(",") if p]):
+            column, _, direction = part.partition(".")
+            rows.sort(key=lambda row: _sort_key(row.get(column)), reverse=direction.startswith("desc"))
+
+        offset = int(options.get("offset", 0))
+        limit = options.get("limit")
+        rows = rows[offset:offset + int(limit)] if limit is not None else rows[offset:]
+
+        columns = [c.strip() for c in options.get("select", "*").split(",")]
+        if "*" in columns:
+            return [dict(row) for row in rows]
+        return [{column: row.get(column) for column in columns} for row in rows]
+
+    def _candidates(self, table: str, params: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """Rows an id=eq.<id> filter can match, via the primary key; otherwise the whole table"""
+        for column, expression in params:
+            if column == "id" and expression.startswith("eq."):
+                row = self._unique[table]["id"].get(expression[3:])
+                return [row] if row is not None else []
+        return self.tables[table]
+
+    def _filter(self, rows: List[Dict[str, Any]], params: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        conditions = [
+            _parse_logic_tree(column, expression) if column in LOGIC_OPERATORS else _parse_filter(column, expression)
+            for column, expression in params
+            if column not in ("select", "order", "limit", "offset", "on_conflict", "columns")
+        ]
+        return [row for row in rows if all(_matches(row, condition) for condition in conditions)]
+
+    def update_rows(self, table: str, params: List[Tuple[str, str]], values: Dict[str, Any]) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._filter(self._candidates(table, params), params)
+            for row in rows:
+                row.update(values)
+            if any(column in values for key in UNIQUE.get(table, ()) for column in (key if isinstance(key, tuple) else (key,))):
+                self._reindex(table)
+            return [dict(row) for row in rows]
+
+    def delete_rows(self, table: str, params: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        with self._lock:
+            doomed = self._filter(self._candidates(table, params), params)
+            doomed_ids = {id(row) for row in doomed}
+            self.tables[table] = [row for row in self.tables[table] if id(row) not in doomed_ids]
+            self._reindex(table)
+            return doomed
+
+    def _latest_successful_scrapes(self) -> List[Dict[str, Any]]:
+        latest: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        with self._lock:
+            for row in self.tables["scrape_history"]:
+                if row.get("status") not in ("success", "unchanged") or not row.get("completed_at"):
+                    continue
+                key = (row["company_name"], row["source_platform"])
+                if key not in latest or row["completed_at"] > latest[key]["completed_at"]:
+                    latest[key] = row
+        return [
+            {"company_name": row["company_name"], "source_platform": row["source_platform"], "completed_at": row["completed_at"]}
+            for row in latest.values()
+        ]
+
+    def submit_salary(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """What POST /api/salaries inserts into salary_submissions"""
+        def number(value):
+            return float(value) if value not in (None, "") else None
+
+        return self.insert_rows("salary_submissions", [{
+            "company": body.get("company"),
+            "role": body.get("role"),
+            "location": body.get("location"),
+            "years_of_experience": number(body.get("yearsOfExperience")),
+            "base_salary": number(body.get("baseSalary")),
+            "bonus": number(body.get("bonus")),
+            "stock_compensation": number(body.get("stockCompensation")),
+            "total_compensation": body.get("totalCompensation"),
+            "type": body.get("type") or "fulltime",
+            "employment_type": body.get("employmentType") or None,
+            "duration": body.get("duration") or None,
+            "stipend": body.get("stipend") or None,
+            "university": body.get("university") or None,
+            "year": int(body["year"]) if body.get("year") else None,
+            "status": "pending",
+        }])[0]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Small JSON replies; without this each one waits on a delayed ACK
+    disable_nagle_algorithm = True
+
+    server: LocalSupabase
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_json(self) -> Any:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length)) if length else None
+
+    def _reply(self, status: int, body: Any = None, headers: Optional[Dict[str, str]] = None):
+        data = json.dumps(body, default=str).encode("utf-8") if body is not None else b""
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _handle(self, method: str):
+        url = urlparse(self.path)
+        # Always drain the body (postgrest-py sends "{}" with DELETE) so keep-alive stays in sync
+        body = self._read_json()
+        server = self.server
+        server.count(f"{method} {url.path}")
+
+        if server.delay_or_fail():
+            server.count("injected_errors")
+            return self._reply(server.error_status, {"message": "injected failure"})
+
+        try:
+            if url.path == "/api/salaries" and method == "POST":
+                missing = [field for field in REQUIRED_API_FIELDS if not (body or {}).get(field)]
+                if missing:
+                    return self._reply(400, {"error": "Missing required fields: company, role, location, totalCompensation"})
+                return self._reply(201, {"submission": server.submit_salary(body)})
+
+            if not url.path.startswith("/rest/v1/"):
+                return self._reply(404, {"message": f"no route for {url.path}"})
+
+            table = url.path[len("/rest/v1/"):]
+            if table not in server.tables and table != "latest_successful_scrapes":
+                raise PostgrestError(404, "42P01", f'relation "public.{table}" does not exist')
+
+            params = parse_qsl(url.query, keep_blank_values=True)
+            prefer = self.headers.get("Prefer") or ""
+            minimal = "return=minimal" in prefer
+
+            if method == "GET":
+                return self._reply(200, server.select_rows(table, params))
+            if method == "POST":
+                rows = body if isinstance(body, list) else [body]
+                result = server.insert_rows(
+                    table,
+                    rows,
+                    on_conflict=dict(params).get("on_conflict"),
+                    ignore_duplicates="resolution=ignore-duplicates" in prefer
+                )
+                server.count(f"rows_written {table}", len(result))
+                return self._reply(201, None if minimal else result)
+            if method == "PATCH":
+                result = server.update_rows(table, params, body or {})
+                return self._reply(200, None if minimal else result)
+            if method == "DELETE":
+                result = server.delete_rows(table, params)
+                headers = {"Content-Range": f"*/{len(result)}"} if "count=exact" in prefer else None
+                return self._reply(200, None if minimal else result, headers)
+        except PostgrestError as e:
+            server.count("rejected")
+            return self._reply(e.status, e.body)
+
+        self._reply(405, {"message": f"{method} not supported"})
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PATCH(self):
+        self._handle("PATCH")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
@@ -0,0 +1,96 @@
+"""
+Benchmark Stubs
+A localhost HTTP server that answers like POST /api/salaries and the
+Supabase REST (PostgREST) endpoints, so ingestion can be timed without a
+network or a database. Requests are accepted and counted, nothing is stored.
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+
+REQUIRED_API_FIELDS = ("company", "role", "location", "totalCompensation")
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Small JSON replies; without this each one waits on a delayed ACK
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length)) if length else None
+
+    def _reply(self, status: int, body=None):
+        data = json.dumps(body).encode("utf-8") if body is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        body = self._read_json()
+        path = self.path.split("?", 1)[0]
+
+        if path == "/api/salaries":
+            self.server.count("api_requests", 1)
+            if not body or any(not body.get(field) for field in REQUIRED_API_FIELDS):
+                return self._reply(400, {"error": "Missing required fields"})
+            self.server.count("api_rows", 1)
+            return self._reply(201, {"submission": dict(body, id="stub")})
+
+        if path.startswith("/rest/v1/"):
+            rows = body if isinstance(body, list) else [body]
+            self.server.count("rest_requests", 1)
+            self.server.count("rest_rows", len(rows))
+            if "return=minimal" in (self.headers.get("Prefer") or ""):
+                return self._reply(201)
+            return self._reply(201, [dict(row, id=f"stub-{i}") for i, row in enumerate(rows)])
+
+        self._reply(404, {"error": "not found"})
+
+    def do_GET(self):
+        self.server.count("rest_requests", 1)
+        self._reply(200, [])
+
+    def do_PATCH(self):
+        self._read_json()
+        self.server.count("rest_requests", 1)
+        self._reply(200, [])
+
+    def do_DELETE(self):
+        self.server.count("rest_requests", 1)
+        self._reply(200, [])
+
+
+class StubServer(ThreadingHTTPServer):
+    """
+    Run with `with StubServer() as stub:` and point SALARIS_API_URL and
+    NEXT_PUBLIC_SUPABASE_URL at stub.url
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _StubHandler)
+        self.url = f"http://127.0.0.1:{self.server_address[1]}"
+        self.counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    def count(self, name: str, value: int):
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + value
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
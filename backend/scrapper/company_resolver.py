@@ -0,0 +1,85 @@
+"""
+Company ID Resolver
+In-memory name -> company ID cache backed by the companies table
+"""
+
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CompanyResolver:
+    """
+    Resolves company names to IDs without a query per lookup.
+
+    All companies are loaded once in paged queries; missing companies are
+    created together in a single insert. Safe to share between worker
+    threads: lookups read the cache, and creation is serialized.
+    """
+
+    def __init__(self, supabase_client, preload: bool = True):
+        self.db = supabase_client
+        self._ids: Dict[str, str] = {}
+        self._slugs: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+        if preload:
+            self.preload()
+
+    def preload(self):
+        """(Re)load every company from the database"""
+        companies = self.db.get_all_companies()
+        with self._lock:
+            for company in companies:
+                self._remember(company)
+        logger.info(f"Company resolver cached {len(self._ids)} companies")
+
+    def _remember(self, company: Dict[str, str]):
+        self._ids[company["name"]] = company["id"]
+        self._slugs[company["name"]] = company.get("slug")
+
+    def __contains__(self, company_name: str) -> bool:
+        return company_name in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def get_slug(self, company_name: str) -> Optional[str]:
+        return self._slugs.get(company_name)
+
+    def get_id(self, company_name: str) -> str:
+        """Company ID for a name, creating the company if it does not exist yet"""
+        company_id = self._ids.get(company_name)
+        if company_id is not None:
+            return company_id
+        return self.resolve_many([company_name])[company_name]
+
+    def resolve_many(self, company_names: Iterable[str]) -> Dict[str, str]:
+        """
+        Company IDs for several names, creating all missing companies with one insert
+        Returns: dict of company name -> company ID
+        """
+        names = list(dict.fromkeys(company_names))
+
+        missing = [name for name in names if name not in self._ids]
+        if missing:
+            with self._lock:
+                # Another worker may have created some while we waited
+                missing = [name for name in missing if name not in self._ids]
+                if missing:
+                    self._create(missing)
+
+        return {name: self._ids[name] for name in names}
+
+    def _create(self, company_names: List[str]):
+        created = self.db.create_companies(company_names)
+        for company in created:
+            self._remember(company)
+
+        not_created = [name for name in company_names if name not in self._ids]
+        if not_created:
+            raise RuntimeError(f"Failed to create companies: {', '.join(not_created)}")
+
+        logger.info(f"Company resolver created {len(company_names)} companies")
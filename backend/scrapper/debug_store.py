@@ -0,0 +1,283 @@
+"""
+Debug Artifact Store
+Compressed, content-addressed storage for raw scraped payloads
+
+Layout under the store root (debug_output/ by default):
+    blobs/ab/abcdef....json.zst   raw payload, written once per distinct content
+    records/<company>_<source>_<timestamp>.jsonl.gz   processed records sidecar
+    index.jsonl                   one line per save: company/source/timestamp -> blob
+"""
+
+import argparse
+import glob
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from salary_record import as_dict
+
+logger = logging.getLogger(__name__)
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional, gzip is always available
+    zstandard = None
+
+# Per-request telemetry in levels.fyi pageProps; differs on every fetch and
+# would defeat deduplication, and nothing downstream reads it
+VOLATILE_KEYS = ("_sentryTraceData", "_sentryBaggage")
+
+_LEGACY_RAW_JSON_HEADER = "FULL RAW JSON DATA:\n" + "-" * 80 + "\n"
+
+
+def _canonical_json(payload: Any) -> bytes:
+    return json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def payload_hash(payload: Any) -> str:
+    """SHA-256 of a payload's canonical JSON, ignoring VOLATILE_KEYS"""
+    if isinstance(payload, dict):
+        payload = {k: v for k, v in payload.items() if k not in VOLATILE_KEYS}
+    return hashlib.sha256(_canonical_json(payload)).hexdigest()
+
+
+def _compress(data: bytes, codec: str) -> bytes:
+    if codec == "zst":
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return gzip.compress(data, compresslevel=9)
+
+
+def _decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zst":
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read .zst debug blobs (pip install zstandard)")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def _write_atomic(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class DebugArtifactStore:
+    """
+    Stores each distinct raw payload once, compressed, keyed by the
+    SHA-256 of its canonical JSON. Saving an unchanged page again only
+    appends an index line.
+    """
+
+    def __init__(self, root: str = "debug_output", codec: Optional[str] = None):
+        """codec: "zst" or "gz" (default: zst if zstandard is installed, else gz)"""
+        self.root = root
+        self.codec = codec or ("zst" if zstandard is not None else "gz")
+        if self.codec == "zst" and zstandard is None:
+            raise ValueError("zstd compression requires the zstandard package")
+
+        self.index_path = os.path.join(root, "index.jsonl")
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _blob_path(self, blob_hash: str, codec: str) -> str:
+        return os.path.join(self.root, "blobs", blob_hash[:2], f"{blob_hash}.json.{codec}")
+
+    def _find_blob(self, blob_hash: str) -> Optional[Tuple[str, str]]:
+        for codec in ("zst", "gz"):
+            path = self._blob_path(blob_hash, codec)
+            if os.path.exists(path):
+                return path, codec
+        return None
+
+    def put_payload(self, payload: Any) -> Tuple[str, bool, int]:
+        """
+        Store a payload unless identical content is already stored
+        Returns: (content hash, whether it was newly written, uncompressed size)
+        """
+        if isinstance(payload, dict):
+            payload = {k: v for k, v in payload.items() if k not in VOLATILE_KEYS}
+
+        data = _canonical_json(payload)
+        blob_hash = hashlib.sha256(data).hexdigest()
+
+        if self._find_blob(blob_hash):
+            return blob_hash, False, len(data)
+
+        _write_atomic(self._blob_path(blob_hash, self.codec), _compress(data, self.codec))
+        return blob_hash, True, len(data)
+
+    def save(
+        self,
+        company: str,
+        source: str,
+        payload: Any,
+        records: Optional[List[Any]] = None,
+        url: Optional[str] = None,
+        timestamp: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Store a raw payload (and optional processed records) and index it"""
+        timestamp = timestamp or datetime.now().strftime("%Y%m%d_%H%M%S")
+        blob_hash, is_new, raw_bytes = self.put_payload(payload)
+
+        entry = {
+            "company": company,
+            "source": source,
+            "timestamp": timestamp,
+            "url": url,
+            "blob": blob_hash,
+            "raw_bytes": raw_bytes,
+            "new_blob": is_new,
+            "records": None,
+            "record_count": 0,
+        }
+
+        if records:
+            safe_company = company.replace(os.sep, "_")
+            records_path = os.path.join("records", f"{safe_company}_{source}_{timestamp}.jsonl.gz")
+            lines = b"".join(
+                json.dumps(as_dict(record), separators=(",", ":"), default=str).encode("utf-8") + b"\n"
+                for record in records
+            )
+            _write_atomic(os.path.join(self.root, records_path), gzip.compress(lines))
+            entry["records"] = records_path
+            entry["record_count"] = len(records)
+
+        with self._lock:
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+        return entry
+
+    def load_payload(self, blob_hash: str) -> Any:
+        found = self._find_blob(blob_hash)
+        if not found:
+            raise FileNotFoundError(f"No debug blob {blob_hash} in {self.root}")
+
+        path, codec = found
+        with open(path, "rb") as f:
+            return json.loads(_decompress(f.read(), codec))
+
+    def load_records(self, entry: Dict[str, Any]) -> List[Dict[str, Any]]:
+        if not entry.get("records"):
+            return []
+        with gzip.open(os.path.join(self.root, entry["records"]), "rt", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def iter_index(self) -> Iterator[Dict[str, Any]]:
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def latest(self) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """Most recent index entry per (company, source)"""
+        latest = {}
+        for entry in self.iter_index():
+            key = (entry["company"], entry["source"])
+            if key not in latest or entry["timestamp"] >= latest[key]["timestamp"]:
+                latest[key] = entry
+        return latest
+
+    def disk_usage(self) -> int:
+        total = 0
+        for directory, _, files in os.walk(self.root):
+            if directory == self.root:
+                files = [name for name in files if name == "index.jsonl"]
+            total += sum(os.path.getsize(os.path.join(directory, name)) for name in files)
+        return total
+
+
+def read_legacy_dump(path: str) -> Optional[Dict[str, Any]]:
+    """
+    Read a text dump written by the old save_debug_data
+    Returns: {"company", "source", "timestamp", "payload"} or None if unreadable
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+
+    header = {}
+    for line in text.split("\n", 6)[1:5]:
+        key, _, value = line.partition(": ")
+        header[key.lower()] = value
+
+    offset = text.find(_LEGACY_RAW_JSON_HEADER)
+    if offset == -1 or "source" not in header:
+        return None
+
+    try:
+        payload, _ = json.JSONDecoder().raw_decode(text, offset + len(_LEGACY_RAW_JSON_HEADER))
+    except json.JSONDecodeError:
+        return None
+
+    return {
+        "company": header.get("company"),
+        "source": header["source"],
+        "timestamp": header.get("timestamp"),
+        "payload": payload,
+    }
+
+
+def iter_legacy_dumps(debug_dir: str = "debug_output") -> Iterator[Dict[str, Any]]:
+    """Yield every readable legacy text dump in debug_dir, in file name order"""
+    for path in sorted(glob.glob(os.path.join(debug_dir, "*.txt"))):
+        dump = read_legacy_dump(path)
+        if dump:
+            dump["path"] = path
+            yield dump
+
+
+def import_legacy_dumps(store: DebugArtifactStore, debug_dir: str) -> Dict[str, int]:
+    """Copy legacy text dumps into the store (the .txt files are left in place)"""
+    counts = {"dumps": 0, "new_blobs": 0}
+    for dump in iter_legacy_dumps(debug_dir):
+        raw_data = dump["payload"].get("raw_data")
+        if raw_data is None:
+            continue
+        entry = store.save(
+            dump["company"],
+            dump["source"],
+            raw_data,
+            url=dump["payload"].get("url"),
+            timestamp=dump["timestamp"]
+        )
+        counts["dumps"] += 1
+        counts["new_blobs"] += int(entry["new_blob"])
+    return counts
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Manage the scraper debug artifact store")
+    parser.add_argument("--root", default="debug_output", help="Store directory (default: debug_output)")
+    parser.add_argument("--import-legacy", metavar="DIR", help="Import legacy *.txt dumps from DIR")
+    args = parser.parse_args()
+
+    store = DebugArtifactStore(args.root)
+
+    if args.import_legacy:
+        legacy_bytes = sum(os.path.getsize(p) for p in glob.glob(os.path.join(args.import_legacy, "*.txt")))
+        counts = import_legacy_dumps(store, args.import_legacy)
+        logger.info(
+            f"Imported {counts['dumps']} dumps as {counts['new_blobs']} new blobs "
+            f"({legacy_bytes / 1e6:.1f} MB of text dumps)"
+        )
+
+    entries = list(store.iter_index())
+    logger.info(
+        f"Store {args.root}: {len(entries)} index entries, "
+        f"{len({entry['blob'] for entry in entries})} blobs, {store.disk_usage() / 1e6:.1f} MB on disk"
+    )
+
+
+if __name__ == "__main__":
+    main()
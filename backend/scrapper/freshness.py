@@ -0,0 +1,79 @@
+"""
+Scrape Freshness Planner
+Decides which (company, source) pairs are stale from one up-front query
+"""
+
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FRESHNESS_HOURS = 168  # 1 week
+
+
+def parse_timestamp(value: str) -> datetime:
+    """Parse a Postgres/ISO timestamp into an aware datetime (naive values are UTC)"""
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+class FreshnessPlan:
+    """
+    In-memory map of (company, source) -> last successful scrape.
+
+    Built from the latest_successful_scrapes view in a few paged queries,
+    replacing one has_recent_scrape query per (company, source).
+    """
+
+    def __init__(self, last_scraped: Dict[Tuple[str, str], datetime], now: Optional[datetime] = None):
+        self._last_scraped = dict(last_scraped)
+        self.now = now or datetime.now(timezone.utc)
+
+    @classmethod
+    def load(cls, supabase_client) -> "FreshnessPlan":
+        """Fetch the latest successful scrape of every (company, source)"""
+        last_scraped = {}
+        for row in supabase_client.get_latest_successful_scrapes():
+            if row.get("completed_at"):
+                key = (row["company_name"], row["source_platform"])
+                last_scraped[key] = parse_timestamp(row["completed_at"])
+
+        logger.info(f"Freshness plan loaded {len(last_scraped)} (company, source) scrape times")
+        return cls(last_scraped)
+
+    def last_scraped(self, company_name: str, source_platform: str) -> Optional[datetime]:
+        return self._last_scraped.get((company_name, source_platform))
+
+    def hours_since(self, company_name: str, source_platform: str) -> Optional[float]:
+        """Hours since the last successful scrape, or None if never scraped"""
+        last = self.last_scraped(company_name, source_platform)
+        if last is None:
+            return None
+        return (self.now - last).total_seconds() / 3600
+
+    def is_stale(
+        self,
+        company_name: str,
+        source_platform: str,
+        hours: int = DEFAULT_FRESHNESS_HOURS
+    ) -> bool:
+        hours_since = self.hours_since(company_name, source_platform)
+        return hours_since is None or hours_since >= hours
+
+    def stale_jobs(
+        self,
+        companies: Iterable[str],
+        sources: Iterable[str],
+        hours: int = DEFAULT_FRESHNESS_HOURS
+    ) -> List[Tuple[str, str]]:
+        """(company, source) pairs that need scraping, in input order"""
+        sources = list(sources)
+        return [
+            (company, source)
+            for company in companies
+            for source in sources
+            if self.is_stale(company, source, hours)
+        ]
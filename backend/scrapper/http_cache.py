@@ -0,0 +1,103 @@
+"""
+HTTP Response Cache
+Per-URL validators from the last successfully ingested fetch, kept on disk
+so a run can send conditional requests and skip pages that have not changed
+
+Layout under the cache root (http_cache/ by default):
+    ab/abcdef....json   one entry per source URL, named by the SHA-256 of the URL
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+def body_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+class ResponseCache:
+    """
+    Remembers ETag, Last-Modified, the body hash and the payload hash of
+    the last fetch of each URL that was ingested successfully.
+
+    A page counts as unchanged when the server answers 304 to the
+    conditional request, when the body is byte-identical, or when the
+    extracted payload hashes the same (levels.fyi embeds per-request
+    tracing data, so its bodies differ on every fetch even when the
+    salaries do not).
+    """
+
+    def __init__(self, root: str = "http_cache"):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, url: str) -> str:
+        url_hash = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.root, url_hash[:2], f"{url_hash}.json")
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(url), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable cache entry for {url}: {e}")
+            return None
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """If-None-Match / If-Modified-Since headers for the cached entry, if any"""
+        entry = self.get(url)
+        if not entry:
+            return {}
+
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def unchanged_reason(self, url: str, response: requests.Response) -> Optional[str]:
+        """
+        Why the response is known to match the last ingested fetch
+        Returns: "not_modified", "same_body" or None if it may have changed
+        """
+        if response.status_code == 304:
+            return "not_modified"
+
+        entry = self.get(url)
+        if entry and entry.get("body_sha256") == body_hash(response.content):
+            return "same_body"
+        return None
+
+    def same_payload(self, url: str, payload_sha256: str) -> bool:
+        entry = self.get(url)
+        return bool(entry) and entry.get("payload_sha256") == payload_sha256
+
+    def store(self, url: str, response: requests.Response, payload_sha256: Optional[str] = None):
+        """Record a fetch whose records were ingested successfully"""
+        entry = {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "body_sha256": body_hash(response.content),
+            "payload_sha256": payload_sha256,
+            "stored_at": datetime.utcnow().isoformat(),
+        }
+
+        path = self._path(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
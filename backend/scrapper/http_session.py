@@ -0,0 +1,188 @@
+"""
+Shared HTTP Transport
+Pooled, keep-alive sessions used by the scrapers and the API writer
+"""
+
+import logging
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Statuses worth retrying: rate limited or a transient server-side failure
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Statuses where the server refused the request before acting on it,
+# so retrying is safe even for non-idempotent methods like POST
+REFUSED_STATUSES = {429, 503}
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+class HttpTransport:
+    """
+    Thin wrapper around a requests.Session.
+
+    Connections are pooled per host and kept alive between requests, so a
+    full run reuses a handful of connections instead of opening one per
+    fetch. Failed requests are retried with exponential backoff, and every
+    request is timed per host.
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        max_backoff: float = 30.0,
+        timeout: float = 30,
+        headers: Optional[Dict[str, str]] = None
+    ):
+        """
+        pool_connections: number of hosts to keep a connection pool for
+        pool_maxsize: connections kept alive per host (set >= worker count)
+        """
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if headers:
+            self.session.headers.update(headers)
+
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def request(self, method: str, url: str, limiter=None, **kwargs) -> requests.Response:
+        """
+        Send a request, retrying with backoff on connection errors and 429/5xx
+        limiter: optional AdaptiveRateLimiter that paces every attempt and is
+        told each outcome
+        """
+        method = method.upper()
+        kwargs.setdefault("timeout", self.timeout)
+        host = urlparse(url).netloc
+
+        attempt = 0
+        while True:
+            if limiter is not None:
+                limiter.acquire(url)
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.RequestException as e:
+                elapsed = time.perf_counter() - start
+                self._record(host, elapsed, error=True)
+                if limiter is not None:
+                    # Every failure is fed back, or a half-open host's probe would stay in flight forever
+                    limiter.record(url, None, elapsed)
+                # Only connection errors and timeouts are worth another attempt
+                retryable = isinstance(e, (requests.ConnectionError, requests.Timeout))
+                if not retryable or attempt >= self.max_retries or method not in IDEMPOTENT_METHODS:
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning(f"{method} {url} failed ({e}), retrying in {delay:.1f}s")
+            else:
+                elapsed = time.perf_counter() - start
+                self._record(host, elapsed, error=response.status_code >= 400, num_bytes=len(response.content))
+                if limiter is not None:
+                    limiter.record(url, response.status_code, elapsed, response.headers.get("Retry-After"))
+                logger.debug(f"{method} {url} -> {response.status_code} in {elapsed * 1000:.0f}ms")
+
+                if not self._should_retry(method, response.status_code) or attempt >= self.max_retries:
+                    return response
+
+                delay = self._backoff(attempt, response.headers.get("Retry-After"))
+                logger.warning(
+                    f"{method} {url} returned {response.status_code}, retrying in {delay:.1f}s"
+                )
+
+            attempt += 1
+            with self._lock:
+                self._host_stats(host)["retries"] += 1
+            time.sleep(delay)
+
+    def _should_retry(self, method: str, status_code: int) -> bool:
+        if status_code not in RETRY_STATUSES:
+            return False
+        return method in IDEMPOTENT_METHODS or status_code in REFUSED_STATUSES
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Exponential backoff with jitter, honouring a numeric Retry-After header"""
+        if retry_after:
+            try:
+                return min(float(retry_after), self.max_backoff)
+            except ValueError:
+                pass
+
+        delay = self.backoff_factor * (2 ** attempt)
+        return min(delay + random.uniform(0, delay / 2), self.max_backoff)
+
+    def _host_stats(self, host: str) -> Dict[str, Any]:
+        if host not in self._stats:
+            self._stats[host] = {
+                "requests": 0,
+                "errors": 0,
+                "retries": 0,
+                "bytes": 0,
+                "total_seconds": 0.0,
+                "max_seconds": 0.0,
+            }
+        return self._stats[host]
+
+    def _record(self, host: str, elapsed: float, error: bool = False, num_bytes: int = 0):
+        with self._lock:
+            stats = self._host_stats(host)
+            stats["requests"] += 1
+            stats["errors"] += int(error)
+            stats["bytes"] += num_bytes
+            stats["total_seconds"] += elapsed
+            stats["max_seconds"] = max(stats["max_seconds"], elapsed)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-host request counts and timings collected so far"""
+        with self._lock:
+            summary = {}
+            for host, stats in self._stats.items():
+                summary[host] = dict(stats)
+                summary[host]["avg_seconds"] = (
+                    stats["total_seconds"] / stats["requests"] if stats["requests"] else 0.0
+                )
+            return summary
+
+    def close(self):
+        self.session.close()
+
+
+def merge_host_stats(stats_list: List[Dict[str, Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+    """Combine HttpTransport.stats() from several transports (e.g. worker processes)"""
+    merged: Dict[str, Dict[str, Any]] = {}
+    for stats in stats_list:
+        for host, host_stats in stats.items():
+            total = merged.setdefault(host, {
+                "requests": 0, "errors": 0, "retries": 0, "bytes": 0, "total_seconds": 0.0, "max_seconds": 0.0
+            })
+            for key in ("requests", "errors", "retries", "bytes", "total_seconds"):
+                total[key] += host_stats[key]
+            total["max_seconds"] = max(total["max_seconds"], host_stats["max_seconds"])
+
+    for total in merged.values():
+        total["avg_seconds"] = total["total_seconds"] / total["requests"] if total["requests"] else 0.0
+    return merged
@@ -0,0 +1,232 @@
+"""
+Run Metrics
+Per-stage latency histograms and counters for the scrape pipeline, exported
+as a JSON run report and optionally as Prometheus text
+"""
+
+import bisect
+import copy
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Histogram upper bounds in seconds, from a cache hit to a slow bulk insert
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Pipeline stages, in the order a job goes through them
+STAGES = ("fetch", "extract", "parse", "debug_save", "diff", "ingest")
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram, as Prometheus exposes them"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def merge(self, other: "Histogram"):
+        """Add another histogram with the same buckets into this one"""
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> float:
+        """Approximate quantile: the upper bound of the bucket holding it"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        cumulative = []
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            cumulative.append([bound, seen])
+        return {
+            "count": self.count,
+            "sum_seconds": round(self.sum, 6),
+            "avg_seconds": round(self.sum / self.count, 6) if self.count else 0.0,
+            "p50_seconds": self.quantile(0.5),
+            "p95_seconds": self.quantile(0.95),
+            "max_seconds": round(self.max, 6),
+            "buckets": cumulative,
+        }
+
+
+class RunMetrics:
+    """
+    Thread-safe collector for one run.
+    Latencies are kept per (source, stage); counters per (source, name),
+    e.g. bytes_fetched, records_parsed, records_written, jobs_<status>.
+    """
+
+    def __init__(self):
+        self.started_at = datetime.utcnow()
+        self._start = time.perf_counter()
+        self._histograms: Dict[Tuple[str, str], Histogram] = {}
+        self._counters: Dict[Tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, source: str, stage: str, seconds: float):
+        with self._lock:
+            if (source, stage) not in self._histograms:
+                self._histograms[(source, stage)] = Histogram()
+            self._histograms[(source, stage)].observe(seconds)
+
+    def count(self, source: str, name: str, value: float = 1):
+        with self._lock:
+            self._counters[(source, name)] = self._counters.get((source, name), 0) + value
+
+    @contextmanager
+    def stage(self, source: str, stage: str, timings: Optional[Dict[str, float]] = None) -> Iterator[None]:
+        """
+        Time a block as one observation of (source, stage); the elapsed
+        seconds are also added to timings[stage] if a dict is given
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.observe(source, stage, elapsed)
+            if timings is not None:
+                timings[stage] = timings.get(stage, 0.0) + elapsed
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._start
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Copy of the histograms and counters, picklable so worker processes can send it back"""
+        with self._lock:
+            return {"histograms": copy.deepcopy(self._histograms), "counters": dict(self._counters)}
+
+    def merge(self, snapshot: Dict[str, Any]):
+        """Add a snapshot from another RunMetrics (e.g. a worker process) into this one"""
+        with self._lock:
+            for key, histogram in snapshot["histograms"].items():
+                if key not in self._histograms:
+                    self._histograms[key] = Histogram(histogram.buckets)
+                self._histograms[key].merge(histogram)
+            for key, value in snapshot["counters"].items():
+                self._counters[key] = self._counters.get(key, 0) + value
+
+    def report(
+        self,
+        transport_stats: Optional[Dict[str, Any]] = None,
+        rate_limits: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Everything collected so far as a JSON-serializable dict"""
+        elapsed = self.elapsed()
+        with self._lock:
+            sources: Dict[str, Dict[str, Any]] = {}
+            for (source, stage), histogram in self._histograms.items():
+                sources.setdefault(source, {"stages": {}, "counters": {}})["stages"][stage] = histogram.to_dict()
+            for (source, name), value in self._counters.items():
+                sources.setdefault(source, {"stages": {}, "counters": {}})["counters"][name] = value
+
+        for summary in sources.values():
+            busy = sum(stage["sum_seconds"] for stage in summary["stages"].values())
+            records = summary["counters"].get("records_parsed", 0)
+            summary["busy_seconds"] = round(busy, 3)
+            summary["records_per_second"] = round(records / busy, 1) if busy else 0.0
+
+        total_records = sum(summary["counters"].get("records_parsed", 0) for summary in sources.values())
+        return {
+            "started_at": self.started_at.isoformat(),
+            "elapsed_seconds": round(elapsed, 3),
+            "records_parsed": total_records,
+            "records_per_second": round(total_records / elapsed, 1) if elapsed else 0.0,
+            "sources": sources,
+            "hosts": transport_stats or {},
+            "rate_limits": rate_limits or {},
+        }
+
+    def write_report(
+        self,
+        path: str,
+        transport_stats: Optional[Dict[str, Any]] = None,
+        rate_limits: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        report = self.report(transport_stats, rate_limits)
+        _write_text(path, json.dumps(report, indent=2))
+        logger.info(f"Run report written to {path}")
+        return report
+
+    def prometheus_text(self, rate_limits: Optional[Dict[str, Any]] = None) -> str:
+        """Histograms and counters in the Prometheus text exposition format"""
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+
+        lines: List[str] = [
+            "# HELP scraper_stage_seconds Time spent per pipeline stage",
+            "# TYPE scraper_stage_seconds histogram",
+        ]
+        for (source, stage), histogram in histograms:
+            labels = f'source="{source}",stage="{stage}"'
+            seen = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                seen += count
+                lines.append(f'scraper_stage_seconds_bucket{{{labels},le="{bound}"}} {seen}')
+            lines.append(f'scraper_stage_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f"scraper_stage_seconds_sum{{{labels}}} {histogram.sum:.6f}")
+            lines.append(f"scraper_stage_seconds_count{{{labels}}} {histogram.count}")
+
+        names = sorted({name for (_, name), _ in counters})
+        for name in names:
+            lines.append(f"# TYPE scraper_{name}_total counter")
+            for (source, counter_name), value in counters:
+                if counter_name == name:
+                    lines.append(f'scraper_{name}_total{{source="{source}"}} {value:g}')
+
+        if rate_limits:
+            lines.append("# TYPE scraper_host_rate_per_second gauge")
+            for host, state in sorted(rate_limits.items()):
+                lines.append(f'scraper_host_rate_per_second{{host="{host}"}} {state["rate_per_second"]:g}')
+            lines.append("# TYPE scraper_host_circuit_open gauge")
+            for host, state in sorted(rate_limits.items()):
+                lines.append(f'scraper_host_circuit_open{{host="{host}"}} {int(state["circuit"] != "closed")}')
+            lines.append("# TYPE scraper_host_throttled_total counter")
+            for host, state in sorted(rate_limits.items()):
+                lines.append(f'scraper_host_throttled_total{{host="{host}"}} {state["throttled"]}')
+
+        lines.append("# TYPE scraper_run_elapsed_seconds gauge")
+        lines.append(f"scraper_run_elapsed_seconds {self.elapsed():.3f}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str, rate_limits: Optional[Dict[str, Any]] = None):
+        _write_text(path, self.prometheus_text(rate_limits))
+        logger.info(f"Prometheus metrics written to {path}")
+
+
+def _write_text(path: str, text: str):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
@@ -1,12 +1,28 @@
 """
 Migrate existing salary data from JSON files to Supabase
 Run this once to import your existing data
+
+Records are streamed from the file (a JSON array, or NDJSON for .jsonl /
+.ndjson files) in chunks. Each chunk costs one company lookup/creation,
+one existing-key query and one insert, and progress is checkpointed so an
+interrupted import resumes where it stopped.
 """
 
+import argparse
 import json
 import logging
+import os
+import re
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
 from supabase_client import SupabaseClient, normalize_salary_data
-from datetime import datetime
+from company_resolver import CompanyResolver
+
+try:
+    import ijson
+except ImportError:  # ijson is optional, the built-in reader streams arrays too
+    ijson = None
 
 # Setup logging
 logging.basicConfig(
@@ -15,80 +31,240 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+DEFAULT_CHUNK_SIZE = 500
+
+_READ_SIZE = 1 << 16
+
+# Whitespace and commas between array elements
+_SEPARATORS = re.compile(r"[\s,]*")
+_WHITESPACE = re.compile(r"\s*")
+
+
+def _iter_json_array(f) -> Iterator[Any]:
+    """Yield the elements of a top-level JSON array without loading it all"""
+    decoder = json.JSONDecoder()
+    buffer = f.read(_READ_SIZE)
+    pos = _SEPARATORS.match(buffer).end()
+    if buffer[pos:pos + 1] != "[":
+        raise json.JSONDecodeError("Expected a JSON array", buffer, pos)
+    pos += 1
+
+    while True:
+        pos = _SEPARATORS.match(buffer, pos).end()
+        if pos < len(buffer) and buffer[pos] == "]":
+            return
+
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+            # Only a following , or ] proves the item is whole: a number cut
+            # off by the read boundary (15000000000 of 15000000000.0) decodes too
+            after = _WHITESPACE.match(buffer, end).end()
+            complete = after < len(buffer) and buffer[after] in ",]"
+        except json.JSONDecodeError:
+            complete = False
+
+        if not complete:
+            more = f.read(_READ_SIZE)
+            if more:
+                buffer = buffer[pos:] + more
+                pos = 0
+                continue
+            if pos < len(buffer):
+                # Raises the item's own syntax error, if it has one
+                decoder.raw_decode(buffer, pos)
+            raise json.JSONDecodeError("Unterminated JSON array", buffer, len(buffer))
+
+        yield item
+        pos = end
+
+        # Drop consumed text so the buffer stays around _READ_SIZE
+        if pos > _READ_SIZE:
+            buffer = buffer[pos:]
+            pos = 0
+
 
-def migrate_salaries_from_json(json_file_path: str, db: SupabaseClient):
+def iter_salary_records(json_file_path: str) -> Iterator[Dict[str, Any]]:
+    """Stream salary records from a JSON array file or an NDJSON file"""
+    if json_file_path.endswith((".jsonl", ".ndjson")):
+        with open(json_file_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        return
+
+    if ijson is not None:
+        with open(json_file_path, "rb") as f:
+            # use_float keeps numbers as float/int instead of Decimal
+            yield from ijson.items(f, "item", use_float=True)
+        return
+
+    with open(json_file_path, "r", encoding="utf-8") as f:
+        yield from _iter_json_array(f)
+
+
+class MigrationCheckpoint:
+    """
+    Progress of one import, saved to a local JSON file after every chunk.
+    Tied to the source file's size and mtime: if the file changes, the
+    import starts over.
+    """
+
+    def __init__(self, path: str, json_file_path: str):
+        self.path = path
+        stat = os.stat(json_file_path)
+        self.source = {"path": os.path.abspath(json_file_path), "size": stat.st_size, "mtime": stat.st_mtime}
+        self.state = {"records_done": 0, "migrated": 0, "skipped": 0, "errors": 0, "completed": False}
+
+    def load(self) -> bool:
+        """Restore saved progress; False if there is none for this file"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            return False
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint {self.path}: {e}")
+            return False
+
+        if saved.get("source") != self.source:
+            logger.warning(f"Checkpoint {self.path} is for a different version of the file, starting over")
+            return False
+
+        self.state.update(saved.get("state", {}))
+        return True
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"source": self.source, "state": self.state}, f)
+        os.replace(tmp_path, self.path)
+
+
+def _to_salary_record(salary_data: Dict[str, Any], company_id: str) -> Dict[str, Any]:
+    # Prepare compensation data
+    compensation = {
+        'base': salary_data.get('avg_salary', 0),
+        'total_compensation': salary_data.get('avg_salary', 0)
+    }
+
+    # Normalize the salary record
+    return normalize_salary_data(
+        company_id=company_id,
+        company_name=salary_data['company_name'],
+        designation=salary_data.get('designation', 'Unknown'),
+        location=salary_data.get('location', 'India'),
+        source_platform='manual',
+        compensation=compensation,
+        years_of_experience=salary_data.get('yoe'),
+        min_salary=salary_data.get('min_salary'),
+        max_salary=salary_data.get('max_salary'),
+        data_points=salary_data.get('reports', 1)
+    )
+
+
+def migrate_chunk(
+    chunk: List[Dict[str, Any]],
+    db: SupabaseClient,
+    resolver: CompanyResolver
+) -> Tuple[int, int, int]:
+    """
+    Migrate one chunk of raw records
+    Returns: (migrated, skipped, errors)
+    """
+    skipped = 0
+    errors = 0
+
+    named = []
+    for salary_data in chunk:
+        if not salary_data.get('company_name'):
+            logger.warning(f"Skipping record with no company name: {salary_data}")
+            skipped += 1
+            continue
+        named.append(salary_data)
+
+    # One company creation and one existing-key query for the whole chunk
+    company_ids = resolver.resolve_many(salary_data['company_name'] for salary_data in named)
+    existing = db.get_existing_salary_keys(list(company_ids), 'manual')
+
+    records = []
+    for salary_data in named:
+        key = (
+            salary_data['company_name'],
+            salary_data.get('designation', 'Unknown'),
+            salary_data.get('location', 'India')
+        )
+        if key in existing:
+            logger.info(f"Skipping existing record: {key[0]} - {key[1]}")
+            skipped += 1
+            continue
+
+        try:
+            records.append(_to_salary_record(salary_data, company_ids[key[0]]))
+        except Exception as e:
+            logger.error(f"Error migrating record: {key[0]} - {str(e)}")
+            errors += 1
+
+    # The whole chunk goes in as one insert; bad rows are isolated and reported
+    result = db.insert_salaries_bulk(records, batch_size=max(len(records), 1))
+    errors += len(result["failed"])
+
+    return result["inserted"], skipped, errors
+
+
+def migrate_salaries_from_json(
+    json_file_path: str,
+    db: SupabaseClient,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    checkpoint_path: Optional[str] = None,
+    restart: bool = False
+):
     """
     Migrate salary data from JSON file to Supabase
-    Expected format from salaries.json
+    Expected format from salaries.json (a JSON array, or one object per line)
+    checkpoint_path: progress file (default: <json_file_path>.checkpoint)
+    restart: ignore saved progress and import from the first record
     """
     try:
-        with open(json_file_path, 'r') as f:
-            salaries = json.load(f)
-
-        logger.info(f"Loaded {len(salaries)} salary records from {json_file_path}")
-
-        migrated_count = 0
-        error_count = 0
-        skipped_count = 0
-
-        for salary_data in salaries:
-            try:
-                company_name = salary_data.get('company_name')
-                if not company_name:
-                    logger.warning(f"Skipping record with no company name: {salary_data}")
-                    skipped_count += 1
-                    continue
-
-                # Get or create company
-                company_id = db.get_or_create_company(company_name)
-
-                # Check if this record already exists
-                designation = salary_data.get('designation', 'Unknown')
-                location = salary_data.get('location', 'India')
-
-                if db.salary_exists(company_name, designation, location, 'manual'):
-                    logger.info(f"Skipping existing record: {company_name} - {designation}")
-                    skipped_count += 1
-                    continue
-
-                # Prepare compensation data
-                compensation = {
-                    'base': salary_data.get('avg_salary', 0),
-                    'total_compensation': salary_data.get('avg_salary', 0)
-                }
-
-                # Normalize the salary record
-                salary_record = normalize_salary_data(
-                    company_id=company_id,
-                    company_name=company_name,
-                    designation=designation,
-                    location=location,
-                    source_platform='manual',
-                    compensation=compensation,
-                    years_of_experience=salary_data.get('yoe'),
-                    min_salary=salary_data.get('min_salary'),
-                    max_salary=salary_data.get('max_salary'),
-                    data_points=salary_data.get('reports', 1)
-                )
-
-                # Insert into database
-                db.insert_salaries([salary_record])
-                migrated_count += 1
-
-                if migrated_count % 10 == 0:
-                    logger.info(f"Migrated {migrated_count} records so far...")
-
-            except Exception as e:
-                logger.error(f"Error migrating record: {salary_data.get('company_name', 'Unknown')} - {str(e)}")
-                error_count += 1
+        checkpoint = MigrationCheckpoint(checkpoint_path or f"{json_file_path}.checkpoint", json_file_path)
+        if not restart and checkpoint.load():
+            if checkpoint.state["completed"]:
+                logger.info(f"{json_file_path} was already migrated (use --restart to import it again)")
+                return
+            logger.info(f"Resuming after {checkpoint.state['records_done']} records")
+
+        # Company IDs are served from memory; new companies are created once per chunk
+        resolver = CompanyResolver(db)
+
+        state = checkpoint.state
+        records = iter_salary_records(json_file_path)
+        # Records before the checkpoint are parsed but not sent anywhere
+        for _ in islice(records, state["records_done"]):
+            pass
+
+        while True:
+            chunk = list(islice(records, chunk_size))
+            if not chunk:
+                break
+
+            migrated, skipped, errors = migrate_chunk(chunk, db, resolver)
+            state["records_done"] += len(chunk)
+            state["migrated"] += migrated
+            state["skipped"] += skipped
+            state["errors"] += errors
+            checkpoint.save()
+
+            logger.info(f"Migrated {state['migrated']} of {state['records_done']} records so far...")
+
+        state["completed"] = True
+        checkpoint.save()
 
         logger.info("\n" + "="*60)
         logger.info("MIGRATION SUMMARY")
         logger.info("="*60)
-        logger.info(f"Total records: {len(salaries)}")
-        logger.info(f"Successfully migrated: {migrated_count}")
-        logger.info(f"Skipped (already exists): {skipped_count}")
-        logger.info(f"Errors: {error_count}")
+        logger.info(f"Total records: {state['records_done']}")
+        logger.info(f"Successfully migrated: {state['migrated']}")
+        logger.info(f"Skipped (already exists): {state['skipped']}")
+        logger.info(f"Errors: {state['errors']}")
         logger.info("="*60)
 
     except FileNotFoundError:
@@ -101,6 +277,19 @@ def migrate_salaries_from_json(json_file_path: str, db: SupabaseClient):
 
 def main():
     """Main migration function"""
+    parser = argparse.ArgumentParser(description="Import existing salary data into Supabase")
+    # Path to your existing salary JSON file
+    parser.add_argument("--file", default="../src/data/salaries.json", help="JSON array or NDJSON file to import")
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help=f"Records per insert (default: {DEFAULT_CHUNK_SIZE})"
+    )
+    parser.add_argument("--checkpoint", default=None, help="Progress file (default: <file>.checkpoint)")
+    parser.add_argument("--restart", action="store_true", help="Ignore saved progress and start from the beginning")
+    args = parser.parse_args()
+
     # Initialize Supabase client
     try:
         db = SupabaseClient()
@@ -109,11 +298,14 @@ def main():
         logger.error("Set NEXT_PUBLIC_SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY environment variables")
         return
 
-    # Path to your existing salary JSON file
-    json_file = "../src/data/salaries.json"
-
     logger.info("Starting migration from JSON to Supabase...")
-    migrate_salaries_from_json(json_file, db)
+    migrate_salaries_from_json(
+        args.file,
+        db,
+        chunk_size=args.chunk_size,
+        checkpoint_path=args.checkpoint,
+        restart=args.restart
+    )
     logger.info("Migration completed!")
 
 
@@ -0,0 +1,77 @@
+"""
+Fast __NEXT_DATA__ Extractor
+Slices the Next.js data payload out of a page without building a DOM
+"""
+
+import json
+import logging
+import re
+from typing import Any, Dict, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+try:
+    import lxml.html
+except ImportError:  # pragma: no cover - lxml is optional, BeautifulSoup is the last resort
+    lxml = None
+
+# Opening tag of the Next.js data script, e.g. <script id="__NEXT_DATA__" type="application/json">
+_NEXT_DATA_TAG = re.compile(
+    rb'<script\b[^>]*?\bid\s*=\s*["\']?__NEXT_DATA__["\']?[^>]*>',
+    re.IGNORECASE
+)
+_SCRIPT_END = re.compile(rb'</script\s*>', re.IGNORECASE)
+
+
+def find_next_data(html: Union[str, bytes]) -> Optional[bytes]:
+    """
+    Return the raw bytes inside the __NEXT_DATA__ script tag, or None.
+
+    Next.js escapes '<' inside the payload, so the first closing script
+    tag after the opening one always ends it.
+    """
+    if isinstance(html, str):
+        html = html.encode("utf-8")
+
+    start = _NEXT_DATA_TAG.search(html)
+    if not start:
+        return None
+
+    end = _SCRIPT_END.search(html, start.end())
+    if not end:
+        return None
+
+    return html[start.end():end.start()]
+
+
+def _extract_with_parser(html: Union[str, bytes]) -> Optional[Dict[str, Any]]:
+    """Slow path: locate the script tag with a real HTML parser"""
+    if lxml is not None:
+        tree = lxml.html.fromstring(html)
+        scripts = tree.xpath('//script[@id="__NEXT_DATA__"]')
+        if not scripts:
+            return None
+        return json.loads(scripts[0].text_content())
+
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    next_data = soup.find("script", id="__NEXT_DATA__")
+    if not next_data:
+        return None
+    return json.loads(next_data.string)
+
+
+def extract_next_data(html: Union[str, bytes]) -> Optional[Dict[str, Any]]:
+    """
+    Parse the __NEXT_DATA__ JSON from a page.
+    Returns None if the page has no such script; raises json.JSONDecodeError
+    if the payload is present but not valid JSON.
+    """
+    payload = find_next_data(html)
+    if payload is not None:
+        try:
+            return json.loads(payload)
+        except json.JSONDecodeError:
+            logger.debug("Fast __NEXT_DATA__ slice was not valid JSON, falling back to HTML parser")
+    return _extract_with_parser(html)
@@ -0,0 +1,296 @@
+"""
+Parquet Export
+Streams salaries, companies and scrape_history out of Supabase in
+keyset-paged batches into compressed, hive-partitioned Parquet datasets,
+either as a full snapshot or as an incremental append of the rows changed
+since the last export
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+from dotenv import load_dotenv
+
+from supabase_client import SupabaseClient
+
+logger = logging.getLogger(__name__)
+
+# Column types: string, int, float, bool, timestamp, date, json (stored as
+# a JSON string) and string_list
+SALARY_COLUMNS = [
+    ("id", "string"), ("company_id", "string"), ("company_name", "string"),
+    ("designation", "string"), ("level", "string"), ("role_category", "string"),
+    ("location", "string"), ("city", "string"), ("state", "string"), ("country", "string"),
+    ("location_type", "string"),
+    ("years_of_experience", "int"), ("years_of_experience_min", "int"), ("years_of_experience_max", "int"),
+    ("education_level", "string"),
+    ("base_salary", "float"), ("bonus", "float"), ("stock_compensation", "float"),
+    ("signing_bonus", "float"), ("other_compensation", "float"),
+    ("total_compensation", "float"), ("min_salary", "float"), ("max_salary", "float"),
+    ("avg_salary", "float"), ("median_salary", "float"),
+    ("data_points_count", "int"), ("confidence_score", "float"),
+    ("source_platform", "string"), ("source_url", "string"), ("scraped_at", "timestamp"),
+    ("currency", "string"), ("job_type", "string"), ("benefits", "json"),
+    ("skills_required", "string_list"), ("additional_data", "json"),
+    ("data_date", "date"), ("created_at", "timestamp"), ("updated_at", "timestamp"),
+]
+
+COMPANY_COLUMNS = [
+    ("id", "string"), ("name", "string"), ("slug", "string"), ("display_name", "string"),
+    ("industry", "string"), ("headquarters", "string"), ("website", "string"), ("logo_url", "string"),
+    ("description", "string"), ("employee_count", "int"), ("founded_year", "int"),
+    ("is_active", "bool"), ("metadata", "json"), ("created_at", "timestamp"), ("updated_at", "timestamp"),
+]
+
+SCRAPE_HISTORY_COLUMNS = [
+    ("id", "string"), ("run_id", "string"), ("company_id", "string"), ("company_name", "string"),
+    ("source_platform", "string"), ("status", "string"), ("records_scraped", "int"),
+    ("error_message", "string"), ("started_at", "timestamp"), ("completed_at", "timestamp"),
+    ("metadata", "json"),
+]
+
+# table -> (columns, partition columns, column incremental exports read changes from)
+EXPORT_TABLES: Dict[str, Tuple[List[Tuple[str, str]], List[str], str]] = {
+    "salaries": (SALARY_COLUMNS, ["source_platform", "data_date"], "updated_at"),
+    "companies": (COMPANY_COLUMNS, [], "updated_at"),
+    # History rows are written once, when the scrape completes
+    "scrape_history": (SCRAPE_HISTORY_COLUMNS, ["source_platform"], "completed_at"),
+}
+
+MANIFEST = "_manifest.json"
+
+# Incremental exports start this long before the watermark, for rows
+# committed late (e.g. scrape_history buffered by a running scraper)
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+
+def _arrow_type(kind: str):
+    return {
+        "string": pa.string(),
+        "int": pa.int64(),
+        "float": pa.float64(),
+        "bool": pa.bool_(),
+        "timestamp": pa.timestamp("us", tz="UTC"),
+        "date": pa.date32(),
+        "json": pa.string(),
+        "string_list": pa.list_(pa.string()),
+    }[kind]
+
+
+def _convert(kind: str, value: Any) -> Any:
+    """A PostgREST JSON value as the Python value pyarrow expects for the column type"""
+    if value is None:
+        return None
+    if kind == "timestamp":
+        return datetime.fromisoformat(value)
+    if kind == "date":
+        return date.fromisoformat(str(value)[:10])
+    if kind == "json":
+        return json.dumps(value)
+    if kind == "int":
+        return int(value)
+    if kind == "float":
+        return float(value)
+    return value
+
+
+class ParquetExporter:
+    """
+    Writes one dataset per table under output_dir, e.g.
+    salaries/source_platform=levels_fyi/data_date=2025-10-26/part-<snapshot>-0.parquet
+
+    A full export replaces the table's dataset once the new one is
+    complete. An incremental export appends files holding only the rows
+    changed since the table's watermark (the latest change already
+    exported, kept in _manifest.json), so an updated row appears once per
+    snapshot it changed in: readers keep the latest updated_at per id.
+    Deleted rows only disappear with the next full export.
+    """
+
+    def __init__(
+        self,
+        supabase_client,
+        output_dir: str = "exports",
+        page_size: int = 1000,
+        compression: str = "zstd",
+        max_rows_per_file: int = 1_000_000
+    ):
+        self.db = supabase_client
+        self.output_dir = output_dir
+        self.page_size = page_size
+        self.compression = compression
+        self.max_rows_per_file = max_rows_per_file
+        self.manifest_path = os.path.join(output_dir, MANIFEST)
+
+    def load_manifest(self) -> Dict[str, Any]:
+        try:
+            with open(self.manifest_path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"tables": {}}
+
+    def _save_manifest(self, manifest: Dict[str, Any]):
+        # Written to a temporary file first, so a crash never leaves a truncated manifest
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def export(self, tables: Optional[List[str]] = None, incremental: bool = True) -> Dict[str, Dict[str, Any]]:
+        """
+        Export each table: incrementally if it has a watermark and
+        incremental is set, in full otherwise
+        Returns: per-table snapshot summary (rows, mode, since, watermark, seconds)
+        """
+        tables = tables or list(EXPORT_TABLES)
+        unknown = [table for table in tables if table not in EXPORT_TABLES]
+        if unknown:
+            raise ValueError(f"Cannot export {', '.join(unknown)}; expected any of: {', '.join(EXPORT_TABLES)}")
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        manifest = self.load_manifest()
+        snapshot = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+
+        summary = {}
+        for table in tables:
+            state = manifest["tables"].setdefault(table, {"watermark": None, "snapshots": []})
+            since = None
+            if incremental and state["watermark"]:
+                since = (datetime.fromisoformat(state["watermark"]) - WATERMARK_OVERLAP).isoformat()
+
+            result = self._export_table(table, snapshot, since)
+            # An empty increment keeps the previous watermark
+            state["watermark"] = max(filter(None, [state["watermark"], result["watermark"]]), default=None)
+            state["snapshots"].append(result)
+            self._save_manifest(manifest)
+            summary[table] = result
+
+        return summary
+
+    def _export_table(self, table: str, snapshot: str, since: Optional[str]) -> Dict[str, Any]:
+        columns, partition_columns, changed_column = EXPORT_TABLES[table]
+        schema = pa.schema([(name, _arrow_type(kind)) for name, kind in columns])
+        table_dir = os.path.join(self.output_dir, table)
+        # A full export is built next to the current dataset and swapped in when complete
+        target_dir = table_dir if since else f"{table_dir}.{snapshot}.tmp"
+        basename = f"part-{snapshot}"
+
+        stats = {"rows": 0, "watermark": None}
+
+        def batches() -> Iterator["pa.RecordBatch"]:
+            pages = self.db.iter_table(
+                table,
+                ", ".join(name for name, _ in columns),
+                page_size=self.page_size,
+                changed_since=since,
+                changed_column=changed_column
+            )
+            for rows in pages:
+                stats["rows"] += len(rows)
+                changed = max((row[changed_column] for row in rows if row.get(changed_column)), default=None)
+                if changed and (stats["watermark"] is None or changed > stats["watermark"]):
+                    stats["watermark"] = changed
+                yield pa.RecordBatch.from_arrays(
+                    [pa.array([_convert(kind, row.get(name)) for row in rows], type=_arrow_type(kind)) for name, kind in columns],
+                    schema=schema
+                )
+
+        started = datetime.utcnow()
+        try:
+            ds.write_dataset(
+                batches(),
+                target_dir,
+                schema=schema,
+                format="parquet",
+                partitioning=ds.partitioning(
+                    pa.schema([schema.field(name) for name in partition_columns]), flavor="hive"
+                ) if partition_columns else None,
+                basename_template=f"{basename}-{{i}}.parquet",
+                existing_data_behavior="overwrite_or_ignore",
+                file_options=ds.ParquetFileFormat().make_write_options(compression=self.compression),
+                max_rows_per_file=self.max_rows_per_file,
+                max_rows_per_group=min(self.max_rows_per_file, 128 * 1024)
+            )
+        except Exception:
+            # Leave no partial snapshot behind for readers to pick up
+            if since:
+                _remove_files(table_dir, basename)
+            else:
+                shutil.rmtree(target_dir, ignore_errors=True)
+            raise
+
+        if not since:
+            shutil.rmtree(table_dir, ignore_errors=True)
+            if os.path.isdir(target_dir):
+                os.replace(target_dir, table_dir)
+
+        seconds = (datetime.utcnow() - started).total_seconds()
+        logger.info(
+            f"Exported {stats['rows']} {table} rows ({'changed since ' + since if since else 'full'}) "
+            f"to {table_dir} in {seconds:.1f}s"
+        )
+        return {
+            "snapshot": snapshot,
+            "mode": "incremental" if since else "full",
+            "since": since,
+            "rows": stats["rows"],
+            "watermark": stats["watermark"],
+            "seconds": round(seconds, 3),
+        }
+
+
+def _remove_files(directory: str, prefix: str):
+    """Delete the files under directory whose name starts with prefix"""
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if name.startswith(prefix):
+                os.remove(os.path.join(root, name))
+
+
+def main(argv: Optional[List[str]] = None):
+    """Export Supabase tables to Parquet"""
+    load_dotenv()
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    parser = argparse.ArgumentParser(description="Export salaries, companies and scrape_history to Parquet")
+    parser.add_argument("--output", default="exports", help="Export directory (default: exports)")
+    parser.add_argument(
+        "--tables",
+        default=",".join(EXPORT_TABLES),
+        help=f"Comma-separated tables to export (default: {','.join(EXPORT_TABLES)})"
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Replace each table's dataset with a full snapshot instead of appending the changed rows"
+    )
+    parser.add_argument("--page-size", type=int, default=1000, help="Rows per REST request (default: 1000)")
+    parser.add_argument(
+        "--compression",
+        default="zstd",
+        choices=["zstd", "snappy", "gzip", "none"],
+        help="Parquet compression codec (default: zstd)"
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        db = SupabaseClient()
+    except ValueError as e:
+        logger.error(f"Failed to initialize Supabase client: {e}")
+        return
+
+    exporter = ParquetExporter(db, output_dir=args.output, page_size=args.page_size, compression=args.compression)
+    exporter.export([table for table in args.tables.split(",") if table], incremental=not args.full)
+
+
+if __name__ == "__main__":
+    main()
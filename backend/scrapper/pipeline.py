@@ -0,0 +1,320 @@
+"""
+Scrape Pipeline
+Shared fetch -> parse -> normalize -> ingest flow for every salary source
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Set
+
+import requests
+
+from debug_store import DebugArtifactStore, payload_hash
+from freshness import DEFAULT_FRESHNESS_HOURS, FreshnessPlan
+from http_cache import ResponseCache
+from http_session import HttpTransport
+from metrics import RunMetrics
+from rate_limiter import AdaptiveRateLimiter
+from salary_sketches import SalarySketchStore
+from salary_trends import SalaryTrendAggregator
+from scrape_run import ScrapeRunRecorder
+from salary_diff import SalaryDiff, diff_salaries
+from salary_record import SalaryRecord
+from sources import SalarySource
+
+logger = logging.getLogger(__name__)
+
+
+class ScrapePipeline:
+    """
+    Runs one source for one company: freshness check, scrape_history
+    bookkeeping, fetching, payload extraction, debug capture, parsing and
+    ingestion. Sources only supply URLs and parsing, so every source gets
+    the same behaviour.
+
+    Holds no per-company state, so one pipeline can be shared by every
+    worker thread in a run.
+    """
+
+    def __init__(
+        self,
+        supabase_client,
+        transport: Optional[HttpTransport] = None,
+        host_limiter=None,
+        debug_store: Optional[DebugArtifactStore] = None,
+        freshness_plan: Optional[FreshnessPlan] = None,
+        frequency_hours: Optional[Dict[str, float]] = None,
+        response_cache: Optional[ResponseCache] = None,
+        diff_existing: bool = False,
+        metrics: Optional[RunMetrics] = None,
+        rate_limiter: Optional[AdaptiveRateLimiter] = None,
+        history: Optional[ScrapeRunRecorder] = None,
+        check_freshness: bool = True,
+        retire_stale: bool = False,
+        trends: Optional[SalaryTrendAggregator] = None,
+        sketches: Optional[SalarySketchStore] = None
+    ):
+        self.db = supabase_client
+        # Pooled keep-alive sessions, normally shared with the SupabaseClient
+        self.transport = transport or supabase_client.transport
+        # Shared across workers when running concurrently, caps requests per host
+        self.host_limiter = host_limiter
+        # Raw payloads are stored once per distinct content, compressed
+        self.debug_store = debug_store
+        # Last successful scrape per (company, source), loaded once per run
+        self.freshness_plan = freshness_plan
+        # Per-source data_sources.scrape_frequency_hours, used when should_scrape gets no hours
+        self.frequency_hours = frequency_hours or {}
+        # Validators of the last ingested fetch per URL; unchanged pages are not re-ingested
+        self.response_cache = response_cache
+        # Write only records that differ from the stored rows for the (company, source).
+        # Off by default: scraped records go through salary_submissions and are
+        # approved as source_platform "manual", so they rarely match a stored
+        # row and the extra read of salaries per job saves almost no writes
+        self.diff_existing = diff_existing
+        # Per-stage latency histograms and counters for the run report
+        self.metrics = metrics or RunMetrics()
+        # Paces fetches per host, adapting to 429s and latency; pauses hosts that keep failing
+        self.rate_limiter = rate_limiter
+        # scrape_history / data_sources bookkeeping: buffered per run if given, else written directly
+        self.history = history or supabase_client
+        # False when the jobs were already judged due, e.g. when resuming a work queue
+        self.check_freshness = check_freshness
+        # Delete stored rows the source dropped or whose values were resubmitted
+        # (needs diff_existing). Off by default for the same reason: the rows
+        # read back for a scraper source are not the ones its records became,
+        # and retiring them could delete live data
+        self.retire_stale = retire_stale
+        # Told about retired rows, whose salary_trends groups need recomputing
+        self.trends = trends
+        # Told about retired rows, whose companies' percentile sketches need recomputing
+        self.sketches = sketches
+
+    def should_scrape(self, company_name: str, source_platform: str, hours: Optional[float] = None) -> bool:
+        """
+        Check if we should scrape this company from this source
+        Returns False if company was scraped within `hours` (default: the
+        source's scrape frequency, or 168 = 1 week)
+        """
+        if hours is None:
+            hours = self.frequency_hours.get(source_platform, DEFAULT_FRESHNESS_HOURS)
+
+        if self.freshness_plan is None:
+            return not self.db.has_recent_scrape(company_name, source_platform, hours)
+
+        if self.freshness_plan.is_stale(company_name, source_platform, hours):
+            return True
+
+        hours_since = self.freshness_plan.hours_since(company_name, source_platform)
+        logger.info(
+            f"Company '{company_name}' from '{source_platform}' "
+            f"was scraped {hours_since:.1f} hours ago. Skipping."
+        )
+        return False
+
+    def fetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> requests.Response:
+        """GET a source page, respecting the per-host limit and rate limiter if set"""
+        if self.host_limiter is None:
+            return self.transport.get(url, headers=headers, timeout=30, limiter=self.rate_limiter)
+
+        with self.host_limiter.slot(url):
+            return self.transport.get(url, headers=headers, timeout=30, limiter=self.rate_limiter)
+
+    def save_debug_data(
+        self,
+        company_name: str,
+        source_platform: str,
+        payload: Any,
+        records: Optional[List[SalaryRecord]] = None,
+        url: Optional[str] = None
+    ):
+        """Save the raw scraped payload (deduplicated, compressed) and processed records"""
+        if self.debug_store is None:
+            return
+
+        try:
+            entry = self.debug_store.save(company_name, source_platform, payload, records=records, url=url)
+            state = "new" if entry["new_blob"] else "unchanged"
+            logger.info(f"Debug data saved to: {self.debug_store.root} (blob {entry['blob'][:12]}, {state})")
+        except Exception as e:
+            logger.error(f"Error saving debug data: {e}")
+
+    def diff_against_stored(self, company_name: str, source_platform: str, records: List[SalaryRecord]) -> Optional[SalaryDiff]:
+        """Diff records against the stored rows, or None if those cannot be loaded"""
+        try:
+            # Streamed straight into the diff's index, without a list of every stored row first
+            return diff_salaries(self.db.iter_existing_salaries(company_name, source_platform), records)
+        except Exception as e:
+            logger.warning(f"Could not load stored salaries for {company_name} / {source_platform}, ingesting all: {e}")
+            return None
+
+    def complete(
+        self,
+        scrape_id: str,
+        source_platform: str,
+        status: str,
+        records_scraped: int = 0,
+        error_message: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        job: Optional[Dict[str, Any]] = None
+    ):
+        """Close out a scrape_history entry, recording the job's stage timings in its metadata"""
+        metadata = dict(metadata or {})
+        if job:
+            job["outcome"] = status
+            job["error"] = error_message
+            metadata["timings_ms"] = {stage: round(seconds * 1000, 1) for stage, seconds in job["timings"].items()}
+            metadata["bytes_fetched"] = job["bytes_fetched"]
+        self.metrics.count(source_platform, f"jobs_{status}")
+        self.history.complete_scrape(scrape_id, status, records_scraped, error_message, metadata=metadata or None)
+
+    def ingest(
+        self,
+        scrape_id: str,
+        source_platform: str,
+        records: List[SalaryRecord],
+        diff: Optional[SalaryDiff] = None,
+        job: Optional[Dict[str, Any]] = None
+    ) -> int:
+        """
+        Insert records (only the inserts and updates if a diff is given),
+        retire rows the source dropped, and close out the scrape_history entry
+        """
+        if not records:
+            self.complete(scrape_id, source_platform, "success", 0, "No salary data found", job=job)
+            return 0
+
+        to_write = diff.changed_records() if diff else records
+        with self.metrics.stage(source_platform, "ingest", job["timings"] if job else None):
+            result = self.db.submit_salaries(to_write) if to_write else {"inserted": 0, "failed": []}
+            count = result["inserted"]
+            failed = {failure["index"] for failure in result["failed"]}
+
+            metadata = None
+            if diff:
+                if self.retire_stale:
+                    self.retire(diff, failed)
+                metadata = {"diff": diff.summary()}
+                logger.info(f"{source_platform} diff: {diff.summary()}")
+        self.metrics.count(source_platform, "records_written", count)
+
+        self.complete(scrape_id, source_platform, "success", count, metadata=metadata, job=job)
+        self.history.update_data_source_last_scraped(source_platform)
+        logger.info(f"Successfully scraped {count} records from {source_platform}")
+        return count
+
+    def retire(self, diff: SalaryDiff, failed: Set[int]):
+        """
+        Delete the stored rows a diff retires, plus those replaced by an
+        update whose new values were written (failed: indexes into
+        diff.changed_records() that were not)
+        """
+        rows = list(diff.retired_rows)
+        for offset, row in enumerate(diff.replaced_rows):
+            if len(diff.inserts) + offset not in failed and row.get("id"):
+                rows.append(row)
+        if not rows:
+            return
+
+        self.db.retire_salaries([row["id"] for row in rows])
+        if self.trends:
+            self.trends.touch_rows(rows)
+        if self.sketches:
+            self.sketches.touch_rows(rows)
+
+    def skip_unchanged(
+        self,
+        scrape_id: str,
+        source_platform: str,
+        company_name: str,
+        reason: str,
+        job: Optional[Dict[str, Any]] = None
+    ):
+        """Close out a scrape whose page matches the last ingested fetch"""
+        logger.info(f"{source_platform} page for {company_name} unchanged ({reason}), skipping ingest")
+        self.complete(scrape_id, source_platform, "unchanged", 0, metadata={"unchanged_reason": reason}, job=job)
+        self.history.update_data_source_last_scraped(source_platform)
+
+    def run(
+        self,
+        source: SalarySource,
+        company_name: str,
+        company_id: Optional[str],
+        job: Optional[Dict[str, Any]] = None
+    ) -> List[SalaryRecord]:
+        """
+        Scrape one source for one company
+        job: optional dict that receives the outcome ("success", "unchanged",
+        "failed", "skipped" or "paused"), error and stage timings
+        Returns: the normalized salary records (empty if skipped or failed)
+        """
+        # Stage timings for this job only, saved in its scrape_history.metadata
+        job = job if job is not None else {}
+        job.update({"timings": {}, "bytes_fetched": 0, "outcome": None, "error": None})
+        timings = job["timings"]
+
+        if self.check_freshness and not self.should_scrape(company_name, source.name):
+            logger.info(f"Skipping {source.name} for {company_name} (recently scraped)")
+            self.metrics.count(source.name, "jobs_skipped")
+            job["outcome"] = "skipped"
+            return []
+
+        # A paused host gets no scrape_history row, so the job stays due for the next run
+        if self.rate_limiter and not self.rate_limiter.allows(source.build_url(company_name)):
+            logger.warning(f"Skipping {source.name} for {company_name} (circuit open for the source host)")
+            self.metrics.count(source.name, "jobs_paused")
+            job["outcome"] = "paused"
+            return []
+
+        scrape_id = self.history.start_scrape(company_name, source.name, company_id)
+
+        try:
+            url = source.build_url(company_name)
+
+            logger.info(f"Scraping {source.name} for {company_name}: {url}")
+            cache = self.response_cache
+            with self.metrics.stage(source.name, "fetch", timings):
+                response = self.fetch(url, cache.conditional_headers(url) if cache else None)
+            job["bytes_fetched"] = len(response.content)
+            self.metrics.count(source.name, "bytes_fetched", len(response.content))
+
+            reason = cache.unchanged_reason(url, response) if cache else None
+            if reason:
+                self.skip_unchanged(scrape_id, source.name, company_name, reason, job)
+                return []
+
+            with self.metrics.stage(source.name, "extract", timings):
+                payload = source.extract_payload(response.content)
+                payload_sha256 = payload_hash(payload) if cache and payload is not None else None
+
+            if payload is None:
+                logger.warning(f"No data found on {source.name} for {company_name}")
+                self.complete(scrape_id, source.name, "failed", 0, "No __NEXT_DATA__ found", job=job)
+                return []
+
+            if cache and cache.same_payload(url, payload_sha256):
+                self.skip_unchanged(scrape_id, source.name, company_name, "same_payload", job)
+                return []
+
+            with self.metrics.stage(source.name, "parse", timings):
+                records = source.parse(payload, company_name, company_id, url)
+            self.metrics.count(source.name, "records_parsed", len(records))
+
+            # Save raw payload and processed records for debugging
+            with self.metrics.stage(source.name, "debug_save", timings):
+                self.save_debug_data(company_name, source.name, payload, records, url)
+
+            diff = None
+            if self.diff_existing and records:
+                with self.metrics.stage(source.name, "diff", timings):
+                    diff = self.diff_against_stored(company_name, source.name, records)
+
+            count = self.ingest(scrape_id, source.name, records, diff, job)
+            # Only a fully ingested page may be skipped next time
+            if cache and count == len(diff.changed_records() if diff else records):
+                cache.store(url, response, payload_sha256)
+            return records
+
+        except Exception as e:
+            logger.error(f"Error scraping {source.name}: {str(e)}")
+            self.complete(scrape_id, source.name, "failed", 0, str(e), job=job)
+            return []
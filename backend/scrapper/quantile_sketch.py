@@ -0,0 +1,140 @@
+"""
+Quantile Sketch
+KLL sketch: a few hundred values summarise any number of observations,
+answer quantile queries within about 1% rank error, and two sketches
+merge into one as if every observation had gone into a single sketch
+"""
+
+import bisect
+import math
+import random
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class KLLSketch:
+    """
+    Karnin-Lang-Liberty sketch. Level h keeps values that each stand for
+    2**h observations. When a level fills up it is sorted and every other
+    value (from a random offset) moves up a level, so lower levels, which
+    hold the most precise values, get the largest share of the space.
+
+    k sets the size and accuracy: at most about 3k values are kept, and
+    the rank error is roughly 1.7 / k (k=200: within 1% of the true
+    rank). Up to k observations the sketch is exact.
+    """
+
+    def __init__(self, k: int = 200, seed: Optional[int] = None):
+        if k < 8:
+            raise ValueError("k must be at least 8")
+        self.k = k
+        self.count = 0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.levels: List[List[float]] = [[]]
+        self._size = 0
+        self._random = random.Random(seed)
+
+    def _capacity(self, level: int) -> int:
+        # Levels shrink by 2/3 going down from the top one
+        depth = len(self.levels) - level - 1
+        return int(math.ceil(self.k * (2 / 3) ** depth)) + 1
+
+    def _max_size(self) -> int:
+        return sum(self._capacity(level) for level in range(len(self.levels)))
+
+    def update(self, value: float):
+        value = float(value)
+        self.levels[0].append(value)
+        self._size += 1
+        self.count += 1
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        if self._size >= self._max_size():
+            self._compress()
+
+    def update_many(self, values: Iterable[float]):
+        for value in values:
+            self.update(value)
+
+    def merge(self, other: "KLLSketch"):
+        """Add other's observations to this sketch"""
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for level, values in enumerate(other.levels):
+            self.levels[level].extend(values)
+        self.count += other.count
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+        self._size = sum(len(values) for values in self.levels)
+        while self._size >= self._max_size():
+            self._compress()
+
+    def _compress(self):
+        """Compact the lowest full level into the one above it"""
+        for level in range(len(self.levels)):
+            values = self.levels[level]
+            if len(values) < self._capacity(level):
+                continue
+            if level + 1 == len(self.levels):
+                self.levels.append([])
+
+            values.sort()
+            # An odd value out stays behind, so the level's total weight is kept exactly
+            keep = [values.pop()] if len(values) % 2 else []
+            offset = self._random.randint(0, 1)
+            self.levels[level + 1].extend(values[offset::2])
+            self.levels[level] = keep
+            self._size = sum(len(values) for values in self.levels)
+            return
+
+    def quantiles(self, fractions: Iterable[float]) -> List[Optional[float]]:
+        """Values at each fraction of the observations (0.5 is the median); None if empty"""
+        fractions = list(fractions)
+        if self.count == 0:
+            return [None] * len(fractions)
+
+        weighted = sorted(
+            (value, 1 << level) for level, values in enumerate(self.levels) for value in values
+        )
+        cumulative = []
+        total = 0
+        for _, weight in weighted:
+            total += weight
+            cumulative.append(total)
+
+        result = []
+        for fraction in fractions:
+            if not 0 <= fraction <= 1:
+                raise ValueError("quantile fractions must be between 0 and 1")
+            if fraction == 0:
+                result.append(self.min)
+            elif fraction == 1:
+                result.append(self.max)
+            else:
+                index = bisect.bisect_left(cumulative, fraction * total)
+                result.append(weighted[min(index, len(weighted) - 1)][0])
+        return result
+
+    def quantile(self, fraction: float) -> Optional[float]:
+        return self.quantiles([fraction])[0]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable state, e.g. for a JSONB column"""
+        return {
+            "k": self.k,
+            "count": self.count,
+            "min": self.min,
+            "max": self.max,
+            "levels": [list(values) for values in self.levels],
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> "KLLSketch":
+        sketch = cls(k=state["k"])
+        sketch.count = state["count"]
+        sketch.min = state["min"]
+        sketch.max = state["max"]
+        sketch.levels = [[float(value) for value in values] for values in state["levels"]] or [[]]
+        sketch._size = sum(len(values) for values in sketch.levels)
+        return sketch
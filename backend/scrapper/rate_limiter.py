@@ -0,0 +1,278 @@
+"""
+Adaptive Rate Limiter
+Per-host token buckets that slow down on 429s and slow responses, back off
+with jitter, and pause a host entirely (circuit breaker) after repeated
+failures
+"""
+
+import logging
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# The host is asking us to slow down
+THROTTLE_STATUSES = {429, 503}
+
+# Outcomes that count towards opening the circuit; None is a connection error or timeout.
+# 403 is what the anti-bot layers answer once they have flagged us.
+FAILURE_STATUSES = {None, 403, 429, 500, 502, 503, 504}
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised when a host's circuit is open and no request may be sent to it"""
+
+
+class _HostState:
+    """Bucket, backoff and breaker state for one host"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.backoff_until = 0.0
+        self.throttle_streak = 0
+        self.latency_ewma: Optional[float] = None
+        self.last_slowdown = 0.0
+
+        self.circuit = CLOSED
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.cooldown = 0.0
+        self.probe_in_flight = False
+
+        self.requests = 0
+        self.failures = 0
+        self.throttled = 0
+        self.slowdowns = 0
+        self.breaker_trips = 0
+        self.rejected = 0
+        self.waited_seconds = 0.0
+
+    def refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+class AdaptiveRateLimiter:
+    """
+    Paces requests to each host with a token bucket.
+
+    The rate starts at `rate` requests/second and adapts (AIMD): every
+    success under `latency_target` seconds adds `increase` up to `max_rate`,
+    while a 429/503 or a latency average above the target multiplies it by
+    `decrease` down to `min_rate`. A throttle also holds the whole host
+    back for a jittered exponential backoff, or for Retry-After if longer.
+
+    After `failure_threshold` consecutive failures the host's circuit opens
+    for `cooldown` seconds; then one probe request is let through, which
+    closes it on success or re-opens it for twice as long on failure.
+    """
+
+    def __init__(
+        self,
+        rate: float = 2.0,
+        min_rate: float = 0.2,
+        max_rate: float = 8.0,
+        burst: float = 2.0,
+        increase: float = 0.1,
+        decrease: float = 0.5,
+        latency_target: float = 3.0,
+        backoff_factor: float = 1.0,
+        max_backoff: float = 60.0,
+        failure_threshold: int = 5,
+        cooldown: float = 60.0,
+        max_cooldown: float = 900.0
+    ):
+        if not 0 < min_rate <= rate <= max_rate:
+            raise ValueError("rates must satisfy 0 < min_rate <= rate <= max_rate")
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold must be at least 1")
+
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_target = latency_target
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+
+        self._hosts: Dict[str, _HostState] = {}
+        self._lock = threading.Lock()
+
+    def _host(self, url: str) -> _HostState:
+        host = urlparse(url).netloc
+        if host not in self._hosts:
+            self._hosts[host] = _HostState(self.rate, self.burst)
+        return self._hosts[host]
+
+    def _admit(self, state: _HostState, now: float) -> bool:
+        """Breaker check for one request; may move an open circuit to half-open"""
+        if state.circuit == OPEN and now >= state.open_until:
+            state.circuit = HALF_OPEN
+        if state.circuit == OPEN or (state.circuit == HALF_OPEN and state.probe_in_flight):
+            return False
+        if state.circuit == HALF_OPEN:
+            state.probe_in_flight = True
+        return True
+
+    def allows(self, url: str) -> bool:
+        """False while the URL's host is paused, without using up a request"""
+        with self._lock:
+            state = self._host(url)
+            if state.circuit == OPEN:
+                return time.monotonic() >= state.open_until
+            return not (state.circuit == HALF_OPEN and state.probe_in_flight)
+
+    def acquire(self, url: str):
+        """
+        Block until a request to the URL's host may be sent
+        Raises CircuitOpenError if the host is paused
+        """
+        host = urlparse(url).netloc
+        with self._lock:
+            state = self._host(url)
+            now = time.monotonic()
+            if not self._admit(state, now):
+                state.rejected += 1
+                raise CircuitOpenError(f"Circuit open for {host}, retry in {max(state.open_until - now, 0):.0f}s")
+
+            # Reserve a token; a negative balance is the queue of waiting requests
+            state.refill(now)
+            state.tokens -= 1
+            wait = max(state.backoff_until - now, -state.tokens / state.rate if state.tokens < 0 else 0.0)
+            state.waited_seconds += wait
+
+        if wait > 0:
+            time.sleep(wait)
+
+    def record(self, url: str, status: Optional[int], elapsed: float, retry_after: Optional[str] = None):
+        """Feed back the outcome of one request (status None for a connection error)"""
+        with self._lock:
+            state = self._host(url)
+            now = time.monotonic()
+            state.requests += 1
+            state.latency_ewma = elapsed if state.latency_ewma is None else 0.8 * state.latency_ewma + 0.2 * elapsed
+
+            if status in FAILURE_STATUSES:
+                self._on_failure(url, state, status, now, retry_after)
+            else:
+                self._on_success(state, now)
+
+    def _on_success(self, state: _HostState, now: float):
+        state.consecutive_failures = 0
+        state.throttle_streak = 0
+        if state.circuit == HALF_OPEN:
+            state.circuit = CLOSED
+            state.probe_in_flight = False
+            state.cooldown = 0.0
+            logger.info(f"Circuit closed again after a successful probe (rate {state.rate:.2f}/s)")
+
+        if state.latency_ewma > self.latency_target:
+            # At most one cut per latency_target, or a burst of slow replies would floor the rate
+            if now - state.last_slowdown >= self.latency_target:
+                state.slowdowns += 1
+                state.last_slowdown = now
+                self._set_rate(state, state.rate * self.decrease)
+        else:
+            self._set_rate(state, state.rate + self.increase)
+
+    def _on_failure(self, url: str, state: _HostState, status: Optional[int], now: float, retry_after: Optional[str]):
+        host = urlparse(url).netloc
+        state.failures += 1
+        state.consecutive_failures += 1
+
+        if status in THROTTLE_STATUSES:
+            state.throttled += 1
+            self._set_rate(state, state.rate * self.decrease)
+            delay = self._backoff(state.throttle_streak, retry_after)
+            state.throttle_streak += 1
+            state.backoff_until = max(state.backoff_until, now + delay)
+            logger.warning(f"{host} returned {status}, rate now {state.rate:.2f}/s, backing off {delay:.1f}s")
+
+        if state.circuit == HALF_OPEN or state.consecutive_failures >= self.failure_threshold:
+            if state.circuit == HALF_OPEN:
+                state.cooldown = min(max(state.cooldown, self.base_cooldown) * 2, self.max_cooldown)
+            else:
+                state.cooldown = state.cooldown or self.base_cooldown
+            if state.circuit != OPEN:
+                state.breaker_trips += 1
+                logger.warning(
+                    f"Circuit opened for {host} after {state.consecutive_failures} consecutive failures, "
+                    f"pausing for {state.cooldown:.0f}s"
+                )
+            state.circuit = OPEN
+            state.open_until = now + state.cooldown
+            state.probe_in_flight = False
+
+    def _set_rate(self, state: _HostState, rate: float):
+        state.rate = min(max(rate, self.min_rate), self.max_rate)
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Exponential backoff with jitter; a longer numeric Retry-After wins"""
+        delay = self.backoff_factor * (2 ** attempt)
+        delay = min(delay + random.uniform(0, delay / 2), self.max_backoff)
+        if retry_after:
+            try:
+                delay = max(delay, min(float(retry_after), self.max_backoff))
+            except ValueError:
+                pass
+        return delay
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Per-host limiter and breaker state, for the run report"""
+        with self._lock:
+            now = time.monotonic()
+            summary = {}
+            for host, state in self._hosts.items():
+                summary[host] = {
+                    "rate_per_second": round(state.rate, 3),
+                    "circuit": state.circuit,
+                    "consecutive_failures": state.consecutive_failures,
+                    "paused_for_seconds": round(max(state.open_until - now, 0.0), 1) if state.circuit == OPEN else 0.0,
+                    "latency_ewma_seconds": round(state.latency_ewma or 0.0, 3),
+                    "requests": state.requests,
+                    "failures": state.failures,
+                    "throttled": state.throttled,
+                    "slowdowns": state.slowdowns,
+                    "breaker_trips": state.breaker_trips,
+                    "rejected": state.rejected,
+                    "waited_seconds": round(state.waited_seconds, 3),
+                }
+            return summary
+
+
+def merge_snapshots(snapshots: List[Dict[str, Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Combine AdaptiveRateLimiter.snapshot() from several worker processes:
+    rates and counters add up, the circuit shows the worst state
+    """
+    severity = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+    merged: Dict[str, Dict[str, Any]] = {}
+    for snapshot in snapshots:
+        for host, state in snapshot.items():
+            if host not in merged:
+                merged[host] = dict(state)
+                continue
+            total = merged[host]
+            for key in ("rate_per_second", "requests", "failures", "throttled", "slowdowns",
+                        "breaker_trips", "rejected", "waited_seconds"):
+                total[key] = round(total[key] + state[key], 3)
+            for key in ("consecutive_failures", "paused_for_seconds", "latency_ewma_seconds"):
+                total[key] = max(total[key], state[key])
+            if severity[state["circuit"]] > severity[total["circuit"]]:
+                total["circuit"] = state["circuit"]
+    return merged
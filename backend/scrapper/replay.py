@@ -0,0 +1,189 @@
+"""
+Offline Replay
+Re-runs parsing and normalization over captured payloads, without network access
+
+Usage:
+    python replay.py --output before.jsonl                  # latest capture per company/source
+    # ... change normalization code ...
+    python replay.py --output after.jsonl --diff before.jsonl
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from debug_store import DebugArtifactStore, iter_legacy_dumps, read_legacy_dump
+from salary_record import SalaryRecord, as_dict
+from sources import SOURCES
+
+logger = logging.getLogger(__name__)
+
+# Fields that change on every run and are ignored when diffing
+VOLATILE_FIELDS = ("scraped_at", "data_date")
+
+
+def collect_tasks(debug_dir: str, include_legacy: bool = True, all_captures: bool = False) -> List[Dict[str, Any]]:
+    """
+    Replay tasks for captured payloads: the latest capture per (company, source)
+    from the artifact store, plus legacy text dumps for pairs the store lacks
+    """
+    tasks = {}
+
+    if include_legacy:
+        for dump in iter_legacy_dumps(debug_dir):
+            key = (dump["company"], dump["source"])
+            if all_captures:
+                key += (dump["timestamp"], dump["path"])
+            elif key in tasks and tasks[key]["timestamp"] >= dump["timestamp"]:
+                continue
+            tasks[key] = {
+                "company": dump["company"],
+                "source": dump["source"],
+                "timestamp": dump["timestamp"],
+                "legacy_path": dump["path"],
+            }
+
+    store = DebugArtifactStore(debug_dir)
+    entries = store.iter_index() if all_captures else store.latest().values()
+    for entry in entries:
+        key = (entry["company"], entry["source"])
+        if all_captures:
+            key += (entry["timestamp"], entry["blob"])
+        elif key in tasks and tasks[key]["timestamp"] > entry["timestamp"]:
+            continue
+        tasks[key] = {
+            "company": entry["company"],
+            "source": entry["source"],
+            "timestamp": entry["timestamp"],
+            "blob": entry["blob"],
+            "url": entry.get("url"),
+        }
+
+    return sorted(tasks.values(), key=lambda task: (task["company"], task["source"], task["timestamp"]))
+
+
+def replay_task(task: Dict[str, Any], debug_dir: str) -> Tuple[Dict[str, Any], List[SalaryRecord], Optional[str]]:
+    """Parse and normalize one captured payload. Runs in a worker process."""
+    try:
+        if "legacy_path" in task:
+            dump = read_legacy_dump(task["legacy_path"])
+            payload = dump["payload"]["raw_data"]
+            url = dump["payload"].get("url")
+        else:
+            payload = DebugArtifactStore(debug_dir).load_payload(task["blob"])
+            url = task.get("url")
+
+        source = SOURCES.get(task["source"])
+        if source is None:
+            return task, [], f"No parser for source {task['source']}"
+
+        return task, source.parse(payload, task["company"], None, url), None
+    except Exception as e:
+        return task, [], str(e)
+
+
+def replay(tasks: List[Dict[str, Any]], debug_dir: str, workers: Optional[int] = None) -> Iterator[Tuple[Dict, List[SalaryRecord], Optional[str]]]:
+    """Yield (task, records, error) for every task, in task order"""
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(replay_task, tasks, [debug_dir] * len(tasks), chunksize=4)
+
+
+def _stable(record: Dict[str, Any]) -> str:
+    return json.dumps(
+        {k: v for k, v in record.items() if k not in VOLATILE_FIELDS},
+        sort_keys=True,
+        default=str
+    )
+
+
+def load_output(path: str) -> Dict[Tuple[str, str], Counter]:
+    """Replay output grouped as (company, source) -> multiset of records"""
+    grouped: Dict[Tuple[str, str], Counter] = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            key = (record.get("company_name"), record.get("source_platform"))
+            grouped.setdefault(key, Counter())[_stable(record)] += 1
+    return grouped
+
+
+def diff_outputs(before_path: str, after_path: str, show: int = 3) -> int:
+    """
+    Log per-(company, source) differences between two replay outputs
+    Returns: number of (company, source) pairs that differ
+    """
+    before = load_output(before_path)
+    after = load_output(after_path)
+    changed = 0
+
+    for key in sorted(set(before) | set(after), key=lambda k: (str(k[0]), str(k[1]))):
+        old = before.get(key, Counter())
+        new = after.get(key, Counter())
+        removed = old - new
+        added = new - old
+        if not removed and not added:
+            continue
+
+        changed += 1
+        logger.info(
+            f"{key[0]} / {key[1]}: {sum(removed.values())} records removed, "
+            f"{sum(added.values())} added"
+        )
+        for record in list(removed)[:show]:
+            logger.info(f"  - {record}")
+        for record in list(added)[:show]:
+            logger.info(f"  + {record}")
+
+    logger.info(f"{changed} of {len(set(before) | set(after))} (company, source) pairs changed")
+    return changed
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Replay captured payloads through parsing and normalization")
+    parser.add_argument("--debug-dir", default="debug_output", help="Capture directory (default: debug_output)")
+    parser.add_argument("--output", default="replay_output.jsonl", help="Normalized records, one JSON per line")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--all", action="store_true", help="Replay every capture, not just the latest per company/source")
+    parser.add_argument("--no-legacy", action="store_true", help="Ignore legacy *.txt dumps")
+    parser.add_argument("--diff", metavar="PREVIOUS", help="Compare the output with a previous replay output")
+    args = parser.parse_args()
+
+    tasks = collect_tasks(args.debug_dir, include_legacy=not args.no_legacy, all_captures=args.all)
+    logger.info(f"Replaying {len(tasks)} captured payloads from {args.debug_dir}")
+
+    start = time.perf_counter()
+    record_count = 0
+    errors = 0
+    tmp_output = f"{args.output}.tmp"
+    with open(tmp_output, "w", encoding="utf-8") as f:
+        for task, records, error in replay(tasks, args.debug_dir, args.workers):
+            if error:
+                errors += 1
+                logger.error(f"{task['company']} / {task['source']} ({task['timestamp']}): {error}")
+                continue
+            for record in records:
+                f.write(json.dumps(as_dict(record), default=str) + "\n")
+            record_count += len(records)
+    os.replace(tmp_output, args.output)
+
+    elapsed = time.perf_counter() - start
+    logger.info(
+        f"Replayed {len(tasks)} payloads into {record_count} records in {elapsed:.2f}s "
+        f"({errors} errors) -> {args.output}"
+    )
+
+    if args.diff:
+        diff_outputs(args.diff, args.output)
+
+
+if __name__ == "__main__":
+    main()
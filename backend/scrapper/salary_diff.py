@@ -0,0 +1,102 @@
+"""
+Salary Change Detection
+Compares freshly normalized records with what is already stored for a
+(company, source) and keeps only the rows that need writing
+"""
+
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# A record's identity; several records can share one (e.g. weekday lists
+# every individual salary for a role), so rows are matched as a multiset
+KEY_FIELDS = ("company_name", "designation", "location", "source_platform", "years_of_experience")
+
+COMPENSATION_FIELDS = ("base_salary", "bonus", "stock_compensation", "total_compensation")
+
+
+def record_key(record: Dict[str, Any]) -> Tuple:
+    return tuple(record.get(field) for field in KEY_FIELDS)
+
+
+def compensation(record: Dict[str, Any]) -> Tuple[float, ...]:
+    """Compensation values rounded to the DECIMAL(12, 2) the table stores"""
+    return tuple(round(float(record.get(field) or 0), 2) for field in COMPENSATION_FIELDS)
+
+
+class SalaryDiff:
+    """
+    inserts: fresh records with no stored counterpart
+    updates: (stored id, fresh record) pairs whose compensation changed;
+        the fresh record is written as a new row, which replaces the stored one
+    replaced_rows: the stored rows of updates, in the same order
+    retirements: ids of stored rows the source no longer lists
+    retired_rows: those stored rows, for whatever else they feed (e.g. salary_trends)
+    unchanged: number of fresh records already stored as-is
+    """
+
+    def __init__(self):
+        self.inserts: List[Dict[str, Any]] = []
+        self.updates: List[Tuple[Optional[str], Dict[str, Any]]] = []
+        self.replaced_rows: List[Dict[str, Any]] = []
+        self.retirements: List[str] = []
+        self.retired_rows: List[Dict[str, Any]] = []
+        self.unchanged = 0
+
+    def changed_records(self) -> List[Dict[str, Any]]:
+        """Records that have to be written: inserts, then updated values"""
+        return self.inserts + [record for _, record in self.updates]
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            "inserted": len(self.inserts),
+            "updated": len(self.updates),
+            "retired": len(self.retirements),
+            "unchanged": self.unchanged,
+        }
+
+
+def diff_salaries(existing: Iterable[Dict[str, Any]], fresh: List[Dict[str, Any]]) -> SalaryDiff:
+    """
+    Match fresh records against stored rows (each needs the KEY_FIELDS,
+    COMPENSATION_FIELDS and, for stored rows, "id").
+    Within a key, identical compensation is unchanged; leftover fresh and
+    stored rows are paired up as updates in order of total compensation,
+    and whatever remains is an insert or a retirement.
+    """
+    stored_by_key: Dict[Tuple, List[Dict[str, Any]]] = defaultdict(list)
+    for row in existing:
+        stored_by_key[record_key(row)].append(row)
+
+    fresh_by_key: Dict[Tuple, List[Dict[str, Any]]] = defaultdict(list)
+    for record in fresh:
+        fresh_by_key[record_key(record)].append(record)
+
+    diff = SalaryDiff()
+
+    for key in list(fresh_by_key) + [key for key in stored_by_key if key not in fresh_by_key]:
+        stored_by_value: Dict[Tuple, List[Dict[str, Any]]] = defaultdict(list)
+        for row in stored_by_key.get(key, []):
+            stored_by_value[compensation(row)].append(row)
+
+        new_records = []
+        for record in fresh_by_key.get(key, []):
+            matches = stored_by_value.get(compensation(record))
+            if matches:
+                matches.pop()
+                diff.unchanged += 1
+            else:
+                new_records.append(record)
+
+        old_rows = [row for rows in stored_by_value.values() for row in rows]
+        new_records.sort(key=compensation)
+        old_rows.sort(key=compensation)
+
+        for row, record in zip(old_rows, new_records):
+            diff.updates.append((row.get("id"), record))
+            diff.replaced_rows.append(row)
+        diff.inserts.extend(new_records[len(old_rows):])
+        retired = [row for row in old_rows[len(new_records):] if row.get("id")]
+        diff.retirements.extend(row["id"] for row in retired)
+        diff.retired_rows.extend(retired)
+
+    return diff
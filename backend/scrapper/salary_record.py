@@ -0,0 +1,257 @@
+"""
+Salary Records
+Compact, fixed-shape normalized salary records. A source payload is turned
+into a SalaryRecordBatch in one pass, with one timestamp for the whole
+page; dict rows for storage or the API are only built at the edge
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+
+class _Missing:
+    """An optional field that was never given (pickles back to the same object)"""
+
+    def __repr__(self):
+        return "MISSING"
+
+    def __reduce__(self):
+        return "MISSING"
+
+
+MISSING = _Missing()
+
+# Fields every record has, in the order normalize_salary_data lays them out
+CORE_FIELDS = (
+    "company_id", "company_name", "designation", "level", "location", "years_of_experience",
+    "base_salary", "bonus", "stock_compensation", "total_compensation", "avg_salary",
+    "data_points_count", "source_platform", "currency", "country", "data_date", "scraped_at",
+)
+
+# Fields sources set on some records only; left out of to_dict() when never given
+OPTIONAL_FIELDS = ("role_category", "source_url", "min_salary", "max_salary")
+
+_FIELDS = frozenset(CORE_FIELDS + OPTIONAL_FIELDS)
+
+
+class SalaryRecord:
+    """
+    One normalized salary record, read like the dict normalize_salary_data
+    returns (record.get("total_compensation")) so diffing and ingestion
+    take either.
+
+    Slots instead of a per-record dict: about a third of the memory, and
+    the strings a page's records have in common (company, source, URL,
+    timestamps) are shared rather than copied. avg_salary, currency and
+    country are derived rather than stored. Fields other than the known
+    ones go in extra.
+    """
+
+    __slots__ = (
+        "company_id", "company_name", "designation", "level", "location", "years_of_experience",
+        "base_salary", "bonus", "stock_compensation", "total_compensation",
+        "data_points_count", "source_platform", "data_date", "scraped_at",
+        "role_category", "source_url", "min_salary", "max_salary", "extra",
+    )
+
+    currency = "INR"
+    country = "India"
+
+    def __init__(
+        self,
+        company_id: Optional[str],
+        company_name: str,
+        designation: str,
+        location: str,
+        source_platform: str,
+        base_salary: float = 0,
+        bonus: float = 0,
+        stock_compensation: float = 0,
+        total_compensation: float = 0,
+        years_of_experience: Optional[int] = None,
+        level: Optional[str] = None,
+        data_points_count: int = 1,
+        data_date: Optional[str] = None,
+        scraped_at: Optional[str] = None,
+        role_category: Any = MISSING,
+        source_url: Any = MISSING,
+        min_salary: Any = MISSING,
+        max_salary: Any = MISSING,
+        extra: Optional[Dict[str, Any]] = None
+    ):
+        self.company_id = company_id
+        self.company_name = company_name
+        self.designation = designation
+        self.level = level
+        self.location = location
+        self.years_of_experience = years_of_experience
+        self.base_salary = base_salary
+        self.bonus = bonus
+        self.stock_compensation = stock_compensation
+        self.total_compensation = total_compensation
+        self.data_points_count = data_points_count
+        self.source_platform = source_platform
+        self.data_date = data_date
+        self.scraped_at = scraped_at
+        self.role_category = role_category
+        self.source_url = source_url
+        self.min_salary = min_salary
+        self.max_salary = max_salary
+        self.extra = extra
+
+    @property
+    def avg_salary(self) -> float:
+        return self.total_compensation
+
+    def get(self, field: str, default: Any = None) -> Any:
+        """A field's value like dict.get: default if the record does not have it"""
+        if field in _FIELDS:
+            value = getattr(self, field)
+            return default if value is MISSING else value
+        if self.extra is not None:
+            return self.extra.get(field, default)
+        return default
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The record as normalize_salary_data would have returned it, e.g. for JSON"""
+        row = {field: getattr(self, field) for field in CORE_FIELDS}
+        for field in OPTIONAL_FIELDS:
+            value = getattr(self, field)
+            if value is not MISSING:
+                row[field] = value
+        if self.extra:
+            for key, value in self.extra.items():
+                row.setdefault(key, value)
+        return row
+
+    def to_api_payload(self) -> Dict[str, str]:
+        """The POST /api/salaries body (see SupabaseClient._to_api_payload), read straight from the slots"""
+        years = self.years_of_experience
+        return {
+            "company": self.company_name,
+            "role": self.designation,
+            "location": self.location,
+            "yearsOfExperience": str(years) if years is not None else "",
+            "baseSalary": str(self.base_salary or ""),
+            "bonus": str(self.bonus or ""),
+            "stockCompensation": str(self.stock_compensation or ""),
+            "totalCompensation": str(self.total_compensation or ""),
+            "type": "fulltime",
+            "employmentType": "Full-time",
+            "duration": "",
+            "stipend": "",
+            "university": "",
+            "year": "",
+        }
+
+    def to_submission_row(self) -> Dict[str, Any]:
+        """
+        The salary_submissions row (see SupabaseClient._to_submission_row),
+        read straight from the slots; required fields are checked by the caller
+        """
+        return {
+            "company": self.company_name,
+            "role": self.designation,
+            "location": self.location,
+            "years_of_experience": self.years_of_experience,
+            "base_salary": self.base_salary or None,
+            "bonus": self.bonus or None,
+            "stock_compensation": self.stock_compensation or None,
+            "total_compensation": self.total_compensation or None,
+            "type": "fulltime",
+            "employment_type": "Full-time",
+            "duration": None,
+            "stipend": None,
+            "university": None,
+            "year": None,
+            "status": "pending",
+        }
+
+    def __repr__(self):
+        return (
+            f"SalaryRecord({self.company_name!r}, {self.designation!r}, {self.location!r}, "
+            f"{self.source_platform!r}, total_compensation={self.total_compensation!r})"
+        )
+
+
+class SalaryRecordBatch:
+    """
+    The records of one source payload. Company, source, URL and the
+    scrape time are set once for the batch; add() builds each record from
+    only what differs between them.
+    """
+
+    def __init__(
+        self,
+        company_id: Optional[str],
+        company_name: str,
+        source_platform: str,
+        source_url: Any = MISSING,
+        scraped_at: Optional[datetime] = None
+    ):
+        scraped_at = scraped_at or datetime.utcnow()
+        self.company_id = company_id
+        self.company_name = company_name
+        self.source_platform = source_platform
+        self.source_url = source_url
+        self.scraped_at = scraped_at.isoformat()
+        self.data_date = scraped_at.date().isoformat()
+        self.records: List[SalaryRecord] = []
+
+    def add(
+        self,
+        designation: str,
+        location: str,
+        base: float = 0,
+        bonus: float = 0,
+        stock: float = 0,
+        total_compensation: float = 0,
+        years_of_experience: Optional[int] = None,
+        level: Optional[str] = None,
+        data_points: int = 1,
+        role_category: Any = MISSING,
+        min_salary: Any = MISSING,
+        max_salary: Any = MISSING,
+        **extra
+    ) -> SalaryRecord:
+        """
+        Append a record; total_compensation defaults to base + bonus + stock,
+        as in normalize_salary_data
+        """
+        record = SalaryRecord(
+            self.company_id,
+            self.company_name,
+            designation,
+            location,
+            self.source_platform,
+            base,
+            bonus,
+            stock,
+            total_compensation or (base + bonus + stock),
+            years_of_experience,
+            level,
+            data_points,
+            self.data_date,
+            self.scraped_at,
+            role_category,
+            self.source_url,
+            min_salary,
+            max_salary,
+            extra or None
+        )
+        self.records.append(record)
+        return record
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __iter__(self) -> Iterator[SalaryRecord]:
+        return iter(self.records)
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        return [record.to_dict() for record in self.records]
+
+
+def as_dict(record: Any) -> Dict[str, Any]:
+    """A SalaryRecord's to_dict(); any other record (already a dict) as is"""
+    return record.to_dict() if isinstance(record, SalaryRecord) else record
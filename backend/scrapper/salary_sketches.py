@@ -0,0 +1,223 @@
+"""
+Salary Sketches
+Per-company compensation percentiles kept as mergeable KLL sketches in
+salary_sketches, overall and per experience bracket, recomputed for the
+companies whose salaries changed instead of sorting every company's
+salaries on each read
+"""
+
+import argparse
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+
+from quantile_sketch import KLLSketch
+from salary_trends import WATERMARK_OVERLAP
+from supabase_client import SupabaseClient
+
+logger = logging.getLogger(__name__)
+
+# Bracket of every record, whatever its experience
+ALL_EXPERIENCE = "all"
+
+# Stored with every sketch, so reading them is a single row lookup
+PERCENTILES = {"p25": 0.25, "p50": 0.5, "p75": 0.75, "p90": 0.9}
+
+DEFAULT_SKETCH_K = 200
+
+
+def experience_bracket(years_of_experience: Optional[float]) -> Optional[str]:
+    """Same brackets as the salary_by_experience view; None without a years_of_experience"""
+    if years_of_experience is None:
+        return None
+    if years_of_experience <= 2:
+        return "0-2 years"
+    if years_of_experience <= 5:
+        return "3-5 years"
+    if years_of_experience <= 8:
+        return "6-8 years"
+    return "9+ years"
+
+
+class SalarySketchStore:
+    """
+    Keeps one sketch per (company_id, bracket) of the total compensation
+    stored in salaries. refresh() recomputes the sketches of the companies
+    whose salaries changed since the last refresh, so they always describe
+    the table: scraped records are not counted until approval writes them
+    to salaries, and updated or merged rows count with their current values.
+
+    Like SalaryTrendAggregator, changed rows are found by their updated_at
+    and deleted rows are reported with touch_rows(). Safe to share between
+    worker threads; meant to have one refresh at a time.
+    """
+
+    def __init__(self, supabase_client, k: int = DEFAULT_SKETCH_K, batch_size: int = 200):
+        self.db = supabase_client
+        self.k = k
+        self.batch_size = batch_size
+        self._touched: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def touch_rows(self, rows: Iterable[Dict[str, Any]]):
+        """Mark the companies of salary rows (company_name) for a refresh"""
+        self.touch_companies(row["company_name"] for row in rows)
+
+    def touch_companies(self, company_names: Iterable[str]):
+        with self._lock:
+            self._touched.update(company_names)
+
+    def touched(self) -> List[str]:
+        """Companies waiting for a refresh, e.g. to hand them to another process's store"""
+        with self._lock:
+            return list(self._touched)
+
+    def watermark(self) -> Optional[str]:
+        """Where to resume reading changed salaries, or None for a full rebuild"""
+        latest = self.db.get_sketches_watermark()
+        if not latest:
+            return None
+        return (datetime.fromisoformat(latest) - WATERMARK_OVERLAP).isoformat()
+
+    def refresh(self, full: bool = False) -> Dict[str, int]:
+        """
+        Recompute the sketches of the touched companies plus every company
+        with salaries stored or updated since the last refresh (every
+        company if full, or if nothing has been sketched yet)
+        Returns: counts of companies recomputed, sketches written and sketches deleted
+        """
+        since = None if full else self.watermark()
+        if since is None:
+            with self._lock:
+                self._touched = set()
+            return self._refresh(None)
+
+        changed = 0
+        for rows in self.db.iter_salaries_changed_since(since):
+            self.touch_rows(rows)
+            changed += len(rows)
+        logger.info(f"{changed} salaries changed since {since}")
+
+        with self._lock:
+            companies, self._touched = self._touched, set()
+        try:
+            return self._refresh(companies)
+        except Exception:
+            # Nothing is lost: the companies are retried by the next refresh
+            self.touch_companies(companies)
+            raise
+
+    def _refresh(self, companies: Optional[Set[str]]) -> Dict[str, int]:
+        """Rebuild the sketches of companies (names), or of every company if None"""
+        company_ids = None
+        if companies is not None:
+            known = {company["name"]: company["id"] for company in self.db.get_all_companies()}
+            company_ids = sorted({known[name] for name in companies if name in known})
+            if not company_ids:
+                return {"companies": 0, "written": 0, "deleted": 0}
+
+        # Load everything before writing anything, so a failed read leaves salary_sketches as it was
+        sketches: Dict[Tuple[str, str], KLLSketch] = {}
+        latest: Dict[str, str] = {}
+        for rows in self.db.iter_sketch_inputs(company_ids):
+            for row in rows:
+                company_id = row.get("company_id")
+                value = row.get("total_compensation")
+                if not company_id or not value or float(value) <= 0:
+                    continue
+                for bracket in (ALL_EXPERIENCE, experience_bracket(row.get("years_of_experience"))):
+                    if bracket is not None:
+                        if (company_id, bracket) not in sketches:
+                            sketches[company_id, bracket] = KLLSketch(self.k)
+                        sketches[company_id, bracket].update(float(value))
+                latest[company_id] = max(latest.get(company_id, ""), row.get("updated_at") or "")
+
+        rows = [
+            self._row(company_id, bracket, sketch, latest.get(company_id) or None)
+            for (company_id, bracket), sketch in sketches.items()
+        ]
+        # Oldest first: if a batch fails, the watermark has not moved past the companies left unwritten
+        rows.sort(key=lambda row: row["source_updated_at"] or "")
+        self.db.save_salary_sketches(rows, batch_size=self.batch_size)
+
+        # Companies or brackets with no salaries left
+        stale = [
+            row["id"] for row in self.db.get_salary_sketch_keys(company_ids)
+            if (row["company_id"], row["experience_bracket"]) not in sketches
+        ]
+        self.db.delete_salary_sketches(stale)
+
+        refreshed = len(company_ids) if company_ids is not None else len(latest)
+        logger.info(f"Salary sketches refreshed: {refreshed} companies, {len(rows)} written, {len(stale)} deleted")
+        return {"companies": refreshed, "written": len(rows), "deleted": len(stale)}
+
+    @staticmethod
+    def _row(company_id: str, bracket: str, sketch: KLLSketch, source_updated_at: Optional[str]) -> Dict[str, Any]:
+        row = {
+            "company_id": company_id,
+            "experience_bracket": bracket,
+            "sketch": sketch.to_dict(),
+            "sample_size": sketch.count,
+            "source_updated_at": source_updated_at,
+        }
+        values = sketch.quantiles(PERCENTILES.values())
+        for name, value in zip(PERCENTILES, values):
+            row[f"{name}_total_compensation"] = round(value, 2) if value is not None else None
+        return row
+
+    def percentiles(self, company_id: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Stored p25/p50/p75/p90 and sample size of a company, per bracket
+        ("all" plus each experience bracket with data)
+        """
+        result = {}
+        for row in self.db.get_salary_sketches([company_id], with_sketch=False):
+            result[row["experience_bracket"]] = {
+                "sample_size": row["sample_size"],
+                **{name: row[f"{name}_total_compensation"] for name in PERCENTILES},
+            }
+        return result
+
+    def sketch(self, company_id: str, bracket: str = ALL_EXPERIENCE) -> Optional[KLLSketch]:
+        """A stored sketch, e.g. to merge several companies' into one distribution"""
+        for row in self.db.get_salary_sketches([company_id]):
+            if row["experience_bracket"] == bracket:
+                return KLLSketch.from_dict(row["sketch"])
+        return None
+
+
+def main(argv: Optional[List[str]] = None):
+    """Refresh salary_sketches from the salaries changed since the last refresh"""
+    load_dotenv()
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    parser = argparse.ArgumentParser(description="Refresh the per-company salary percentile sketches")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Recompute every company's sketches instead of only those with changed salaries"
+    )
+    parser.add_argument(
+        "--k",
+        type=int,
+        default=DEFAULT_SKETCH_K,
+        help=f"Sketch size; larger is more accurate (default: {DEFAULT_SKETCH_K}, about 1%% rank error)"
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        db = SupabaseClient()
+    except ValueError as e:
+        logger.error(f"Failed to initialize Supabase client: {e}")
+        return
+
+    SalarySketchStore(db, k=args.k).refresh(full=args.full)
+
+
+if __name__ == "__main__":
+    main()
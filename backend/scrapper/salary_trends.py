@@ -0,0 +1,237 @@
+"""
+Salary Trends Aggregation
+Keeps salary_trends up to date incrementally: only the (company,
+designation, location, quarter) groups whose salaries changed are
+recomputed, with vectorized NumPy group statistics
+"""
+
+import argparse
+import logging
+import threading
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+from supabase_client import SupabaseClient
+
+logger = logging.getLogger(__name__)
+
+# (company_name, designation, location, (year, quarter)); a None period stands for every period
+Group = Tuple[str, str, str, Optional[Tuple[int, int]]]
+
+# Re-read salaries committed up to this long before the watermark, in case
+# a transaction that started earlier committed after the last refresh
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+
+def period_of(row: Dict[str, Any]) -> Optional[Tuple[int, int]]:
+    """(year, quarter) a salary counts towards: its data_date, else when it was stored"""
+    value = row.get("data_date") or row.get("created_at")
+    if not value:
+        return None
+    day = date.fromisoformat(str(value)[:10])
+    return day.year, (day.month - 1) // 3 + 1
+
+
+def group_statistics(codes: np.ndarray, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Count, mean and median of values per integer group code, without a
+    Python loop: one sort by (code, value) makes every group a contiguous
+    run, so sums come from reduceat and medians from the middle of each run
+    Returns: (codes, counts, means, medians), one entry per distinct code
+    """
+    if len(codes) == 0:
+        empty = np.array([], dtype=np.float64)
+        return np.array([], dtype=np.int64), np.array([], dtype=np.int64), empty, empty
+
+    order = np.lexsort((values, codes))
+    codes, values = codes[order], values[order]
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    counts = np.diff(np.r_[starts, len(codes)])
+    means = np.add.reduceat(values, starts) / counts
+    medians = (values[starts + (counts - 1) // 2] + values[starts + counts // 2]) / 2
+    return codes[starts], counts, means, medians
+
+
+class SalaryTrendAggregator:
+    """
+    Collects the groups touched since the last refresh and recomputes just
+    those rows of salary_trends.
+
+    Salaries reach the salaries table through several paths (approved
+    submissions, migrations), so new and updated rows are found by their
+    updated_at, from the latest one already aggregated. Deleted rows leave
+    no trace there: whoever deletes them reports them with touch_rows(),
+    as the scrape pipeline does when it retires rows a source dropped.
+    Safe to share between worker threads.
+    """
+
+    def __init__(self, supabase_client, batch_size: int = 500):
+        self.db = supabase_client
+        self.batch_size = batch_size
+        self._touched: Set[Group] = set()
+        self._lock = threading.Lock()
+
+    def touch_rows(self, rows: Iterable[Dict[str, Any]]):
+        """Mark the groups of salary rows (company_name, designation, location, data_date/created_at) for a refresh"""
+        groups = {
+            (row["company_name"], row["designation"], row["location"], period_of(row))
+            for row in rows
+        }
+        self.touch_groups(groups)
+
+    def touch_groups(self, groups: Iterable[Group]):
+        with self._lock:
+            self._touched.update(groups)
+
+    def touched(self) -> List[Group]:
+        """Groups waiting for a refresh, e.g. to hand them to another process's aggregator"""
+        with self._lock:
+            return list(self._touched)
+
+    def watermark(self) -> Optional[str]:
+        """Where to resume reading changed salaries, or None for a full rebuild"""
+        latest = self.db.get_trends_watermark()
+        if not latest:
+            return None
+        return (datetime.fromisoformat(latest) - WATERMARK_OVERLAP).isoformat()
+
+    def refresh(self, full: bool = False) -> Dict[str, int]:
+        """
+        Recompute the touched groups plus every group with salaries stored
+        or updated since the last refresh (every group if full, or if
+        nothing has been aggregated yet)
+        Returns: counts of groups recomputed, rows written and rows deleted
+        """
+        since = None if full else self.watermark()
+        changed = 0
+        for rows in self.db.iter_salaries_changed_since(since):
+            self.touch_rows(rows)
+            changed += len(rows)
+        logger.info(f"{changed} salaries changed since {since or 'the beginning'}")
+
+        with self._lock:
+            groups, self._touched = self._touched, set()
+        try:
+            return self._refresh(groups)
+        except Exception:
+            # Nothing is lost: the groups are retried by the next refresh
+            self.touch_groups(groups)
+            raise
+
+    def _refresh(self, groups: Set[Group]) -> Dict[str, int]:
+        # company -> (designation, location) -> touched periods, None for all of them
+        by_company: Dict[str, Dict[Tuple[str, str], Optional[Set[Tuple[int, int]]]]] = {}
+        for company_name, designation, location, period in groups:
+            series = by_company.setdefault(company_name, {})
+            key = (designation, location)
+            if period is None or series.get(key, set()) is None:
+                series[key] = None
+            else:
+                series.setdefault(key, set()).add(period)
+
+        company_ids = {company["name"]: company["id"] for company in self.db.get_all_companies()}
+
+        # Load everything before writing anything, so a failed read leaves salary_trends as it was
+        keys: Dict[Tuple, int] = {}
+        codes: List[int] = []
+        values: List[float] = []
+        latest: List[str] = []
+        stored: List[Tuple[Tuple, str]] = []
+        for company_name, series in by_company.items():
+            company_id = company_ids.get(company_name)
+            if company_id is None:
+                logger.warning(f"No company row for {company_name}, skipping its salary trends")
+                continue
+            designations = sorted({designation for designation, _ in series})
+
+            for row in self.db.iter_trend_inputs(company_name, designations):
+                periods = series.get((row["designation"], row["location"]), set())
+                period = period_of(row)
+                if period is None or (periods is not None and period not in periods):
+                    continue
+                if not row.get("total_compensation") or float(row["total_compensation"]) <= 0:
+                    continue
+
+                key = (company_id, row["designation"], row.get("level"), row["location"]) + period
+                code = keys.setdefault(key, len(keys))
+                if code == len(latest):
+                    latest.append("")
+                codes.append(code)
+                values.append(float(row["total_compensation"]))
+                latest[code] = max(latest[code], row.get("updated_at") or "")
+
+            for trend in self.db.get_salary_trends(company_id, designations):
+                periods = series.get((trend["designation"], trend["location"]), set())
+                if periods is None or (trend["year"], trend["quarter"]) in periods:
+                    key = (company_id, trend["designation"], trend["level"], trend["location"], trend["year"], trend["quarter"])
+                    stored.append((key, trend["id"]))
+
+        group_codes, counts, means, medians = group_statistics(
+            np.array(codes, dtype=np.int64), np.array(values, dtype=np.float64)
+        )
+        key_of = list(keys)
+        rows = []
+        for code, count, mean, median in zip(group_codes.tolist(), counts.tolist(), means.tolist(), medians.tolist()):
+            company_id, designation, level, location, year, quarter = key_of[code]
+            rows.append({
+                "company_id": company_id,
+                "designation": designation,
+                "level": level,
+                "location": location,
+                "year": year,
+                "quarter": quarter,
+                "avg_total_compensation": round(mean, 2),
+                "median_total_compensation": round(median, 2),
+                "sample_size": count,
+                "source_updated_at": latest[code] or None,
+            })
+
+        # Oldest first: if a batch fails, the watermark has not moved past the groups left unwritten
+        rows.sort(key=lambda row: row["source_updated_at"] or "")
+        self.db.save_salary_trends(rows, batch_size=self.batch_size)
+
+        stale = [trend_id for key, trend_id in stored if key not in keys]
+        self.db.delete_salary_trends(stale)
+
+        logger.info(
+            f"Salary trends refreshed: {len(groups)} touched groups in {len(by_company)} companies, "
+            f"{len(rows)} rows written, {len(stale)} deleted"
+        )
+        return {"groups": len(groups), "written": len(rows), "deleted": len(stale)}
+
+
+def main(argv: Optional[List[str]] = None):
+    """Refresh salary_trends from the salaries changed since the last refresh"""
+    load_dotenv()
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    parser = argparse.ArgumentParser(description="Incrementally refresh the salary_trends table")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Recompute every group instead of only those with changed salaries"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=500,
+        help="salary_trends rows per upsert (default: 500)"
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        db = SupabaseClient()
+    except ValueError as e:
+        logger.error(f"Failed to initialize Supabase client: {e}")
+        return
+
+    SalaryTrendAggregator(db, batch_size=args.batch_size).refresh(full=args.full)
+
+
+if __name__ == "__main__":
+    main()
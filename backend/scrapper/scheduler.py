@@ -0,0 +1,125 @@
+"""
+Staleness-Prioritized Scrape Scheduler
+Orders (company, source) jobs by how overdue they are
+"""
+
+import heapq
+import logging
+import math
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from freshness import DEFAULT_FRESHNESS_HOURS, FreshnessPlan
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RELIABILITY = 0.80
+
+
+class RunBudget:
+    """
+    Limits how much work one run may do.
+    max_jobs: number of (company, source) jobs to start
+    max_seconds: wall-clock time after which no new jobs are started
+    """
+
+    def __init__(self, max_jobs: Optional[int] = None, max_seconds: Optional[float] = None):
+        self.max_jobs = max_jobs
+        self.max_seconds = max_seconds
+        self.jobs_started = 0
+        self._started_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self._started_at
+
+    def exhausted(self) -> bool:
+        if self.max_jobs is not None and self.jobs_started >= self.max_jobs:
+            return True
+        return self.max_seconds is not None and self.elapsed() >= self.max_seconds
+
+    def try_start_job(self) -> bool:
+        """Claim budget for one more job; False once the budget is spent"""
+        with self._lock:
+            if self.exhausted():
+                return False
+            self.jobs_started += 1
+            return True
+
+
+class ScrapeScheduler:
+    """
+    Builds a priority queue of due (company, source) jobs.
+
+    A job's priority is how overdue it is relative to its source's
+    data_sources.scrape_frequency_hours (hours since last success divided
+    by the frequency). Never-scraped jobs come first; ties go to the more
+    reliable source. Sources marked inactive in data_sources are skipped.
+    """
+
+    def __init__(
+        self,
+        freshness_plan: Optional[FreshnessPlan],
+        data_sources: Optional[List[Dict[str, Any]]] = None,
+        default_frequency_hours: int = DEFAULT_FRESHNESS_HOURS
+    ):
+        self.freshness_plan = freshness_plan
+        self.default_frequency_hours = default_frequency_hours
+        self._sources = {source["name"]: source for source in (data_sources or [])}
+
+    @classmethod
+    def load(cls, supabase_client, freshness_plan: Optional[FreshnessPlan]) -> "ScrapeScheduler":
+        return cls(freshness_plan, supabase_client.get_data_sources())
+
+    def is_active(self, source: str) -> bool:
+        return self._sources.get(source, {}).get("is_active", True) is not False
+
+    def frequency_hours(self, source: str) -> float:
+        return self._sources.get(source, {}).get("scrape_frequency_hours") or self.default_frequency_hours
+
+    def frequencies(self, sources: Iterable[str]) -> Dict[str, float]:
+        return {source: self.frequency_hours(source) for source in sources}
+
+    def reliability(self, source: str) -> float:
+        return float(self._sources.get(source, {}).get("reliability_score") or DEFAULT_RELIABILITY)
+
+    def overdue_ratio(self, company_name: str, source: str) -> Optional[float]:
+        """
+        Hours since the last success over the source's frequency: >= 1 means due.
+        inf if never scraped, None if there is no freshness plan to judge by.
+        """
+        if self.freshness_plan is None:
+            return None
+
+        hours_since = self.freshness_plan.hours_since(company_name, source)
+        if hours_since is None:
+            return math.inf
+        return hours_since / self.frequency_hours(source)
+
+    def build_queue(self, companies: Iterable[str], sources: Iterable[str]) -> List[Tuple[str, str]]:
+        """
+        Due jobs, most overdue first.
+        Without a freshness plan every job is returned in input order and
+        the scraper decides per job.
+        """
+        sources = [source for source in sources if self.is_active(source)]
+        heap = []
+        order = 0
+        for company in companies:
+            for source in sources:
+                ratio = self.overdue_ratio(company, source)
+                if ratio is not None and ratio < 1:
+                    continue
+                # heapq is a min-heap: negate so the most overdue pops first
+                priority = -ratio if ratio is not None else 0.0
+                heapq.heappush(heap, (priority, -self.reliability(source), order, company, source))
+                order += 1
+
+        jobs = []
+        while heap:
+            _, _, _, company, source = heapq.heappop(heap)
+            jobs.append((company, source))
+
+        logger.info(f"Scheduled {len(jobs)} due (company, source) jobs")
+        return jobs
@@ -85,13 +85,29 @@ CREATE TABLE IF NOT EXISTS salaries (
   CONSTRAINT valid_yoe CHECK (years_of_experience >= 0)
 );
 
+-- Scrape runs table (one row per scraper run, parent of its scrape_history rows)
+CREATE TABLE IF NOT EXISTS scrape_runs (
+  id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+  status TEXT NOT NULL DEFAULT 'running', -- 'running', 'completed', 'failed'
+  sources TEXT[],
+  jobs_total INTEGER DEFAULT 0,
+  jobs_succeeded INTEGER DEFAULT 0,
+  jobs_unchanged INTEGER DEFAULT 0,
+  jobs_failed INTEGER DEFAULT 0,
+  records_scraped INTEGER DEFAULT 0,
+  started_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+  completed_at TIMESTAMP WITH TIME ZONE,
+  metadata JSONB DEFAULT '{}'::jsonb
+);
+
 -- Scrape history table (track scraping operations)
 CREATE TABLE IF NOT EXISTS scrape_history (
   id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+  run_id UUID REFERENCES scrape_runs(id) ON DELETE SET NULL,
   company_id UUID REFERENCES companies(id) ON DELETE SET NULL,
   company_name TEXT NOT NULL,
   source_platform TEXT NOT NULL,
-  status TEXT NOT NULL, -- 'success', 'failed', 'partial'
+  status TEXT NOT NULL, -- 'success', 'unchanged', 'failed', 'partial'
   records_scraped INTEGER DEFAULT 0,
   error_message TEXT,
   started_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
@@ -99,6 +115,9 @@ CREATE TABLE IF NOT EXISTS scrape_history (
   metadata JSONB DEFAULT '{}'::jsonb
 );
 
+-- Tables created before scrape_runs existed
+ALTER TABLE scrape_history ADD COLUMN IF NOT EXISTS run_id UUID REFERENCES scrape_runs(id) ON DELETE SET NULL;
+
 -- Data sources table (track where data comes from)
 CREATE TABLE IF NOT EXISTS data_sources (
   id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
@@ -125,11 +144,39 @@ CREATE TABLE IF NOT EXISTS salary_trends (
   avg_total_compensation DECIMAL(12, 2),
   median_total_compensation DECIMAL(12, 2),
   sample_size INTEGER,
+  -- Latest salaries.updated_at among the group's rows; the aggregator resumes from the maximum
+  source_updated_at TIMESTAMP WITH TIME ZONE,
   created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Columns added for the incremental aggregator (salary_trends.py)
+ALTER TABLE salary_trends ADD COLUMN IF NOT EXISTS source_updated_at TIMESTAMP WITH TIME ZONE;
+ALTER TABLE salary_trends ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW();
+
+-- Compensation percentile sketches per company (salary_sketches.py):
+-- 'all' plus the salary_by_experience brackets
+CREATE TABLE IF NOT EXISTS salary_sketches (
+  id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+  company_id UUID NOT NULL REFERENCES companies(id) ON DELETE CASCADE,
+  experience_bracket TEXT NOT NULL, -- 'all', '0-2 years', '3-5 years', '6-8 years', '9+ years'
+  sketch JSONB NOT NULL, -- Serialized KLL sketch of total_compensation, mergeable
+  sample_size INTEGER NOT NULL DEFAULT 0,
+  p25_total_compensation DECIMAL(12, 2),
+  p50_total_compensation DECIMAL(12, 2),
+  p75_total_compensation DECIMAL(12, 2),
+  p90_total_compensation DECIMAL(12, 2),
+  -- Latest salaries.updated_at among the company's rows; the refresh resumes from the maximum
+  source_updated_at TIMESTAMP WITH TIME ZONE,
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
 
-  UNIQUE(company_id, designation, level, location, year, quarter)
+  UNIQUE(company_id, experience_bracket)
 );
 
+-- Column added for the incremental sketch refresh (salary_sketches.py)
+ALTER TABLE salary_sketches ADD COLUMN IF NOT EXISTS source_updated_at TIMESTAMP WITH TIME ZONE;
+
 -- =====================================================
 -- Indexes for performance
 -- =====================================================
@@ -148,19 +195,37 @@ CREATE INDEX IF NOT EXISTS idx_salaries_yoe ON salaries(years_of_experience);
 CREATE INDEX IF NOT EXISTS idx_salaries_source ON salaries(source_platform);
 CREATE INDEX IF NOT EXISTS idx_salaries_total_comp ON salaries(total_compensation DESC);
 CREATE INDEX IF NOT EXISTS idx_salaries_created_at ON salaries(created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_salaries_updated_at ON salaries(updated_at);
 CREATE INDEX IF NOT EXISTS idx_salaries_company_designation ON salaries(company_name, designation);
 
 -- Composite indexes for common queries
 CREATE INDEX IF NOT EXISTS idx_salaries_search ON salaries(company_name, designation, location);
 CREATE INDEX IF NOT EXISTS idx_salaries_filter ON salaries(company_name, years_of_experience, total_compensation DESC);
+-- Keyset pages of a company's rows from one source, and old-row cleanup
+CREATE INDEX IF NOT EXISTS idx_salaries_source_pages ON salaries(company_name, source_platform, created_at, id);
 
 -- Scrape history indexes
 CREATE INDEX IF NOT EXISTS idx_scrape_history_company ON scrape_history(company_id);
 CREATE INDEX IF NOT EXISTS idx_scrape_history_status ON scrape_history(status);
 CREATE INDEX IF NOT EXISTS idx_scrape_history_started ON scrape_history(started_at DESC);
+CREATE INDEX IF NOT EXISTS idx_scrape_history_run ON scrape_history(run_id);
+CREATE INDEX IF NOT EXISTS idx_scrape_runs_started ON scrape_runs(started_at DESC);
+-- Latest successful scrape per (company, source), used by the freshness planner
+CREATE INDEX IF NOT EXISTS idx_scrape_history_freshness
+  ON scrape_history(company_name, source_platform, completed_at DESC)
+  WHERE status IN ('success', 'unchanged');
 
 -- Trends indexes
 CREATE INDEX IF NOT EXISTS idx_trends_company ON salary_trends(company_id, year DESC);
+-- One row per group. level is often NULL, so NULLs must not be distinct for upserts to find the row.
+-- This replaces the table's former UNIQUE(company_id, designation, level, location, year, quarter),
+-- which let NULL-level groups repeat. NULLS NOT DISTINCT needs PostgreSQL 15 or later.
+CREATE UNIQUE INDEX IF NOT EXISTS idx_trends_group
+  ON salary_trends(company_id, designation, level, location, year, quarter) NULLS NOT DISTINCT;
+CREATE INDEX IF NOT EXISTS idx_trends_source_updated ON salary_trends(source_updated_at DESC);
+
+-- Sketches indexes
+CREATE INDEX IF NOT EXISTS idx_sketches_source_updated ON salary_sketches(source_updated_at DESC);
 
 -- =====================================================
 -- Row Level Security (RLS)
@@ -169,8 +234,10 @@ CREATE INDEX IF NOT EXISTS idx_trends_company ON salary_trends(company_id, year
 ALTER TABLE companies ENABLE ROW LEVEL SECURITY;
 ALTER TABLE salaries ENABLE ROW LEVEL SECURITY;
 ALTER TABLE scrape_history ENABLE ROW LEVEL SECURITY;
+ALTER TABLE scrape_runs ENABLE ROW LEVEL SECURITY;
 ALTER TABLE data_sources ENABLE ROW LEVEL SECURITY;
 ALTER TABLE salary_trends ENABLE ROW LEVEL SECURITY;
+ALTER TABLE salary_sketches ENABLE ROW LEVEL SECURITY;
 
 -- Public read access for all tables
 CREATE POLICY "Anyone can read companies" ON companies
@@ -182,6 +249,9 @@ CREATE POLICY "Anyone can read salaries" ON salaries
 CREATE POLICY "Anyone can read trends" ON salary_trends
   FOR SELECT USING (true);
 
+CREATE POLICY "Anyone can read salary sketches" ON salary_sketches
+  FOR SELECT USING (true);
+
 -- Authenticated users can read data sources and history
 CREATE POLICY "Authenticated users can read sources" ON data_sources
   FOR SELECT USING (auth.role() = 'authenticated');
@@ -189,6 +259,9 @@ CREATE POLICY "Authenticated users can read sources" ON data_sources
 CREATE POLICY "Authenticated users can read scrape history" ON scrape_history
   FOR SELECT USING (auth.role() = 'authenticated');
 
+CREATE POLICY "Authenticated users can read scrape runs" ON scrape_runs
+  FOR SELECT USING (auth.role() = 'authenticated');
+
 -- Service role can do everything (for the scraper)
 CREATE POLICY "Service role full access companies" ON companies
   FOR ALL USING (auth.jwt()->>'role' = 'service_role');
@@ -202,9 +275,15 @@ CREATE POLICY "Service role full access sources" ON data_sources
 CREATE POLICY "Service role full access history" ON scrape_history
   FOR ALL USING (auth.jwt()->>'role' = 'service_role');
 
+CREATE POLICY "Service role full access runs" ON scrape_runs
+  FOR ALL USING (auth.jwt()->>'role' = 'service_role');
+
 CREATE POLICY "Service role full access trends" ON salary_trends
   FOR ALL USING (auth.jwt()->>'role' = 'service_role');
 
+CREATE POLICY "Service role full access salary sketches" ON salary_sketches
+  FOR ALL USING (auth.jwt()->>'role' = 'service_role');
+
 -- =====================================================
 -- Functions and Triggers
 -- =====================================================
@@ -234,6 +313,16 @@ CREATE TRIGGER update_sources_updated_at
   FOR EACH ROW
   EXECUTE FUNCTION update_updated_at_column();
 
+CREATE TRIGGER update_trends_updated_at
+  BEFORE UPDATE ON salary_trends
+  FOR EACH ROW
+  EXECUTE FUNCTION update_updated_at_column();
+
+CREATE TRIGGER update_sketches_updated_at
+  BEFORE UPDATE ON salary_sketches
+  FOR EACH ROW
+  EXECUTE FUNCTION update_updated_at_column();
+
 -- Function to create company slug
 CREATE OR REPLACE FUNCTION generate_slug(text_input TEXT)
 RETURNS TEXT AS $$
@@ -278,6 +367,19 @@ SELECT DISTINCT ON (company_name, designation, location)
 FROM salaries
 ORDER BY company_name, designation, location, created_at DESC;
 
+-- View: Latest successful scrape per company-source combination
+-- (one row per pair; lets the scraper plan a whole run in a single query).
+-- 'unchanged' scrapes fetched the page and found it identical to the last
+-- ingested one, so they count as fresh too.
+CREATE OR REPLACE VIEW latest_successful_scrapes AS
+SELECT DISTINCT ON (company_name, source_platform)
+  company_name,
+  source_platform,
+  completed_at
+FROM scrape_history
+WHERE status IN ('success', 'unchanged')
+ORDER BY company_name, source_platform, completed_at DESC;
+
 -- View: Company salary statistics
 CREATE OR REPLACE VIEW company_salary_stats AS
 SELECT
@@ -1,9 +1,9 @@
-import requests
 import json
-from bs4 import BeautifulSoup
+from http_session import HttpTransport
+from next_data import extract_next_data
 
 class Scraper:
-    def __init__(self):
+    def __init__(self, transport=None):
         self._salary_URL = {
             "levels_fyi":"https://www.levels.fyi/companies/{company_name}/salaries/software-engineer/locations/india?country=113",
             "weekday": "https://www.weekday.works/salary/what-salary-does-{company_name}-pay",
@@ -11,6 +11,7 @@ class Scraper:
         }
         self._company = None
         self._salaries = dict()
+        self._transport = transport or HttpTransport()
 
     def set_company(self, company_name):
         self._company = company_name
@@ -27,84 +28,77 @@ class Scraper:
     def scrape_salary_levels_fyi(self):
         company_name = self._company.lower()
         url = self._salary_URL["levels_fyi"].format(company_name=company_name)
-        r = requests.get(url)
-
-        soup = BeautifulSoup(r.text, 'html.parser')
-        next_data = soup.find('script', id='__NEXT_DATA__')
+        r = self._transport.get(url)
 
         output_data = list()
-        if next_data:
-            try:
-                data = json.loads(next_data.string)
-                data = data['props']['pageProps']
-                
-                salaries = data['averages']
-
-                exchange_rate = data['locationExchangeRate']
-
-                for salary in salaries:
-                    primary_level_name = salary['primaryLevelName']
-                    secondary_level_name = salary['secondaryLevelName'] if 'secondaryLevelName' in salary else None
-
-                    compensation = {
-                        'base': salary['rawValues']['base'] * exchange_rate,
-                        'bonus': salary['rawValues']['bonus'] * exchange_rate,
-                        'stock': salary['rawValues']['stock'] * exchange_rate,
-                        'total_compensation': salary['rawValues']['total'] * exchange_rate
-                    }
-
-                    output_data.append({
-                        'primary_level_name': primary_level_name,
-                        'secondary_level_name': secondary_level_name,
-                        'compensation': compensation
-                    })
-
-                return output_data
-
-            except json.JSONDecodeError:
-                print("Failed to parse JSON data from script tag")
-                return None
+        try:
+            data = extract_next_data(r.content)
+        except json.JSONDecodeError:
+            print("Failed to parse JSON data from script tag")
+            return None
+
+        if data:
+            data = data['props']['pageProps']
+            
+            salaries = data['averages']
+
+            exchange_rate = data['locationExchangeRate']
+
+            for salary in salaries:
+                primary_level_name = salary['primaryLevelName']
+                secondary_level_name = salary['secondaryLevelName'] if 'secondaryLevelName' in salary else None
+
+                compensation = {
+                    'base': salary['rawValues']['base'] * exchange_rate,
+                    'bonus': salary['rawValues']['bonus'] * exchange_rate,
+                    'stock': salary['rawValues']['stock'] * exchange_rate,
+                    'total_compensation': salary['rawValues']['total'] * exchange_rate
+                }
+
+                output_data.append({
+                    'primary_level_name': primary_level_name,
+                    'secondary_level_name': secondary_level_name,
+                    'compensation': compensation
+                })
+
+            return output_data
 
     def scrape_salary_weekdays(self):
         company_name = self._company.lower()
         url = self._salary_URL["weekday"].format(company_name=company_name)
-        r = requests.get(url)
-        output = r.text
-
-        soup = BeautifulSoup(output, 'html.parser')
-        next_data = soup.find('script', id='__NEXT_DATA__')
+        r = self._transport.get(url)
 
-        if next_data:
-            try:
-                data = json.loads(next_data.string)
-                data = data['props']['pageProps']["salaryData"]
+        try:
+            data = extract_next_data(r.content)
+        except json.JSONDecodeError:
+            print("Failed to parse JSON data from script tag")
+            return None
 
-                roles = data['roles']
-                output_data = dict()
-                
-                for role in roles:
-                    role_name = role["role"]
+        if data:
+            data = data['props']['pageProps']["salaryData"]
 
-                    salaries = role["individualSalaries"]
+            roles = data['roles']
+            output_data = dict()
+            
+            for role in roles:
+                role_name = role["role"]
 
-                    output_data[role_name] = list()
+                salaries = role["individualSalaries"]
 
-                    for salary in salaries:
-                        level_name = salary['role']
-                        years_of_experience = salary['yearsOfExperience']
-                        compensation = salary['salary']
+                output_data[role_name] = list()
 
-                        output_data[role_name].append({
-                            'level_name': level_name,
-                            'years_of_experience': years_of_experience,
-                            'compensation': compensation
-                        })
+                for salary in salaries:
+                    level_name = salary['role']
+                    years_of_experience = salary['yearsOfExperience']
+                    compensation = salary['salary']
 
-                return output_data
+                    output_data[role_name].append({
+                        'level_name': level_name,
+                        'years_of_experience': years_of_experience,
+                        'compensation': compensation
+                    })
 
-            except json.JSONDecodeError:
-                print("Failed to parse JSON data from script tag")
-                return None
+            return output_data
     
     def set_salary_levels_fyi(self):
         data = {
@@ -134,9 +128,10 @@ if __name__ == "__main__":
     with open("companies.json", "r") as f:
         companies = json.load(f)
 
+    transport = HttpTransport()
     salaries = dict()
     for company in companies:
-        sc = Scraper()
+        sc = Scraper(transport)
 
         sc.set_company(company)
 
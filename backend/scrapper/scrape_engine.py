@@ -0,0 +1,162 @@
+"""
+Concurrent Scrape Engine
+Runs (company, source) scrape jobs on a bounded worker pool
+"""
+
+import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOURCES = ["levels_fyi", "weekday"]
+
+
+class HostLimiter:
+    """Caps the number of in-flight requests to each host"""
+
+    def __init__(self, per_host_limit: int = 2):
+        if per_host_limit < 1:
+            raise ValueError("per_host_limit must be at least 1")
+
+        self.per_host_limit = per_host_limit
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def _semaphore(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            semaphore = self._semaphores.get(host)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.per_host_limit)
+                self._semaphores[host] = semaphore
+            return semaphore
+
+    @contextmanager
+    def slot(self, url: str):
+        """Block until a request slot for the URL's host is free"""
+        semaphore = self._semaphore(urlparse(url).netloc)
+        with semaphore:
+            yield
+
+
+class ConcurrentScrapeEngine:
+    """
+    Scrapes many companies in parallel.
+
+    Every (company, source) pair is an independent job with its own
+    SupabaseScraper, so each job keeps its own scrape_history row exactly
+    like the sequential path does. Company IDs come from a shared
+    CompanyResolver. max_workers is the global concurrency limit; the
+    HostLimiter additionally bounds requests per source host.
+    """
+
+    def __init__(
+        self,
+        company_resolver,
+        scraper_factory: Callable[[HostLimiter], Any],
+        max_workers: int = 8,
+        per_host_limit: int = 2,
+        sources: Optional[List[str]] = None,
+        host_limiter: Optional[HostLimiter] = None
+    ):
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+
+        self.company_resolver = company_resolver
+        self.scraper_factory = scraper_factory
+        self.max_workers = max_workers
+        self.host_limiter = host_limiter or HostLimiter(per_host_limit)
+        self.sources = sources or list(DEFAULT_SOURCES)
+
+    def _run_job(self, company_name: str, source: str) -> Tuple[int, Dict[str, Any]]:
+        scraper = self.scraper_factory(self.host_limiter)
+        scraper.set_company(company_name, company_id=self.company_resolver.get_id(company_name))
+        job: Dict[str, Any] = {}
+        records = scraper.scrape_source(source, job=job)
+        return len(records), job
+
+    def run(
+        self,
+        companies: List[str],
+        jobs: Optional[List[Tuple[str, str]]] = None,
+        budget=None,
+        queue=None,
+        shard: Optional[int] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Scrape (company, source) jobs, by default every source for every company.
+        jobs are started in the given order; with a WorkQueue they are leased
+        from it instead (this worker's shard first, if given), and each
+        outcome is recorded there. With a RunBudget
+        no new job is started once the budget is spent.
+        Returns: dict of company -> {source: record count}, with an "error" key on failure
+        """
+        if queue is None and jobs is None:
+            jobs = [(company, source) for company in companies for source in self.sources]
+
+        total_results: Dict[str, Dict[str, Any]] = {company: {} for company in companies}
+
+        # Create any new companies in one insert before the jobs need their IDs
+        if queue is None:
+            self.company_resolver.resolve_many(company for company, _ in jobs)
+            job_count = len(jobs)
+            next_job = partial(next, iter(jobs), None)
+        else:
+            self.company_resolver.resolve_many(queue.companies())
+            job_count = sum(queue.counts()[state] for state in ("pending", "leased"))
+            next_job = partial(queue.lease, shard)
+
+        logger.info(
+            f"Running {job_count} (company, source) jobs "
+            f"with {self.max_workers} workers ({self.host_limiter.per_host_limit} per host)"
+        )
+
+        started = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="scrape") as pool:
+            futures = {}
+
+            def submit_next() -> bool:
+                nonlocal started
+                job = next_job()
+                if job is None:
+                    return False
+                if budget is not None and not budget.try_start_job():
+                    if queue is not None:
+                        queue.release(*job)
+                    return False
+                futures[pool.submit(self._run_job, *job)] = job
+                started += 1
+                return True
+
+            # Keep at most max_workers jobs in flight so the budget and job order are respected
+            while len(futures) < self.max_workers and submit_next():
+                pass
+
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    company, source = futures.pop(future)
+                    try:
+                        count, job = future.result()
+                        total_results.setdefault(company, {})[source] = count
+                        if queue is not None:
+                            queue.finish(company, source, job.get("outcome"), job.get("error"))
+                    except Exception as e:
+                        logger.error(f"Error scraping {source} for {company}: {e}")
+                        total_results.setdefault(company, {})["error"] = str(e)
+                        if queue is not None:
+                            queue.fail(company, source, str(e))
+
+                while len(futures) < self.max_workers and submit_next():
+                    pass
+
+        if budget is not None and budget.exhausted():
+            remaining = job_count - started
+            if remaining > 0:
+                logger.info(f"Run budget spent after {budget.jobs_started} jobs; {remaining} left for the next run")
+
+        return total_results
@@ -0,0 +1,206 @@
+"""
+Scrape Run Recorder
+Buffers a run's scrape_history entries in memory and writes them in bulk,
+grouped under one scrape_runs row
+"""
+
+import logging
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ScrapeRunRecorder:
+    """
+    Stands in for the SupabaseClient's start_scrape, complete_scrape and
+    update_data_source_last_scraped during a run, so none of them is a
+    round trip on a job's critical path.
+
+    Entries get client-side ids. Finished entries are written as multi-row
+    upserts once flush_size of them are waiting or flush_interval seconds
+    have passed, and at close(). data_sources.last_scraped_at is written
+    once per source at close(). Entries still buffered if the process dies
+    are lost, which only means those jobs are due again on the next run.
+    """
+
+    def __init__(
+        self,
+        supabase_client,
+        sources: List[str],
+        flush_size: int = 200,
+        flush_interval: float = 30.0,
+        metadata: Optional[Dict[str, Any]] = None,
+        run_id: Optional[str] = None
+    ):
+        """
+        run_id: scrape_runs row created elsewhere, e.g. by the coordinator of
+        several worker processes; start() and close() are then left to it
+        """
+        if flush_size < 1:
+            raise ValueError("flush_size must be at least 1")
+
+        self.db = supabase_client
+        self.sources = sources
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.metadata = metadata or {}
+        self.run_id = run_id
+        self.totals = {
+            "jobs_total": 0,
+            "jobs_succeeded": 0,
+            "jobs_unchanged": 0,
+            "jobs_failed": 0,
+            "records_scraped": 0,
+        }
+
+        self._in_progress: Dict[str, Dict[str, Any]] = {}
+        self._finished: List[Dict[str, Any]] = []
+        self._last_scraped: Dict[str, str] = {}
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        # One flush at a time, so entries are written in completion order
+        self._flush_lock = threading.Lock()
+
+    def start(self) -> Optional[str]:
+        """Create the scrape_runs row; without it entries are saved with no run_id"""
+        try:
+            self.run_id = self.db.start_run(self.sources, self.metadata)
+        except Exception as e:
+            logger.warning(f"Could not create a scrape_runs row, history will have no run_id: {e}")
+        return self.run_id
+
+    def start_scrape(self, company_name: str, source_platform: str, company_id: str = None) -> str:
+        """Begin a scrape_history entry in memory; returns its id"""
+        scrape_id = str(uuid.uuid4())
+        entry = {
+            "id": scrape_id,
+            "run_id": self.run_id,
+            "company_id": company_id,
+            "company_name": company_name,
+            "source_platform": source_platform,
+            "status": "in_progress",
+            "started_at": datetime.utcnow().isoformat(),
+        }
+        with self._lock:
+            self._in_progress[scrape_id] = entry
+        return scrape_id
+
+    def complete_scrape(
+        self,
+        scrape_id: str,
+        status: str,
+        records_scraped: int = 0,
+        error_message: str = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ):
+        """Finish an entry and queue it for the next flush"""
+        with self._lock:
+            entry = self._in_progress.pop(scrape_id, None)
+            if entry is None:
+                logger.error(f"Error completing scrape: unknown scrape {scrape_id}")
+                return
+
+            # Every row in a multi-row upsert needs the same columns
+            entry.update({
+                "status": status,
+                "records_scraped": records_scraped,
+                "completed_at": datetime.utcnow().isoformat(),
+                "error_message": error_message,
+                "metadata": metadata or {},
+            })
+            self._finished.append(entry)
+
+            self.totals["jobs_total"] += 1
+            self.totals["records_scraped"] += records_scraped
+            if status == "success":
+                self.totals["jobs_succeeded"] += 1
+            elif status == "unchanged":
+                self.totals["jobs_unchanged"] += 1
+            else:
+                self.totals["jobs_failed"] += 1
+
+            due = (
+                len(self._finished) >= self.flush_size
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            )
+
+        logger.info(f"Scrape {scrape_id} completed with status: {status}, records: {records_scraped}")
+        if due:
+            self.flush()
+
+    def update_data_source_last_scraped(self, source_platform: str):
+        """Remember the time; data_sources is updated once per source at close()"""
+        with self._lock:
+            self._last_scraped[source_platform] = datetime.utcnow().isoformat()
+
+    def flush(self) -> int:
+        """
+        Write the finished entries in bulk; on failure they stay queued for
+        the next flush
+        Returns: number of entries written
+        """
+        with self._flush_lock:
+            with self._lock:
+                rows, self._finished = self._finished, []
+                self._last_flush = time.monotonic()
+            if not rows:
+                return 0
+
+            try:
+                self.db.save_scrape_history(rows)
+            except Exception as e:
+                logger.error(f"Error saving {len(rows)} scrape history entries, will retry: {e}")
+                with self._lock:
+                    self._finished = rows + self._finished
+                return 0
+            return len(rows)
+
+    def drain(self):
+        """Flush everything buffered; entries never completed are saved as failed"""
+        with self._lock:
+            unfinished = list(self._in_progress)
+        for scrape_id in unfinished:
+            self.complete_scrape(scrape_id, "failed", 0, "Run ended before the scrape completed")
+
+        self.flush()
+        with self._lock:
+            unsaved = len(self._finished)
+        if unsaved:
+            logger.error(f"{unsaved} scrape history entries could not be saved")
+
+    def summary(self) -> Dict[str, Any]:
+        """Job totals and per-source scrape times, for absorb() in another recorder"""
+        with self._lock:
+            return {"totals": dict(self.totals), "last_scraped": dict(self._last_scraped)}
+
+    def absorb(self, summary: Dict[str, Any]):
+        """Add a worker process's summary() to this run's totals"""
+        with self._lock:
+            for key, value in summary["totals"].items():
+                self.totals[key] += value
+            for source_platform, scraped_at in summary["last_scraped"].items():
+                self._last_scraped[source_platform] = max(self._last_scraped.get(source_platform, ""), scraped_at)
+
+    def close(self, status: str = "completed", metadata: Optional[Dict[str, Any]] = None):
+        """
+        Flush everything, update data_sources once per source and close out
+        the scrape_runs row
+        """
+        self.drain()
+
+        for source_platform, scraped_at in sorted(self._last_scraped.items()):
+            self.db.update_data_source_last_scraped(source_platform, scraped_at)
+
+        if self.run_id:
+            summary = dict(self.totals, metadata=dict(self.metadata, **(metadata or {})))
+            self.db.complete_run(self.run_id, status, summary)
+
+        logger.info(
+            f"Run recorded: {self.totals['jobs_total']} jobs "
+            f"({self.totals['jobs_succeeded']} succeeded, {self.totals['jobs_unchanged']} unchanged, "
+            f"{self.totals['jobs_failed']} failed), {self.totals['records_scraped']} records"
+        )
@@ -3,19 +3,35 @@ Enhanced Salary Scraper with Supabase Integration
 Only scrapes companies that don't have recent data
 """
 
-import os
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
-import requests
 import json
-from bs4 import BeautifulSoup
 import logging
-from typing import List, Dict, Optional, Any
-from datetime import datetime
-from supabase_client import SupabaseClient, normalize_salary_data
+from typing import List, Dict, Optional, Any, Tuple
+from supabase_client import SupabaseClient
+from scrape_engine import ConcurrentScrapeEngine, HostLimiter, DEFAULT_SOURCES
+from http_session import HttpTransport, merge_host_stats
+from company_resolver import CompanyResolver
+from freshness import FreshnessPlan
+from scheduler import RunBudget, ScrapeScheduler
+from debug_store import DebugArtifactStore
+from http_cache import ResponseCache
+from metrics import RunMetrics
+from pipeline import ScrapePipeline
+from rate_limiter import AdaptiveRateLimiter, merge_snapshots
+from scrape_run import ScrapeRunRecorder
+from salary_record import SalaryRecord
+from salary_sketches import DEFAULT_SKETCH_K, SalarySketchStore
+from salary_trends import SalaryTrendAggregator
+from work_queue import WorkQueue
+from sharding import SHARD_STRATEGIES, assign_shards, split_jobs
+from sources import SOURCES, get_source
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 
 # Setup logging
 logging.basicConfig(
@@ -26,30 +42,50 @@ logger = logging.getLogger(__name__)
 
 
 class SupabaseScraper:
-    def __init__(self, supabase_client: SupabaseClient, debug_mode: bool = True):
-        """Initialize scraper with Supabase client"""
-        self._salary_URL = {
-            "levels_fyi": "https://www.levels.fyi/companies/{company_name}/salaries/software-engineer/locations/india?country=113",
-            "weekday": "https://www.weekday.works/salary/what-salary-does-{company_name}-pay",
-            "ambitionbox": "https://www.ambitionbox.com/salaries/{company_name}-salaries"
-        }
+    def __init__(
+        self,
+        supabase_client: SupabaseClient,
+        debug_mode: bool = True,
+        host_limiter: Optional[HostLimiter] = None,
+        transport: Optional[HttpTransport] = None,
+        company_resolver: Optional[CompanyResolver] = None,
+        freshness_plan: Optional[FreshnessPlan] = None,
+        frequency_hours: Optional[Dict[str, float]] = None,
+        pipeline: Optional[ScrapePipeline] = None
+    ):
+        """
+        Initialize scraper with Supabase client
+        pipeline: shared ScrapePipeline; built from the other arguments if omitted
+        """
         self.db = supabase_client
         self._company = None
         self._company_id = None
         self.debug_mode = debug_mode
         self.debug_dir = "debug_output"
-        
-        # Create debug output directory if it doesn't exist
-        if self.debug_mode:
-            os.makedirs(self.debug_dir, exist_ok=True)
-
-    def set_company(self, company_name: str):
-        """Set company and get/create company ID"""
+        # Serves company IDs from memory instead of a query per set_company
+        self.company_resolver = company_resolver
+
+        self.pipeline = pipeline or ScrapePipeline(
+            supabase_client,
+            transport=transport,
+            host_limiter=host_limiter,
+            debug_store=DebugArtifactStore(self.debug_dir) if self.debug_mode else None,
+            freshness_plan=freshness_plan,
+            frequency_hours=frequency_hours
+        )
+
+    def set_company(self, company_name: str, company_id: str = None):
+        """Set company and get/create company ID (skipped if company_id is given)"""
         self._company = company_name
-        self._company_id = self.db.get_or_create_company(company_name)
+        if company_id is None:
+            if self.company_resolver is not None:
+                company_id = self.company_resolver.get_id(company_name)
+            else:
+                company_id = self.db.get_or_create_company(company_name)
+        self._company_id = company_id
         logger.info(f"Set company to: {company_name} (ID: {self._company_id})")
 
-    def should_scrape(self, source_platform: str, hours: int = 168) -> bool:
+    def should_scrape(self, source_platform: str, hours: Optional[float] = None) -> bool:
         """
         Check if we should scrape this company from this source
         Returns False if company was scraped recently
@@ -57,338 +93,34 @@ class SupabaseScraper:
         if not self._company:
             raise ValueError("Company not set. Call set_company() first.")
 
-        return not self.db.has_recent_scrape(self._company, source_platform, hours)
-
-    def save_debug_data(self, source: str, raw_data: Any, processed_data: List[Dict] = None):
-        """Save raw scraped data to a text file for analysis"""
-        if not self.debug_mode or not self._company:
-            return
-        
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{self.debug_dir}/{self._company}_{source}_{timestamp}.txt"
-        
-        try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                f.write(f"=" * 80 + "\n")
-                f.write(f"Company: {self._company}\n")
-                f.write(f"Source: {source}\n")
-                f.write(f"Timestamp: {timestamp}\n")
-                f.write(f"=" * 80 + "\n\n")
-                
-                # Write raw salary values (highlighting format issues)
-                if 'raw_salary_values' in raw_data:
-                    f.write("RAW SALARY VALUES (ORIGINAL FORMAT):\n")
-                    f.write("-" * 80 + "\n")
-                    for idx, raw_val in enumerate(raw_data['raw_salary_values'], 1):
-                        f.write(f"\nRaw Value #{idx}:\n")
-                        if 'rawValues' in raw_val:
-                            # levels_fyi format
-                            rv = raw_val['rawValues']
-                            f.write(f"  Level: {raw_val.get('primaryLevelName', 'N/A')}\n")
-                            f.write(f"  Base (raw): {rv.get('base', 'N/A')} (type: {type(rv.get('base')).__name__})\n")
-                            f.write(f"  Bonus (raw): {rv.get('bonus', 'N/A')} (type: {type(rv.get('bonus')).__name__})\n")
-                            f.write(f"  Stock (raw): {rv.get('stock', 'N/A')} (type: {type(rv.get('stock')).__name__})\n")
-                            f.write(f"  Total (raw): {rv.get('total', 'N/A')} (type: {type(rv.get('total')).__name__})\n")
-                            f.write(f"  Exchange Rate: {raw_data.get('exchange_rate', 'N/A')}\n")
-                        elif 'salary' in raw_val:
-                            # weekday format
-                            f.write(f"  Role: {raw_val.get('role', 'N/A')}\n")
-                            f.write(f"  Salary (raw): {raw_val.get('salary', 'N/A')} (type: {type(raw_val.get('salary')).__name__})\n")
-                        f.write(f"  Years of Experience: {raw_val.get('yearsOfExperience', 'N/A')}\n")
-                        f.write(f"  Location: {raw_val.get('location', 'N/A')}\n")
-                    f.write("\n")
-                
-                # Write raw JSON data
-                f.write("FULL RAW JSON DATA:\n")
-                f.write("-" * 80 + "\n")
-                f.write(json.dumps(raw_data, indent=2, ensure_ascii=False))
-                f.write("\n\n")
-                
-                # Write processed salary records
-                if processed_data:
-                    f.write("PROCESSED SALARY RECORDS:\n")
-                    f.write("-" * 80 + "\n")
-                    for idx, record in enumerate(processed_data, 1):
-                        f.write(f"\nRecord #{idx}:\n")
-                        f.write(f"  Company: {record.get('company_name', 'N/A')}\n")
-                        f.write(f"  Role: {record.get('designation', 'N/A')}\n")
-                        f.write(f"  Location: {record.get('location', 'N/A')}\n")
-                        f.write(f"  Base Salary: {record.get('base_salary', 'N/A')}\n")
-                        f.write(f"  Bonus: {record.get('bonus', 'N/A')}\n")
-                        f.write(f"  Stock: {record.get('stock_compensation', 'N/A')}\n")
-                        f.write(f"  Total Compensation: {record.get('total_compensation', 'N/A')}\n")
-                        f.write(f"  Years of Experience: {record.get('years_of_experience', 'N/A')}\n")
-                        f.write(f"  Source Platform: {record.get('source_platform', 'N/A')}\n")
-                        f.write(f"  Source URL: {record.get('source_url', 'N/A')}\n")
-                
-                f.write("\n" + "=" * 80 + "\n")
-            
-            logger.info(f"Debug data saved to: {filename}")
-        except Exception as e:
-            logger.error(f"Error saving debug data: {e}")
+        return self.pipeline.should_scrape(self._company, source_platform, hours)
 
-    def scrape_salary_levels_fyi(self) -> List[Dict]:
+    def scrape_salary_levels_fyi(self) -> List[SalaryRecord]:
         """Scrape salary data from levels.fyi"""
-        source = "levels_fyi"
+        return self.scrape_source("levels_fyi")
 
-        # Check if we should scrape
-        if not self.should_scrape(source):
-            logger.info(f"Skipping {source} for {self._company} (recently scraped)")
-            return []
-
-        scrape_id = self.db.start_scrape(self._company, source, self._company_id)
-
-        try:
-            company_name = self._company.lower()
-            url = self._salary_URL[source].format(company_name=company_name)
-
-            logger.info(f"Scraping {source} for {self._company}: {url}")
-            r = requests.get(url, timeout=30)
-            soup = BeautifulSoup(r.text, 'html.parser')
-            next_data = soup.find('script', id='__NEXT_DATA__')
-
-            if not next_data:
-                logger.warning(f"No data found on {source} for {self._company}")
-                self.db.complete_scrape(scrape_id, "failed", 0, "No __NEXT_DATA__ found")
-                return []
-
-            data = json.loads(next_data.string)
-            data = data['props']['pageProps']
-
-            salaries_raw = data.get('averages', [])
-            exchange_rate = data.get('locationExchangeRate', 1)
-
-            # Save raw data for debugging (before processing)
-            # Extract raw salary values to see original format
-            raw_salary_values = []
-            for salary in salaries_raw:
-                raw_values = salary.get('rawValues', {})
-                raw_salary_values.append({
-                    'primaryLevelName': salary.get('primaryLevelName'),
-                    'secondaryLevelName': salary.get('secondaryLevelName'),
-                    'rawValues': raw_values,
-                    'yearsOfExperience': salary.get('yearsOfExperience'),
-                    'location': salary.get('location'),
-                    'numDataPoints': salary.get('numDataPoints'),
-                    'full_record': salary  # Keep full record for analysis
-                })
-            
-            self.save_debug_data(source, {
-                'raw_data': data,
-                'averages': salaries_raw,
-                'raw_salary_values': raw_salary_values,
-                'exchange_rate': exchange_rate,
-                'url': url
-            })
-
-            salary_records = []
-
-            for salary in salaries_raw:
-                primary_level = salary.get('primaryLevelName', 'Unknown')
-                secondary_level = salary.get('secondaryLevelName')
-                level_name = f"{primary_level} ({secondary_level})" if secondary_level else primary_level
-
-                # Extract compensation
-                # Note: raw_values from levels.fyi are already in actual USD
-                # We just multiply by exchange_rate to convert USD to INR
-                raw_values = salary.get('rawValues', {})
-                compensation = {
-                    'base': raw_values.get('base', 0) * exchange_rate,
-                    'bonus': raw_values.get('bonus', 0) * exchange_rate,
-                    'stock': raw_values.get('stock', 0) * exchange_rate,
-                    'total_compensation': raw_values.get('total', 0) * exchange_rate
-                }
-
-                # Get years of experience
-                yoe = salary.get('yearsOfExperience')
-
-                # Get location
-                location = salary.get('location', 'India')
-
-                # Normalize and create salary record
-                salary_record = normalize_salary_data(
-                    company_id=self._company_id,
-                    company_name=self._company,
-                    designation=f"Software Engineer - {level_name}",
-                    location=location,
-                    source_platform=source,
-                    compensation=compensation,
-                    years_of_experience=yoe,
-                    level=primary_level,
-                    data_points=salary.get('numDataPoints', 1),
-                    source_url=url
-                )
-
-                salary_records.append(salary_record)
-
-            # Save processed records for debugging (after processing)
-            if salary_records:
-                # Re-save with processed data
-                raw_salary_values = []
-                for salary in salaries_raw:
-                    raw_values = salary.get('rawValues', {})
-                    raw_salary_values.append({
-                        'primaryLevelName': salary.get('primaryLevelName'),
-                        'secondaryLevelName': salary.get('secondaryLevelName'),
-                        'rawValues': raw_values,
-                        'yearsOfExperience': salary.get('yearsOfExperience'),
-                        'location': salary.get('location'),
-                        'numDataPoints': salary.get('numDataPoints'),
-                        'full_record': salary
-                    })
-                
-                self.save_debug_data(source, {
-                    'raw_data': data,
-                    'averages': salaries_raw,
-                    'raw_salary_values': raw_salary_values,
-                    'exchange_rate': exchange_rate,
-                    'url': url
-                }, processed_data=salary_records)
-
-            # Insert into database
-            if salary_records:
-                count = self.db.insert_salaries(salary_records)
-                self.db.complete_scrape(scrape_id, "success", count)
-                self.db.update_data_source_last_scraped(source)
-                logger.info(f"Successfully scraped {count} records from {source}")
-            else:
-                self.db.complete_scrape(scrape_id, "success", 0, "No salary data found")
-
-            return salary_records
-
-        except Exception as e:
-            error_msg = f"Error scraping {source}: {str(e)}"
-            logger.error(error_msg)
-            self.db.complete_scrape(scrape_id, "failed", 0, str(e))
-            return []
-
-    def scrape_salary_weekdays(self) -> List[Dict]:
+    def scrape_salary_weekdays(self) -> List[SalaryRecord]:
         """Scrape salary data from weekday.works"""
-        source = "weekday"
-
-        # Check if we should scrape
-        if not self.should_scrape(source):
-            logger.info(f"Skipping {source} for {self._company} (recently scraped)")
-            return []
+        return self.scrape_source("weekday")
 
-        scrape_id = self.db.start_scrape(self._company, source, self._company_id)
+    def scrape_salary_ambitionbox(self) -> List[SalaryRecord]:
+        """Scrape salary data from ambitionbox.com"""
+        return self.scrape_source("ambitionbox")
 
-        try:
-            company_name = self._company.lower()
-            url = self._salary_URL[source].format(company_name=company_name)
-
-            logger.info(f"Scraping {source} for {self._company}: {url}")
-            r = requests.get(url, timeout=30)
-            soup = BeautifulSoup(r.text, 'html.parser')
-            next_data = soup.find('script', id='__NEXT_DATA__')
-
-            if not next_data:
-                logger.warning(f"No data found on {source} for {self._company}")
-                self.db.complete_scrape(scrape_id, "failed", 0, "No __NEXT_DATA__ found")
-                return []
-
-            data = json.loads(next_data.string)
-            data = data['props']['pageProps'].get("salaryData", {})
-
-            roles = data.get('roles', [])
-            
-            # Save raw data for debugging (before processing)
-            # Extract raw salary values to see original format
-            raw_salary_values = []
-            for role in roles:
-                role_name = role.get("role", "Unknown Role")
-                salaries_list = role.get("individualSalaries", [])
-                for salary in salaries_list:
-                    raw_salary_values.append({
-                        'role': role_name,
-                        'salary': salary.get('salary'),  # This is the raw value
-                        'yearsOfExperience': salary.get('yearsOfExperience'),
-                        'full_record': salary
-                    })
-            
-            self.save_debug_data(source, {
-                'raw_data': data,
-                'roles': roles,
-                'raw_salary_values': raw_salary_values,
-                'url': url
-            })
-
-            salary_records = []
-
-            for role in roles:
-                role_name = role.get("role", "Unknown Role")
-                salaries_list = role.get("individualSalaries", [])
-
-                for salary in salaries_list:
-                    level_name = salary.get('role', role_name)
-                    yoe = salary.get('yearsOfExperience')
-                    # Weekday values are in lakhs (hundreds of thousands) of INR
-                    # Convert from lakhs to actual INR: 1 lakh = 100,000 INR
-                    total_comp_lakhs = salary.get('salary', 0)
-                    total_comp = total_comp_lakhs * 100000
-
-                    compensation = {
-                        'base': total_comp,  # Weekday typically shows total compensation
-                        'total_compensation': total_comp
-                    }
-
-                    # Normalize and create salary record
-                    salary_record = normalize_salary_data(
-                        company_id=self._company_id,
-                        company_name=self._company,
-                        designation=level_name,
-                        location="India",  # Weekday doesn't always specify location
-                        source_platform=source,
-                        compensation=compensation,
-                        years_of_experience=yoe,
-                        role_category=role_name,
-                        source_url=url
-                    )
-
-                    salary_records.append(salary_record)
-
-            # Save processed records for debugging (after processing)
-            if salary_records:
-                # Re-extract raw values for comparison
-                raw_salary_values = []
-                for role in roles:
-                    role_name = role.get("role", "Unknown Role")
-                    salaries_list = role.get("individualSalaries", [])
-                    for salary in salaries_list:
-                        raw_salary_values.append({
-                            'role': role_name,
-                            'salary': salary.get('salary'),  # This is the raw value
-                            'yearsOfExperience': salary.get('yearsOfExperience'),
-                            'full_record': salary
-                        })
-                
-                self.save_debug_data(source, {
-                    'raw_data': data,
-                    'roles': roles,
-                    'raw_salary_values': raw_salary_values,
-                    'url': url
-                }, processed_data=salary_records)
-
-            # Insert into database
-            if salary_records:
-                count = self.db.insert_salaries(salary_records)
-                self.db.complete_scrape(scrape_id, "success", count)
-                self.db.update_data_source_last_scraped(source)
-                logger.info(f"Successfully scraped {count} records from {source}")
-            else:
-                self.db.complete_scrape(scrape_id, "success", 0, "No salary data found")
-
-            return salary_records
+    def scrape_source(self, source: str, job: Optional[Dict[str, Any]] = None) -> List[SalaryRecord]:
+        """
+        Scrape a single source for the current company
+        job: optional dict that receives the outcome, see ScrapePipeline.run
+        """
+        if not self._company:
+            raise ValueError("Company not set. Call set_company() first.")
 
-        except Exception as e:
-            error_msg = f"Error scraping {source}: {str(e)}"
-            logger.error(error_msg)
-            self.db.complete_scrape(scrape_id, "failed", 0, str(e))
-            return []
+        return self.pipeline.run(get_source(source), self._company, self._company_id, job=job)
 
-    def scrape_all_sources(self) -> Dict[str, int]:
+    def scrape_all_sources(self, sources: Optional[List[str]] = None) -> Dict[str, int]:
         """
         Scrape all available sources for the current company
+        sources: source names to scrape (default: levels_fyi and weekday)
         Returns: dict with source names and record counts
         """
         if not self._company:
@@ -400,13 +132,8 @@ class SupabaseScraper:
         logger.info(f"Starting scrape for: {self._company}")
         logger.info(f"{'='*60}\n")
 
-        # Scrape levels.fyi
-        levels_records = self.scrape_salary_levels_fyi()
-        results['levels_fyi'] = len(levels_records)
-
-        # Scrape weekday
-        weekday_records = self.scrape_salary_weekdays()
-        results['weekday'] = len(weekday_records)
+        for source in sources or DEFAULT_SOURCES:
+            results[source] = len(self.scrape_source(source))
 
         total_records = sum(results.values())
         logger.info(f"\n{'='*60}")
@@ -417,11 +144,428 @@ class SupabaseScraper:
         return results
 
 
-def main():
+def log_summary(total_results: Dict[str, Dict[str, Any]]):
+    """Print per-company record counts for a finished run"""
+    logger.info("\n" + "="*60)
+    logger.info("SCRAPING SUMMARY")
+    logger.info("="*60)
+    for company, results in total_results.items():
+        if "error" in results:
+            logger.info(f"{company}: ERROR - {results['error']}")
+        else:
+            total = sum(results.values())
+            logger.info(f"{company}: {total} records ({results})")
+    logger.info("="*60)
+
+
+def log_transport_stats(host_stats: Dict[str, Dict[str, Any]]):
+    """Print per-host request counts and latency for a finished run"""
+    for host, stats in host_stats.items():
+        logger.info(
+            f"{host}: {stats['requests']} requests, {stats['errors']} errors, "
+            f"{stats['retries']} retries, avg {stats['avg_seconds'] * 1000:.0f}ms, "
+            f"max {stats['max_seconds'] * 1000:.0f}ms"
+        )
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Scrape salary data into Supabase")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Number of (company, source) jobs to run in parallel (default: 1)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes, each with its own thread pool, HTTP pool and Supabase client (default: 1)"
+    )
+    parser.add_argument(
+        "--shard-strategy",
+        choices=SHARD_STRATEGIES,
+        default="round_robin",
+        help="How companies are split between worker processes (default: round_robin)"
+    )
+    parser.add_argument(
+        "--per-host-limit",
+        type=int,
+        default=2,
+        help="Maximum in-flight requests per source host (default: 2)"
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=2.0,
+        help="Starting requests/second per source host; adapts to 429s and latency (default: 2)"
+    )
+    parser.add_argument(
+        "--max-rate",
+        type=float,
+        default=8.0,
+        help="Ceiling the per-host rate can grow to (default: 8)"
+    )
+    parser.add_argument(
+        "--breaker-threshold",
+        type=int,
+        default=5,
+        help="Consecutive failures that pause a source host (default: 5)"
+    )
+    parser.add_argument(
+        "--breaker-cooldown",
+        type=float,
+        default=60.0,
+        help="Seconds a paused host waits before a probe request (default: 60)"
+    )
+    parser.add_argument(
+        "--sources",
+        default=",".join(DEFAULT_SOURCES),
+        help=f"Comma-separated sources to scrape, from: {', '.join(SOURCES)} (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--no-http-cache",
+        action="store_true",
+        help="Re-download and re-ingest every page, even if unchanged since the last run"
+    )
+    parser.add_argument(
+        "--http-cache-dir",
+        default="http_cache",
+        help="Directory for per-URL ETag/Last-Modified/body hashes (default: http_cache)"
+    )
+    parser.add_argument(
+        "--diff",
+        action="store_true",
+        help="Submit only records that differ from the salaries stored under their source_platform. "
+             "Approved submissions are stored as 'manual', so this only pays off for rows stored as scraped"
+    )
+    parser.add_argument(
+        "--retire-stale",
+        action="store_true",
+        help="Delete stored rows the source no longer lists or whose values changed (implies --diff). "
+             "Only safe when scraped rows are stored under their source_platform"
+    )
+    parser.add_argument(
+        "--report",
+        default="run_report.json",
+        help="Write per-stage timings and counters as JSON here (default: run_report.json)"
+    )
+    parser.add_argument(
+        "--prometheus",
+        default=None,
+        help="Also write the metrics in Prometheus text format to this file"
+    )
+    parser.add_argument(
+        "--history-flush-size",
+        type=int,
+        default=200,
+        help="Write scrape_history entries in bulk once this many are buffered (default: 200)"
+    )
+    parser.add_argument(
+        "--history-flush-seconds",
+        type=float,
+        default=30.0,
+        help="Also write buffered scrape_history entries at least this often (default: 30)"
+    )
+    parser.add_argument(
+        "--no-trends",
+        action="store_true",
+        help="Do not refresh salary_trends for the groups changed since the last refresh after the run"
+    )
+    parser.add_argument(
+        "--no-sketches",
+        action="store_true",
+        help="Do not refresh salary_sketches for the companies changed since the last refresh after the run"
+    )
+    parser.add_argument(
+        "--sketch-k",
+        type=int,
+        default=DEFAULT_SKETCH_K,
+        help=f"Size of refreshed percentile sketches; larger is more accurate (default: {DEFAULT_SKETCH_K})"
+    )
+    parser.add_argument(
+        "--queue",
+        default="scrape_queue.db",
+        help="SQLite work queue; unfinished jobs in it are resumed by the next run (default: scrape_queue.db)"
+    )
+    parser.add_argument(
+        "--no-queue",
+        action="store_true",
+        help="Run the scheduled jobs directly, without a resumable work queue"
+    )
+    parser.add_argument(
+        "--fresh-queue",
+        action="store_true",
+        help="Discard unfinished jobs in the work queue and schedule a new run"
+    )
+    parser.add_argument(
+        "--max-attempts",
+        type=int,
+        default=3,
+        help="Attempts per queued job before it is marked failed (default: 3)"
+    )
+    parser.add_argument(
+        "--lease-minutes",
+        type=float,
+        default=15.0,
+        help="Minutes before a job leased by an unresponsive worker is handed out again (default: 15)"
+    )
+    parser.add_argument(
+        "--max-jobs",
+        type=int,
+        default=None,
+        help="Stop starting new (company, source) jobs after this many (default: no limit)"
+    )
+    parser.add_argument(
+        "--max-minutes",
+        type=float,
+        default=None,
+        help="Stop starting new jobs after this many minutes (default: no limit)"
+    )
+    parser.add_argument(
+        "--ingest-mode",
+        choices=["api", "bulk"],
+        default=None,
+        help="'api' posts each record to /api/salaries, 'bulk' inserts chunks into salary_submissions"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=None,
+        help="Records per insert in bulk ingest mode (default: 500)"
+    )
+    parser.add_argument(
+        "--pool-size",
+        type=int,
+        default=None,
+        help="Keep-alive connections per host (default: max of 10 and --concurrency)"
+    )
+    return parser.parse_args(argv)
+
+
+def build_budget(args: argparse.Namespace, max_jobs: Optional[int] = None) -> RunBudget:
+    return RunBudget(
+        max_jobs=args.max_jobs if max_jobs is None else max_jobs,
+        max_seconds=args.max_minutes * 60 if args.max_minutes else None
+    )
+
+
+def build_rate_limiter(args: argparse.Namespace, workers: int = 1) -> AdaptiveRateLimiter:
+    """Per-process rate limiter; with several worker processes each gets an equal share of the rates"""
+    rate = args.rate / workers
+    return AdaptiveRateLimiter(
+        rate=rate,
+        max_rate=max(args.max_rate / workers, rate),
+        min_rate=min(0.2, rate),
+        failure_threshold=args.breaker_threshold,
+        cooldown=args.breaker_cooldown
+    )
+
+
+def run_jobs(
+    args: argparse.Namespace,
+    db: SupabaseClient,
+    transport: HttpTransport,
+    resolver: CompanyResolver,
+    companies: List[str],
+    sources: List[str],
+    jobs: Optional[List[Tuple[str, str]]],
+    queue: Optional[WorkQueue],
+    history: ScrapeRunRecorder,
+    metrics: RunMetrics,
+    rate_limiter: AdaptiveRateLimiter,
+    freshness_plan: Optional[FreshnessPlan],
+    frequency_hours: Dict[str, float],
+    check_freshness: bool,
+    budget: RunBudget,
+    trends: Optional[SalaryTrendAggregator] = None,
+    sketches: Optional[SalarySketchStore] = None,
+    shard: Optional[int] = None,
+    workers: int = 1
+) -> Dict[str, Dict[str, Any]]:
+    """Run jobs, or drain the queue, on this process's thread pool"""
+    # One pipeline shared by every thread: fetch -> parse -> normalize -> ingest
+    host_limiter = HostLimiter(max(1, args.per_host_limit // workers))
+    pipeline = ScrapePipeline(
+        db,
+        transport=transport,
+        host_limiter=host_limiter,
+        debug_store=DebugArtifactStore("debug_output"),
+        freshness_plan=freshness_plan,
+        frequency_hours=frequency_hours,
+        response_cache=None if args.no_http_cache else ResponseCache(args.http_cache_dir),
+        diff_existing=args.diff or args.retire_stale,
+        retire_stale=args.retire_stale,
+        metrics=metrics,
+        rate_limiter=rate_limiter,
+        history=history,
+        # Queued jobs were judged due when the queue was filled
+        check_freshness=check_freshness,
+        trends=trends,
+        sketches=sketches
+    )
+
+    engine = ConcurrentScrapeEngine(
+        resolver,
+        scraper_factory=lambda _: SupabaseScraper(db, company_resolver=resolver, pipeline=pipeline),
+        max_workers=args.concurrency,
+        host_limiter=host_limiter,
+        sources=sources
+    )
+    return engine.run(companies, jobs=jobs, budget=budget, queue=queue, shard=shard)
+
+
+def run_shard(
+    args: argparse.Namespace,
+    shard: int,
+    workers: int,
+    sources: List[str],
+    jobs: Optional[List[Tuple[str, str]]],
+    run_id: Optional[str],
+    freshness_plan: Optional[FreshnessPlan],
+    frequency_hours: Dict[str, float],
+    check_freshness: bool,
+    max_jobs: Optional[int]
+) -> Dict[str, Any]:
+    """
+    Entry point of one worker process, with its own SupabaseClient, HTTP
+    pool and thread pool. Runs its share of jobs (or drains the queue,
+    its own shard first) and returns what the coordinator merges.
+    """
+    transport = HttpTransport(pool_maxsize=args.pool_size or max(10, args.concurrency))
+    db = SupabaseClient(transport=transport, ingest_mode=args.ingest_mode, batch_size=args.batch_size)
+    resolver = CompanyResolver(db)
+    queue = None
+    if jobs is None:
+        queue = WorkQueue(args.queue, lease_seconds=args.lease_minutes * 60, max_attempts=args.max_attempts)
+
+    metrics = RunMetrics()
+    rate_limiter = build_rate_limiter(args, workers)
+    history = ScrapeRunRecorder(
+        db,
+        sources,
+        flush_size=args.history_flush_size,
+        flush_interval=args.history_flush_seconds,
+        run_id=run_id
+    )
+    # Only collect; the coordinator refreshes the trends and sketches
+    trends = SalaryTrendAggregator(db)
+    sketches = None if args.no_sketches else SalarySketchStore(db, k=args.sketch_k)
+    logger.info(f"Worker {shard + 1}/{workers} starting ({len(jobs) if jobs is not None else 'queued'} jobs)")
+    try:
+        results = run_jobs(
+            args, db, transport, resolver, sorted({company for company, _ in jobs or []}), sources, jobs, queue,
+            history=history,
+            metrics=metrics,
+            rate_limiter=rate_limiter,
+            freshness_plan=freshness_plan,
+            frequency_hours=frequency_hours,
+            check_freshness=check_freshness,
+            budget=build_budget(args, max_jobs),
+            trends=trends,
+            sketches=sketches,
+            shard=shard,
+            workers=workers
+        )
+    finally:
+        history.drain()
+
+    return {
+        "results": results,
+        "metrics": metrics.snapshot(),
+        "transport": transport.stats(),
+        "rate_limits": rate_limiter.snapshot(),
+        "history": history.summary(),
+        "trends": trends.touched(),
+        "sketches": sketches.touched() if sketches else [],
+    }
+
+
+def run_sharded(
+    args: argparse.Namespace,
+    resolver: CompanyResolver,
+    sources: List[str],
+    jobs: Optional[List[Tuple[str, str]]],
+    queue: Optional[WorkQueue],
+    scheduler: ScrapeScheduler,
+    freshness_plan: Optional[FreshnessPlan],
+    check_freshness: bool,
+    history: ScrapeRunRecorder,
+    metrics: RunMetrics,
+    trends: Optional[SalaryTrendAggregator] = None,
+    sketches: Optional[SalarySketchStore] = None
+) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+    """
+    Coordinator for --workers > 1: shard the jobs, run one process per
+    shard and merge their results, metrics and run totals
+    Returns: (total_results, per-host transport stats, per-host rate limits)
+    """
+    workers = args.workers
+    # With a queue the workers lease from it (shards were assigned when it was filled)
+    split: List[Optional[List[Tuple[str, str]]]] = [None] * workers
+    if queue is None:
+        split = split_jobs(jobs, assign_shards(jobs, workers, args.shard_strategy, scheduler), workers)
+
+    # Create new companies once, before the workers load their own company maps
+    resolver.resolve_many(queue.companies() if queue is not None else (company for company, _ in jobs))
+
+    # Split --max-jobs so the workers together start no more than that
+    budgets: List[Optional[int]] = [None] * workers
+    if args.max_jobs is not None:
+        budgets = [args.max_jobs // workers + (1 if k < args.max_jobs % workers else 0) for k in range(workers)]
+
+    total_results: Dict[str, Dict[str, Any]] = {}
+    transport_stats, rate_limits = [], []
+    failed_workers = 0
+    # spawn: each worker starts clean instead of inheriting this process's sockets and threads
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        futures = [
+            pool.submit(
+                run_shard, args, shard, workers, sources, split[shard], history.run_id, freshness_plan,
+                scheduler.frequencies(sources), check_freshness, budgets[shard]
+            )
+            for shard in range(workers)
+        ]
+        for shard, future in enumerate(futures):
+            try:
+                outcome = future.result()
+            except Exception as e:
+                logger.error(f"Worker {shard + 1}/{workers} failed: {e}")
+                failed_workers += 1
+                continue
+
+            for company, results in outcome["results"].items():
+                total_results.setdefault(company, {}).update(results)
+            metrics.merge(outcome["metrics"])
+            history.absorb(outcome["history"])
+            if trends:
+                trends.touch_groups(outcome["trends"])
+            if sketches:
+                sketches.touch_companies(outcome["sketches"])
+            transport_stats.append(outcome["transport"])
+            rate_limits.append(outcome["rate_limits"])
+
+    if failed_workers:
+        raise RuntimeError(f"{failed_workers} of {workers} worker processes failed")
+    return total_results, merge_host_stats(transport_stats), merge_snapshots(rate_limits)
+
+
+def main(argv: Optional[List[str]] = None):
     """Main function to run the scraper"""
+    args = parse_args(argv)
+
+    # One pooled transport for every fetch and API write in this run
+    transport = HttpTransport(pool_maxsize=args.pool_size or max(10, args.concurrency))
+
     # Initialize Supabase client
     try:
-        db = SupabaseClient()
+        db = SupabaseClient(
+            transport=transport,
+            ingest_mode=args.ingest_mode,
+            batch_size=args.batch_size
+        )
     except ValueError as e:
         logger.error(f"Failed to initialize Supabase client: {e}")
         logger.error("Set NEXT_PUBLIC_SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY environment variables")
@@ -439,32 +583,128 @@ def main():
         logger.error(f"Error parsing companies.json: {e}")
         return
 
-    # Initialize scraper
-    scraper = SupabaseScraper(db)
+    # Load every company ID in one paged read; new companies are created in one insert later
+    try:
+        resolver = CompanyResolver(db)
+    except Exception as e:
+        logger.error(f"Failed to load companies: {e}")
+        return
 
-    # Scrape each company
-    total_results = {}
-    for company in companies:
+    sources = [get_source(name).name for name in args.sources.split(",") if name]
+
+    # Jobs left unfinished by an interrupted run are resumed from the local queue as they are
+    queue = None
+    if not args.no_queue:
+        queue = WorkQueue(args.queue, lease_seconds=args.lease_minutes * 60, max_attempts=args.max_attempts)
+        queue.reclaim_dead_leases()
+    resuming = queue is not None and queue.has_work() and not args.fresh_queue
+
+    jobs = None
+    if resuming:
+        counts = queue.counts()
+        logger.info(
+            f"Resuming work queue {args.queue}: {counts['pending']} pending, {counts['leased']} leased, "
+            f"{counts['done']} done, {counts['failed']} failed"
+        )
+        freshness_plan = None
+        scheduler = ScrapeScheduler(None)
+        jobs_queued = counts["pending"] + counts["leased"]
+    else:
+        # Decide what is stale with one query instead of one per (company, source)
         try:
-            scraper.set_company(company)
-            results = scraper.scrape_all_sources()
-            total_results[company] = results
+            freshness_plan = FreshnessPlan.load(db)
         except Exception as e:
-            logger.error(f"Error scraping {company}: {e}")
-            total_results[company] = {"error": str(e)}
+            logger.warning(f"Could not load freshness plan, checking each company instead: {e}")
+            freshness_plan = None
+
+        # Most overdue jobs first, using each source's scrape_frequency_hours
+        scheduler = ScrapeScheduler.load(db, freshness_plan)
+        jobs = scheduler.build_queue(companies, sources)
+        jobs_queued = len(jobs)
+        if queue is not None:
+            # With several worker processes each job is tagged with the shard that leases it first
+            shards = assign_shards(jobs, args.workers, args.shard_strategy, scheduler) if args.workers > 1 else None
+            queue.fill(jobs, replace=args.fresh_queue, shards=shards)
+
+    metrics = RunMetrics()
+    # One scrape_runs row for the run; its scrape_history entries are written in bulk
+    history = ScrapeRunRecorder(
+        db,
+        sources,
+        flush_size=args.history_flush_size,
+        flush_interval=args.history_flush_seconds,
+        metadata={
+            "concurrency": args.concurrency,
+            "workers": args.workers,
+            "jobs_queued": jobs_queued,
+            "resumed": resuming,
+            "max_jobs": args.max_jobs,
+            "max_minutes": args.max_minutes,
+        }
+    )
+    history.start()
+    trends = None if args.no_trends else SalaryTrendAggregator(db)
+    sketches = None if args.no_sketches else SalarySketchStore(db, k=args.sketch_k)
 
-    # Print summary
-    logger.info("\n" + "="*60)
-    logger.info("SCRAPING SUMMARY")
-    logger.info("="*60)
-    for company, results in total_results.items():
-        if "error" in results:
-            logger.info(f"{company}: ERROR - {results['error']}")
+    run_status = "failed"
+    try:
+        if args.workers > 1:
+            total_results, transport_stats, rate_limits = run_sharded(
+                args, resolver, sources, jobs, queue, scheduler, freshness_plan, not resuming, history, metrics,
+                trends, sketches
+            )
         else:
-            total = sum(results.values())
-            logger.info(f"{company}: {total} records ({results})")
-    logger.info("="*60)
+            rate_limiter = build_rate_limiter(args)
+            total_results = run_jobs(
+                args, db, transport, resolver, companies, sources, jobs, queue,
+                history=history,
+                metrics=metrics,
+                rate_limiter=rate_limiter,
+                freshness_plan=freshness_plan,
+                frequency_hours=scheduler.frequencies(sources),
+                check_freshness=not resuming,
+                budget=build_budget(args),
+                trends=trends,
+                sketches=sketches
+            )
+            transport_stats = transport.stats()
+            rate_limits = rate_limiter.snapshot()
+        run_status = "completed"
+    finally:
+        history.close(run_status, {"elapsed_seconds": round(metrics.elapsed(), 3), "report": args.report})
+
+    # Recompute only the salary_trends groups with salaries changed since the last refresh
+    if trends:
+        try:
+            trends.refresh()
+        except Exception as e:
+            logger.error(f"Error refreshing salary trends: {e}")
 
+    # Likewise the percentile sketches, for companies with salaries changed since the last refresh
+    if sketches:
+        try:
+            sketches.refresh()
+        except Exception as e:
+            logger.error(f"Error refreshing salary sketches: {e}")
+
+    log_summary(total_results)
+    log_transport_stats(transport_stats)
+    if queue is not None:
+        counts = queue.counts()
+        logger.info(
+            f"Work queue: {counts['done']} done, {counts['failed']} failed, "
+            f"{counts['pending'] + counts['leased']} left for the next run"
+        )
+
+    for host, state in rate_limits.items():
+        logger.info(
+            f"{host}: rate {state['rate_per_second']}/s, circuit {state['circuit']}, "
+            f"{state['throttled']} throttled, {state['breaker_trips']} breaker trips"
+        )
+
+    metrics.write_report(args.report, transport_stats, rate_limits)
+    if args.prometheus:
+        metrics.write_prometheus(args.prometheus, rate_limits)
 
 if __name__ == "__main__":
     main()
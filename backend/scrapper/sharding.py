@@ -0,0 +1,78 @@
+"""
+Job Sharding
+Splits scheduled (company, source) jobs between worker processes
+"""
+
+import heapq
+import logging
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SHARD_STRATEGIES = ("round_robin", "staleness")
+
+# Weight of a never-scraped job, and the cap for very overdue ones
+MAX_STALENESS_WEIGHT = 10.0
+
+
+def staleness_weight(overdue_ratio: Optional[float]) -> float:
+    """
+    Expected work of one job. Stale pages are the ones likely to have
+    changed and need a full ingest, recently scraped ones often end as
+    unchanged. Without a freshness plan every job weighs the same.
+    """
+    if overdue_ratio is None:
+        return 1.0
+    return min(max(overdue_ratio, 1.0), MAX_STALENESS_WEIGHT)
+
+
+def assign_shards(
+    jobs: List[Tuple[str, str]],
+    workers: int,
+    strategy: str = "round_robin",
+    scheduler=None
+) -> List[int]:
+    """
+    Shard index for each job; all of a company's jobs share a shard.
+
+    round_robin deals companies out in queue order. staleness gives each
+    company, stalest first, to the shard with the least staleness weight so
+    far, so every worker gets a similar share of the overdue work.
+    """
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    if strategy not in SHARD_STRATEGIES:
+        raise ValueError(f"Unknown shard strategy '{strategy}', expected one of: {', '.join(SHARD_STRATEGIES)}")
+
+    # Companies in queue order (most overdue first), with their total weight
+    weights: Dict[str, float] = {}
+    for company, source in jobs:
+        ratio = scheduler.overdue_ratio(company, source) if scheduler is not None else None
+        weights[company] = weights.get(company, 0.0) + staleness_weight(ratio)
+
+    shard_of: Dict[str, int] = {}
+    if strategy == "round_robin":
+        for index, company in enumerate(weights):
+            shard_of[company] = index % workers
+    else:
+        loads = [(0.0, shard) for shard in range(workers)]
+        # sorted() is stable, so equal weights keep their queue order
+        for company in sorted(weights, key=weights.get, reverse=True):
+            load, shard = heapq.heappop(loads)
+            shard_of[company] = shard
+            heapq.heappush(loads, (load + weights[company], shard))
+
+    shards = [shard_of[company] for company, _ in jobs]
+    totals = [0.0] * workers
+    for company, weight in weights.items():
+        totals[shard_of[company]] += weight
+    logger.info(f"Sharded {len(jobs)} jobs over {workers} workers ({strategy}), weights {[round(t, 1) for t in totals]}")
+    return shards
+
+
+def split_jobs(jobs: List[Tuple[str, str]], shards: List[int], workers: int) -> List[List[Tuple[str, str]]]:
+    """Per-worker job lists, each keeping the queue order"""
+    split: List[List[Tuple[str, str]]] = [[] for _ in range(workers)]
+    for job, shard in zip(jobs, shards):
+        split[shard].append(job)
+    return split
@@ -0,0 +1,218 @@
+"""
+Salary Sources
+Each source only knows how to build its page URL and turn the page payload
+into normalized salary records; fetching, storage and bookkeeping live in
+pipeline.ScrapePipeline
+"""
+
+import logging
+from typing import Any, Dict, List, Optional
+
+from next_data import extract_next_data
+from salary_record import SalaryRecord, SalaryRecordBatch
+
+logger = logging.getLogger(__name__)
+
+
+def parse_levels_fyi_payload(
+    data: Dict[str, Any],
+    company_name: str,
+    company_id: Optional[str],
+    url: str
+) -> List[SalaryRecord]:
+    """Normalize a levels.fyi pageProps payload into salary records"""
+    salaries_raw = data.get('averages', [])
+    exchange_rate = data.get('locationExchangeRate', 1)
+
+    batch = SalaryRecordBatch(company_id, company_name, "levels_fyi", source_url=url)
+
+    for salary in salaries_raw:
+        primary_level = salary.get('primaryLevelName', 'Unknown')
+        secondary_level = salary.get('secondaryLevelName')
+        level_name = f"{primary_level} ({secondary_level})" if secondary_level else primary_level
+
+        # Extract compensation
+        # Note: raw_values from levels.fyi are already in actual USD
+        # We just multiply by exchange_rate to convert USD to INR
+        raw_values = salary.get('rawValues', {})
+
+        # Get years of experience
+        yoe = salary.get('yearsOfExperience')
+
+        # Get location
+        location = salary.get('location', 'India')
+
+        # Normalize and create salary record
+        batch.add(
+            designation=f"Software Engineer - {level_name}",
+            location=location,
+            base=raw_values.get('base', 0) * exchange_rate,
+            bonus=raw_values.get('bonus', 0) * exchange_rate,
+            stock=raw_values.get('stock', 0) * exchange_rate,
+            total_compensation=raw_values.get('total', 0) * exchange_rate,
+            years_of_experience=yoe,
+            level=primary_level,
+            data_points=salary.get('numDataPoints', 1)
+        )
+
+    return batch.records
+
+
+def parse_weekday_payload(
+    data: Dict[str, Any],
+    company_name: str,
+    company_id: Optional[str],
+    url: str
+) -> List[SalaryRecord]:
+    """Normalize a weekday.works salaryData payload into salary records"""
+    roles = data.get('roles', [])
+
+    batch = SalaryRecordBatch(company_id, company_name, "weekday", source_url=url)
+
+    for role in roles:
+        role_name = role.get("role", "Unknown Role")
+        salaries_list = role.get("individualSalaries", [])
+
+        for salary in salaries_list:
+            level_name = salary.get('role', role_name)
+            yoe = salary.get('yearsOfExperience')
+            # Weekday values are in lakhs (hundreds of thousands) of INR
+            # Convert from lakhs to actual INR: 1 lakh = 100,000 INR
+            total_comp_lakhs = salary.get('salary', 0)
+            total_comp = total_comp_lakhs * 100000
+
+            # Normalize and create salary record
+            batch.add(
+                designation=level_name,
+                location="India",  # Weekday doesn't always specify location
+                base=total_comp,  # Weekday typically shows total compensation
+                total_compensation=total_comp,
+                years_of_experience=yoe,
+                role_category=role_name
+            )
+
+    return batch.records
+
+
+def _first_number(*values) -> Optional[float]:
+    for value in values:
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return float(value)
+    return None
+
+
+def parse_ambitionbox_payload(
+    data: Dict[str, Any],
+    company_name: str,
+    company_id: Optional[str],
+    url: str
+) -> List[SalaryRecord]:
+    """
+    Normalize an AmbitionBox salaries payload into salary records.
+    The page lists one entry per job profile with annual INR min/avg/max
+    and an experience range; field names vary between page versions, so
+    each value is looked up under its known aliases.
+    """
+    entries = None
+    for key in ("salaries", "salariesData", "salaryData", "jobProfiles"):
+        candidate = data.get(key)
+        if isinstance(candidate, dict):
+            candidate = candidate.get("data") or candidate.get("salaries")
+        if isinstance(candidate, list):
+            entries = candidate
+            break
+
+    batch = SalaryRecordBatch(company_id, company_name, "ambitionbox", source_url=url)
+
+    for entry in entries or []:
+        designation = entry.get("jobProfileName") or entry.get("designation") or entry.get("title")
+        average = _first_number(entry.get("avg"), entry.get("average"), entry.get("averageCtc"))
+        if not designation or not average:
+            continue
+
+        experience = entry.get("experience") or {}
+        yoe = _first_number(experience.get("min"), entry.get("minExperience"))
+
+        batch.add(
+            designation=designation,
+            location=entry.get("location") or "India",
+            base=average,
+            total_compensation=average,
+            years_of_experience=int(yoe) if yoe is not None else None,
+            data_points=entry.get("dataPoints") or entry.get("count") or 1,
+            min_salary=_first_number(entry.get("min"), entry.get("minCtc")),
+            max_salary=_first_number(entry.get("max"), entry.get("maxCtc"))
+        )
+
+    return batch.records
+
+
+class SalarySource:
+    """
+    A salary data source. Subclasses set name and url_template and
+    implement parse(); extract_payload() covers Next.js pages by default.
+    """
+
+    name: str = None
+    url_template: str = None
+
+    def build_url(self, company_name: str) -> str:
+        return self.url_template.format(company_name=company_name.lower())
+
+    def extract_payload(self, html: bytes) -> Optional[Any]:
+        """
+        The part of the page that parse() consumes (and that gets stored
+        for replay), or None if the page has no data
+        """
+        next_data = extract_next_data(html)
+        if not next_data:
+            return None
+        return self.payload_from_next_data(next_data)
+
+    def payload_from_next_data(self, next_data: Dict[str, Any]) -> Any:
+        return next_data['props']['pageProps']
+
+    def parse(self, payload: Any, company_name: str, company_id: Optional[str], url: str) -> List[SalaryRecord]:
+        raise NotImplementedError
+
+
+class LevelsFyiSource(SalarySource):
+    name = "levels_fyi"
+    url_template = "https://www.levels.fyi/companies/{company_name}/salaries/software-engineer/locations/india?country=113"
+
+    def parse(self, payload, company_name, company_id, url):
+        return parse_levels_fyi_payload(payload, company_name, company_id, url)
+
+
+class WeekdaySource(SalarySource):
+    name = "weekday"
+    url_template = "https://www.weekday.works/salary/what-salary-does-{company_name}-pay"
+
+    def payload_from_next_data(self, next_data):
+        return next_data['props']['pageProps'].get("salaryData", {})
+
+    def parse(self, payload, company_name, company_id, url):
+        return parse_weekday_payload(payload, company_name, company_id, url)
+
+
+class AmbitionBoxSource(SalarySource):
+    name = "ambitionbox"
+    url_template = "https://www.ambitionbox.com/salaries/{company_name}-salaries"
+
+    def build_url(self, company_name: str) -> str:
+        return self.url_template.format(company_name=company_name.lower().replace(" ", "-"))
+
+    def parse(self, payload, company_name, company_id, url):
+        return parse_ambitionbox_payload(payload, company_name, company_id, url)
+
+
+SOURCES: Dict[str, SalarySource] = {
+    source.name: source
+    for source in (LevelsFyiSource(), WeekdaySource(), AmbitionBoxSource())
+}
+
+
+def get_source(name: str) -> SalarySource:
+    if name not in SOURCES:
+        raise ValueError(f"Unknown source: {name}")
+    return SOURCES[name]
@@ -4,19 +4,59 @@ Handles all database operations with Supabase
 """
 
 import os
+from concurrent.futures import ThreadPoolExecutor
 from supabase import create_client, Client
 from datetime import datetime
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Iterator, Optional, Any, Callable, Sequence
 import logging
-import requests
+from http_session import HttpTransport
+from salary_record import SalaryRecord
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# scrape_history statuses that count as a fresh look at the source:
+# "unchanged" means the page was fetched and matched the last ingested one
+FRESH_SCRAPE_STATUSES = ("success", "unchanged")
+
+# One salary_trends row per group; the upsert conflict target
+TREND_GROUP_COLUMNS = "company_id,designation,level,location,year,quarter"
+
+
+def _quote_filter_value(value: Any) -> str:
+    """A value quoted for a PostgREST logic tree, where , . : ( ) are reserved"""
+    text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{text}"'
+
+
+def _keyset_after(order_by: Sequence[str], last_row: Dict[str, Any]) -> str:
+    """
+    or=(...) filter for the rows after last_row in order_by order:
+    a > x, or a = x and b > y, and so on
+    """
+    clauses = []
+    for position, column in enumerate(order_by):
+        conditions = [f"{previous}.eq.{_quote_filter_value(last_row[previous])}" for previous in order_by[:position]]
+        conditions.append(f"{column}.gt.{_quote_filter_value(last_row[column])}")
+        clauses.append(conditions[0] if len(conditions) == 1 else f"and({','.join(conditions)})")
+    return ",".join(clauses)
+
+
 class SupabaseClient:
-    def __init__(self):
-        """Initialize Supabase client with environment variables"""
+    def __init__(
+        self,
+        transport: Optional[HttpTransport] = None,
+        ingest_mode: Optional[str] = None,
+        batch_size: Optional[int] = None
+    ):
+        """
+        Initialize Supabase client with environment variables
+        transport: shared HTTP transport for API calls (a private one is created if omitted)
+        ingest_mode: "api" posts each record to /api/salaries, "bulk" inserts
+            chunks straight into salary_submissions (default: SALARY_INGEST_MODE or "api")
+        batch_size: records per bulk insert (default: SALARY_INGEST_BATCH_SIZE or 500)
+        """
         self.url = os.environ.get("NEXT_PUBLIC_SUPABASE_URL")
         self.key = os.environ.get("SUPABASE_SERVICE_ROLE_KEY")
 
@@ -30,12 +70,18 @@ class SupabaseClient:
         # Base URL of the Next.js app API (used to reuse aggregation logic)
         # Defaults to local dev URL; can be overridden in env.
         self.api_base_url = os.environ.get("SALARIS_API_URL", "http://localhost:3000")
+        self.transport = transport or HttpTransport()
+
+        self.ingest_mode = ingest_mode or os.environ.get("SALARY_INGEST_MODE", "api")
+        if self.ingest_mode not in ("api", "bulk"):
+            raise ValueError(f"Unknown ingest mode: {self.ingest_mode}")
+        self.batch_size = batch_size or int(os.environ.get("SALARY_INGEST_BATCH_SIZE", "500"))
         logger.info("Supabase client initialized successfully")
 
     def company_exists(self, company_name: str) -> bool:
         """Check if a company already exists in the database"""
         try:
-            response = self.client.table("companies").select("id").eq("name", company_name).execute()
+            response = self.client.table("companies").select("id").eq("name", company_name).limit(1).execute()
             return len(response.data) > 0
         except Exception as e:
             logger.error(f"Error checking if company exists: {e}")
@@ -56,13 +102,7 @@ class SupabaseClient:
                 return company_id
 
             # Create new company
-            slug = company_name.lower().replace(" ", "-")
-            company_data = {
-                "name": company_name,
-                "slug": slug,
-                "display_name": display_name or company_name,
-                "is_active": True
-            }
+            company_data = self._company_row(company_name, display_name)
 
             response = self.client.table("companies").insert(company_data).execute()
             company_id = response.data[0]["id"]
@@ -73,6 +113,52 @@ class SupabaseClient:
             logger.error(f"Error in get_or_create_company: {e}")
             raise
 
+    @staticmethod
+    def _company_row(company_name: str, display_name: str = None) -> Dict[str, Any]:
+        """Row for a new companies entry"""
+        return {
+            "name": company_name,
+            "slug": company_name.lower().replace(" ", "-"),
+            "display_name": display_name or company_name,
+            "is_active": True
+        }
+
+    def get_all_companies(self, page_size: int = 1000) -> List[Dict[str, Any]]:
+        """
+        Load id, name and slug for every company, page_size rows per request
+        Raises on failure so callers never mistake a partial load for the full table
+        """
+        companies = list(self.iter_rows("companies", "id, name, slug", order_by=("name",), page_size=page_size))
+        logger.info(f"Loaded {len(companies)} companies")
+        return companies
+
+    def create_companies(self, company_names: List[str], lookup_size: int = 200) -> List[Dict[str, Any]]:
+        """
+        Create several companies with a single insert. Names that already
+        exist (e.g. created concurrently by another process) are left alone.
+        The rows are read back lookup_size names at a time, since the names
+        go into the query string.
+        Returns: id, name and slug of every requested company
+        """
+        if not company_names:
+            return []
+
+        rows = [self._company_row(name) for name in company_names]
+        self.client.table("companies").upsert(
+            rows, on_conflict="name", ignore_duplicates=True, returning="minimal"
+        ).execute()
+
+        names = list(company_names)
+        companies = []
+        for start in range(0, len(names), lookup_size):
+            response = self.client.table("companies").select(
+                "id, name, slug"
+            ).in_("name", names[start:start + lookup_size]).execute()
+            companies.extend(response.data)
+
+        logger.info(f"Created companies (requested {len(company_names)}, {len(companies)} now present)")
+        return companies
+
     def has_recent_scrape(self, company_name: str, source_platform: str, hours: int = 168) -> bool:
         """
         Check if company was scraped recently from this source
@@ -83,8 +169,8 @@ class SupabaseClient:
                 "company_name", company_name
             ).eq(
                 "source_platform", source_platform
-            ).eq(
-                "status", "success"
+            ).in_(
+                "status", list(FRESH_SCRAPE_STATUSES)
             ).order("completed_at", desc=True).limit(1).execute()
 
             if not response.data:
@@ -105,6 +191,18 @@ class SupabaseClient:
             logger.error(f"Error checking recent scrape: {e}")
             return False
 
+    def get_latest_successful_scrapes(self, page_size: int = 1000) -> List[Dict[str, Any]]:
+        """
+        Latest successful completed_at for every (company_name, source_platform)
+        Raises on failure so callers can fall back to per-company checks
+        """
+        return list(self.iter_rows(
+            "latest_successful_scrapes",
+            "company_name, source_platform, completed_at",
+            order_by=("company_name", "source_platform"),
+            page_size=page_size
+        ))
+
     def start_scrape(self, company_name: str, source_platform: str, company_id: str = None) -> str:
         """
         Record the start of a scraping operation
@@ -133,7 +231,8 @@ class SupabaseClient:
         scrape_id: str,
         status: str,
         records_scraped: int = 0,
-        error_message: str = None
+        error_message: str = None,
+        metadata: Optional[Dict[str, Any]] = None
     ):
         """Update scrape history record when scraping completes"""
         try:
@@ -145,6 +244,8 @@ class SupabaseClient:
 
             if error_message:
                 update_data["error_message"] = error_message
+            if metadata:
+                update_data["metadata"] = metadata
 
             self.client.table("scrape_history").update(update_data).eq("id", scrape_id).execute()
             logger.info(f"Scrape {scrape_id} completed with status: {status}, records: {records_scraped}")
@@ -152,62 +253,209 @@ class SupabaseClient:
         except Exception as e:
             logger.error(f"Error completing scrape: {e}")
 
+    def start_run(self, sources: List[str], metadata: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Record the start of a scraper run
+        Returns: scrape_runs id
+        """
+        response = self.client.table("scrape_runs").insert({
+            "status": "running",
+            "sources": sources,
+            "started_at": datetime.utcnow().isoformat(),
+            "metadata": metadata or {}
+        }).execute()
+        run_id = response.data[0]["id"]
+        logger.info(f"Started scrape run {run_id}")
+        return run_id
+
+    def complete_run(self, run_id: str, status: str, summary: Dict[str, Any]):
+        """Close out a scrape_runs row with its job and record totals"""
+        try:
+            self.client.table("scrape_runs").update(
+                dict(summary, status=status, completed_at=datetime.utcnow().isoformat())
+            ).eq("id", run_id).execute()
+            logger.info(f"Scrape run {run_id} completed with status: {status}")
+
+        except Exception as e:
+            logger.error(f"Error completing scrape run: {e}")
+
+    def save_scrape_history(self, rows: List[Dict[str, Any]], batch_size: int = 500):
+        """
+        Write finished scrape_history rows (with client-side ids) in
+        multi-row upserts of batch_size rows. Raises on failure.
+        """
+        for start in range(0, len(rows), batch_size):
+            self.client.table("scrape_history").upsert(
+                rows[start:start + batch_size], on_conflict="id", returning="minimal"
+            ).execute()
+        logger.info(f"Saved {len(rows)} scrape history entries")
+
+    @staticmethod
+    def _to_api_payload(salary: Dict[str, Any]) -> Dict[str, str]:
+        """Map a normalized scraper record to the CreateSalaryInput shape"""
+        if isinstance(salary, SalaryRecord):
+            return salary.to_api_payload()
+        return {
+            "company": salary.get("company_name", ""),
+            "role": salary.get("designation", ""),
+            "location": salary.get("location", ""),
+            "yearsOfExperience": (
+                str(salary.get("years_of_experience"))
+                if salary.get("years_of_experience") is not None
+                else ""
+            ),
+            "baseSalary": str(salary.get("base_salary") or ""),
+            "bonus": str(salary.get("bonus") or ""),
+            "stockCompensation": str(salary.get("stock_compensation") or ""),
+            "totalCompensation": str(salary.get("total_compensation") or ""),
+            # Treat scraper data as full-time salary entries by default
+            "type": "fulltime",
+            "employmentType": "Full-time",
+            # Internship/university-specific fields left empty
+            "duration": "",
+            "stipend": "",
+            "university": "",
+            "year": "",
+        }
+
+    @staticmethod
+    def _to_submission_row(salary: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Map a normalized scraper record to a salary_submissions row,
+        mirroring what POST /api/salaries inserts.
+        Raises ValueError for records the endpoint would reject.
+        """
+        if isinstance(salary, SalaryRecord):
+            row = salary.to_submission_row()
+        else:
+            row = {
+                "company": salary.get("company_name"),
+                "role": salary.get("designation"),
+                "location": salary.get("location"),
+                "years_of_experience": salary.get("years_of_experience"),
+                "base_salary": salary.get("base_salary") or None,
+                "bonus": salary.get("bonus") or None,
+                "stock_compensation": salary.get("stock_compensation") or None,
+                "total_compensation": salary.get("total_compensation") or None,
+                "type": "fulltime",
+                "employment_type": "Full-time",
+                "duration": None,
+                "stipend": None,
+                "university": None,
+                "year": None,
+                "status": "pending",
+            }
+
+        missing = [
+            field for field in ("company", "role", "location", "total_compensation")
+            if not row[field]
+        ]
+        if missing:
+            raise ValueError(f"Missing required fields: {', '.join(missing)}")
+
+        return row
+
     def insert_salaries(self, salaries: List[Dict[str, Any]]) -> int:
         """
-        Insert salary records via the aggregation endpoint.
+        Insert salary records, one POST per record via the aggregation
+        endpoint, or in chunks when ingest_mode is "bulk".
         Returns: number of records successfully processed
         """
+        return self.submit_salaries(salaries)["inserted"]
+
+    def submit_salaries(self, salaries: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        insert_salaries(), reporting which records failed
+        Returns: {"inserted": int, "failed": [{"index", "record", "error"}]}
+        """
         if not salaries:
-            return 0
+            return {"inserted": 0, "failed": []}
 
-        processed = 0
+        if self.ingest_mode == "bulk":
+            return self.insert_salaries_bulk(salaries)
 
-        for salary in salaries:
+        result = {"inserted": 0, "failed": []}
+
+        for index, salary in enumerate(salaries):
             try:
-                # Map normalized scraper record to the CreateSalaryInput shape
-                payload = {
-                    "company": salary.get("company_name", ""),
-                    "role": salary.get("designation", ""),
-                    "location": salary.get("location", ""),
-                    "yearsOfExperience": (
-                        str(salary.get("years_of_experience"))
-                        if salary.get("years_of_experience") is not None
-                        else ""
-                    ),
-                    "baseSalary": str(salary.get("base_salary") or ""),
-                    "bonus": str(salary.get("bonus") or ""),
-                    "stockCompensation": str(salary.get("stock_compensation") or ""),
-                    "totalCompensation": str(salary.get("total_compensation") or ""),
-                    # Treat scraper data as full-time salary entries by default
-                    "type": "fulltime",
-                    "employmentType": "Full-time",
-                    # Internship/university-specific fields left empty
-                    "duration": "",
-                    "stipend": "",
-                    "university": "",
-                    "year": "",
-                }
-
-                resp = requests.post(
+                resp = self.transport.post(
                     f"{self.api_base_url}/api/salaries",
-                    json=payload,
+                    json=self._to_api_payload(salary),
                     timeout=15,
                 )
 
                 if resp.status_code == 201:
-                    processed += 1
+                    result["inserted"] += 1
                 else:
                     logger.error(
                         "Failed to POST salary to API: status=%s, body=%s",
                         resp.status_code,
                         resp.text,
                     )
+                    result["failed"].append({"index": index, "record": salary, "error": f"status {resp.status_code}"})
             except Exception as e:
                 logger.error(f"Error inserting salary via API: {e}")
                 logger.error(f"Offending record: {salary}")
+                result["failed"].append({"index": index, "record": salary, "error": str(e)})
+
+        logger.info(f"Processed {result['inserted']} salary records via API")
+        return result
+
+    def insert_salaries_bulk(
+        self,
+        salaries: List[Dict[str, Any]],
+        batch_size: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Insert salary records straight into salary_submissions with one
+        multi-row insert per chunk. A chunk that fails is split in half and
+        retried, so a bad row only costs a few extra requests and is
+        reported on its own instead of failing its neighbours.
+        Returns: {"inserted": int, "failed": [{"index", "record", "error"}]}
+        """
+        batch_size = batch_size or self.batch_size
+        result = {"inserted": 0, "failed": []}
+        rows = []
+
+        # Reject rows the endpoint would refuse before sending anything
+        for index, salary in enumerate(salaries):
+            try:
+                rows.append((index, self._to_submission_row(salary)))
+            except ValueError as e:
+                result["failed"].append({"index": index, "record": salary, "error": str(e)})
+
+        for start in range(0, len(rows), batch_size):
+            self._insert_submission_chunk(rows[start:start + batch_size], salaries, result)
 
-        logger.info(f"Processed {processed} salary records via API")
-        return processed
+        for failure in result["failed"]:
+            logger.error(f"Failed to insert salary #{failure['index']}: {failure['error']}")
+
+        logger.info(
+            f"Bulk inserted {result['inserted']} salary records "
+            f"({len(result['failed'])} failed)"
+        )
+        return result
+
+    def _insert_submission_chunk(
+        self,
+        chunk: List[tuple],
+        salaries: List[Dict[str, Any]],
+        result: Dict[str, Any]
+    ):
+        try:
+            self.client.table("salary_submissions").insert(
+                [row for _, row in chunk], returning="minimal"
+            ).execute()
+            result["inserted"] += len(chunk)
+        except Exception as e:
+            if len(chunk) == 1:
+                index = chunk[0][0]
+                result["failed"].append({"index": index, "record": salaries[index], "error": str(e)})
+                return
+
+            middle = len(chunk) // 2
+            self._insert_submission_chunk(chunk[:middle], salaries, result)
+            self._insert_submission_chunk(chunk[middle:], salaries, result)
 
     def salary_exists(
         self,
@@ -234,39 +482,380 @@ class SupabaseClient:
             logger.error(f"Error checking salary existence: {e}")
             return False
 
-    def get_existing_salaries(self, company_name: str, source_platform: str) -> List[Dict]:
-        """Get all existing salary records for a company from a specific source"""
-        try:
-            response = self.client.table("salaries").select(
-                "designation, location"
-            ).eq(
-                "company_name", company_name
-            ).eq(
-                "source_platform", source_platform
+    def iter_existing_salaries(
+        self,
+        company_name: str,
+        source_platform: str,
+        page_size: int = 1000
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stored salary records of a company from a specific source, one at a
+        time: id, identifying fields and compensation values, read in
+        (created_at, id) order page_size rows per request
+        Raises on failure so a partial load is never mistaken for the stored state
+        """
+        return self.iter_rows(
+            "salaries",
+            "id, company_name, designation, location, source_platform, years_of_experience, "
+            "base_salary, bonus, stock_compensation, total_compensation, data_date, created_at",
+            where=lambda query: query.eq("company_name", company_name).eq("source_platform", source_platform),
+            order_by=("created_at", "id"),
+            page_size=page_size
+        )
+
+    def get_existing_salaries(
+        self,
+        company_name: str,
+        source_platform: str,
+        page_size: int = 1000
+    ) -> List[Dict]:
+        """
+        Get all existing salary records for a company from a specific source
+        (see iter_existing_salaries)
+        Raises on failure
+        """
+        return list(self.iter_existing_salaries(company_name, source_platform, page_size))
+
+    def get_existing_salary_keys(
+        self,
+        company_names: List[str],
+        source_platform: str,
+        page_size: int = 1000,
+        lookup_size: int = 200
+    ) -> set:
+        """
+        (company_name, designation, location) of every stored salary from
+        source_platform for any of company_names, lookup_size names and
+        page_size rows per request
+        Raises on failure
+        """
+        keys = set()
+        names = list(company_names)
+        for start in range(0, len(names), lookup_size):
+            batch = names[start:start + lookup_size]
+            rows = self.iter_rows(
+                "salaries",
+                "id, company_name, designation, location",
+                where=lambda query: query.in_("company_name", batch).eq("source_platform", source_platform),
+                page_size=page_size
+            )
+            keys.update((row["company_name"], row["designation"], row["location"]) for row in rows)
+        return keys
+
+    def retire_salaries(self, salary_ids: List[str], batch_size: int = 200) -> int:
+        """
+        Delete salary rows a source no longer lists, batch_size ids per request
+        Returns: number of ids deleted
+        """
+        retired = 0
+        for start in range(0, len(salary_ids), batch_size):
+            chunk = salary_ids[start:start + batch_size]
+            try:
+                self.client.table("salaries").delete(returning="minimal").in_("id", chunk).execute()
+                retired += len(chunk)
+            except Exception as e:
+                logger.error(f"Error retiring salaries: {e}")
+
+        if retired:
+            logger.info(f"Retired {retired} salary records")
+        return retired
+
+    def iter_salaries_changed_since(self, since: Optional[str], page_size: int = 1000) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Group fields (company_name, designation, location, data_date,
+        created_at) of every salary stored or updated at or after since,
+        or of every salary if since is None, one page of page_size rows at
+        a time in (updated_at, id) order
+        Raises on failure
+        """
+        return self.iter_pages(
+            "salaries",
+            "id, company_name, designation, location, data_date, created_at, updated_at",
+            where=(lambda query: query.gte("updated_at", since)) if since else None,
+            order_by=("updated_at", "id"),
+            page_size=page_size
+        )
+
+    def iter_trend_inputs(self, company_name: str, designations: List[str], page_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        The fields salary_trends is computed from, for a company's salaries
+        with any of designations, page_size rows per request
+        Raises on failure
+        """
+        return self.iter_rows(
+            "salaries",
+            "id, designation, level, location, total_compensation, data_date, created_at, updated_at",
+            where=lambda query: query.eq("company_name", company_name).in_("designation", designations),
+            page_size=page_size
+        )
+
+    def get_salary_trends(
+        self,
+        company_id: str,
+        designations: List[str],
+        page_size: int = 1000,
+        lookup_size: int = 200
+    ) -> List[Dict[str, Any]]:
+        """
+        Stored salary_trends groups of a company for any of designations,
+        lookup_size designations and page_size rows per request
+        Raises on failure
+        """
+        trends = []
+        designations = list(designations)
+        for start in range(0, len(designations), lookup_size):
+            batch = designations[start:start + lookup_size]
+            trends.extend(self.iter_rows(
+                "salary_trends",
+                "id, designation, level, location, year, quarter",
+                where=lambda query: query.eq("company_id", company_id).in_("designation", batch),
+                page_size=page_size
+            ))
+        return trends
+
+    def get_trends_watermark(self) -> Optional[str]:
+        """
+        Latest salaries.updated_at already aggregated into salary_trends,
+        or None if nothing has been aggregated yet
+        """
+        response = self.client.table("salary_trends").select(
+            "source_updated_at"
+        ).not_.is_(
+            "source_updated_at", "null"
+        ).order("source_updated_at", desc=True).limit(1).execute()
+        return response.data[0]["source_updated_at"] if response.data else None
+
+    def save_salary_trends(self, rows: List[Dict[str, Any]], batch_size: int = 500):
+        """
+        Upsert salary_trends rows on their group, batch_size rows per
+        request, in the given order. Raises on failure.
+        """
+        for start in range(0, len(rows), batch_size):
+            self.client.table("salary_trends").upsert(
+                rows[start:start + batch_size], on_conflict=TREND_GROUP_COLUMNS, returning="minimal"
             ).execute()
+        logger.info(f"Saved {len(rows)} salary trends")
 
-            return response.data
+    def delete_salary_trends(self, trend_ids: List[str], batch_size: int = 200):
+        """Delete salary_trends rows whose group no longer has salaries. Raises on failure."""
+        for start in range(0, len(trend_ids), batch_size):
+            self.client.table("salary_trends").delete(returning="minimal").in_(
+                "id", trend_ids[start:start + batch_size]
+            ).execute()
+        if trend_ids:
+            logger.info(f"Deleted {len(trend_ids)} salary trends with no salaries left")
 
-        except Exception as e:
-            logger.error(f"Error getting existing salaries: {e}")
-            return []
+    def get_salary_sketches(
+        self,
+        company_ids: List[str],
+        with_sketch: bool = True,
+        batch_size: int = 200
+    ) -> List[Dict[str, Any]]:
+        """
+        salary_sketches rows of company_ids (every bracket), with stored
+        percentiles and, if with_sketch, the serialized sketch
+        Raises on failure
+        """
+        columns = (
+            "id, company_id, experience_bracket, sample_size, p25_total_compensation, "
+            "p50_total_compensation, p75_total_compensation, p90_total_compensation"
+        )
+        if with_sketch:
+            columns += ", sketch"
+
+        rows = []
+        for start in range(0, len(company_ids), batch_size):
+            response = self.client.table("salary_sketches").select(columns).in_(
+                "company_id", company_ids[start:start + batch_size]
+            ).execute()
+            rows.extend(response.data)
+        return rows
+
+    def get_salary_sketch_keys(
+        self,
+        company_ids: Optional[List[str]] = None,
+        page_size: int = 1000,
+        lookup_size: int = 200
+    ) -> List[Dict[str, Any]]:
+        """
+        id, company_id and experience_bracket of the salary_sketches rows of
+        company_ids (of every row if None). Raises on failure.
+        """
+        if company_ids is None:
+            return list(self.iter_rows("salary_sketches", "id, company_id, experience_bracket", page_size=page_size))
+
+        keys = []
+        for start in range(0, len(company_ids), lookup_size):
+            batch = company_ids[start:start + lookup_size]
+            keys.extend(self.iter_rows(
+                "salary_sketches",
+                "id, company_id, experience_bracket",
+                where=lambda query: query.in_("company_id", batch),
+                page_size=page_size
+            ))
+        return keys
+
+    def get_sketches_watermark(self) -> Optional[str]:
+        """
+        Latest salaries.updated_at already counted into salary_sketches,
+        or None if nothing has been sketched yet
+        """
+        response = self.client.table("salary_sketches").select(
+            "source_updated_at"
+        ).not_.is_(
+            "source_updated_at", "null"
+        ).order("source_updated_at", desc=True).limit(1).execute()
+        return response.data[0]["source_updated_at"] if response.data else None
+
+    def save_salary_sketches(self, rows: List[Dict[str, Any]], batch_size: int = 200):
+        """Upsert salary_sketches rows on (company_id, experience_bracket). Raises on failure."""
+        for start in range(0, len(rows), batch_size):
+            self.client.table("salary_sketches").upsert(
+                rows[start:start + batch_size], on_conflict="company_id,experience_bracket", returning="minimal"
+            ).execute()
+        logger.info(f"Saved {len(rows)} salary sketches")
+
+    def delete_salary_sketches(self, sketch_ids: List[str], batch_size: int = 200):
+        """Delete salary_sketches rows. Raises on failure."""
+        for start in range(0, len(sketch_ids), batch_size):
+            self.client.table("salary_sketches").delete(returning="minimal").in_(
+                "id", sketch_ids[start:start + batch_size]
+            ).execute()
+        if sketch_ids:
+            logger.info(f"Deleted {len(sketch_ids)} salary sketches with no salaries left")
+
+    def iter_sketch_inputs(
+        self,
+        company_ids: Optional[List[str]] = None,
+        page_size: int = 1000,
+        lookup_size: int = 200
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        company_id, years_of_experience, total_compensation and updated_at
+        of the salaries of company_ids (of every salary if None), one page
+        of page_size rows at a time
+        Raises on failure
+        """
+        columns = "id, company_id, years_of_experience, total_compensation, updated_at"
+        if company_ids is None:
+            yield from self.iter_pages("salaries", columns, page_size=page_size)
+            return
+
+        for start in range(0, len(company_ids), lookup_size):
+            batch = company_ids[start:start + lookup_size]
+            yield from self.iter_pages(
+                "salaries", columns, where=lambda query: query.in_("company_id", batch), page_size=page_size
+            )
 
-    def update_data_source_last_scraped(self, source_platform: str):
-        """Update the last scraped timestamp for a data source"""
+    def update_data_source_last_scraped(self, source_platform: str, scraped_at: Optional[str] = None):
+        """Update the last scraped timestamp for a data source (default: now)"""
         try:
             self.client.table("data_sources").update({
-                "last_scraped_at": datetime.utcnow().isoformat()
+                "last_scraped_at": scraped_at or datetime.utcnow().isoformat()
             }).eq("name", source_platform).execute()
 
         except Exception as e:
             logger.error(f"Error updating data source: {e}")
 
+    def iter_pages(
+        self,
+        table: str,
+        columns: str = "*",
+        where: Optional[Callable[[Any], Any]] = None,
+        order_by: Sequence[str] = ("id",),
+        page_size: int = 1000,
+        prefetch: bool = True
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Rows of table matching where (a function adding filters to the
+        query), one page of up to page_size rows at a time.
+
+        Pages follow order_by (id > last id seen, or (created_at, id) after
+        the last pair seen) rather than an offset, so each one is an index
+        range scan however deep the read is, and rows inserted or deleted
+        meanwhile never shift a page. order_by must be non-null columns
+        whose values together are unique, and columns must include them.
+        With prefetch, the next page is requested in the background as soon
+        as a page arrives, while the caller works through it; at most two
+        pages are held at once.
+        Raises on failure
+        """
+        order_by = tuple(order_by)
+
+        def fetch(after: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            query = self.client.table(table).select(columns)
+            if where:
+                query = where(query)
+            if after is not None and len(order_by) == 1:
+                query = query.gt(order_by[0], after[order_by[0]])
+            elif after is not None:
+                # The redundant bound on the leading column lets Postgres use its index
+                query = query.gte(order_by[0], after[order_by[0]]).or_(_keyset_after(order_by, after))
+            for column in order_by:
+                query = query.order(column)
+            return query.limit(page_size).execute().data
+
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"{table}-pages") if prefetch else None
+        try:
+            rows = fetch(None)
+            while rows:
+                # A short page is the last one
+                last = rows[-1] if len(rows) == page_size else None
+                following = executor.submit(fetch, last) if executor and last else None
+                yield rows
+                if last is None:
+                    return
+                rows = following.result() if following else fetch(last)
+        finally:
+            if executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    def iter_rows(self, *args, **kwargs) -> Iterator[Dict[str, Any]]:
+        """iter_pages(), one row at a time"""
+        for rows in self.iter_pages(*args, **kwargs):
+            yield from rows
+
+    def iter_table(
+        self,
+        table: str,
+        columns: str = "*",
+        page_size: int = 1000,
+        changed_since: Optional[str] = None,
+        changed_column: str = "updated_at"
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Every row of table, or those with changed_column at or after
+        changed_since, one page of up to page_size rows at a time in id
+        order (see iter_pages). columns must include id.
+        Raises on failure
+        """
+        return self.iter_pages(
+            table,
+            columns,
+            where=(lambda query: query.gte(changed_column, changed_since)) if changed_since else None,
+            page_size=page_size
+        )
+
+    def get_data_sources(self) -> List[Dict[str, Any]]:
+        """All data sources with their scrape frequency and reliability"""
+        try:
+            response = self.client.table("data_sources").select(
+                "name, base_url, is_active, scrape_frequency_hours, reliability_score, last_scraped_at"
+            ).execute()
+
+            return response.data
+
+        except Exception as e:
+            logger.error(f"Error getting data sources: {e}")
+            return []
+
     def delete_old_salaries(self, company_name: str, source_platform: str, days: int = 30):
         """Delete salary records older than specified days"""
         try:
             cutoff_date = datetime.utcnow().timestamp() - (days * 24 * 60 * 60)
 
-            response = self.client.table("salaries").delete().eq(
+            # Counted by the server rather than sending every deleted row back
+            response = self.client.table("salaries").delete(count="exact", returning="minimal").eq(
                 "company_name", company_name
             ).eq(
                 "source_platform", source_platform
@@ -274,7 +863,7 @@ class SupabaseClient:
                 "created_at", datetime.fromtimestamp(cutoff_date).isoformat()
             ).execute()
 
-            count = len(response.data) if response.data else 0
+            count = response.count or 0
             if count > 0:
                 logger.info(f"Deleted {count} old salary records for {company_name}")
 
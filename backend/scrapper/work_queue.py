@@ -0,0 +1,282 @@
+"""
+Persistent Work Queue
+(company, source) scrape jobs in a local SQLite file, with leases and
+retry counts, so an interrupted run resumes where it stopped and several
+worker processes can drain the same queue
+"""
+
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+# Pipeline outcomes that finish a job; "failed" is retried, "paused" is put back for later
+FINISHED_OUTCOMES = {"success", "unchanged", "skipped"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    company TEXT NOT NULL,
+    source TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    priority INTEGER NOT NULL,
+    shard INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    not_before REAL NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    last_error TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (company, source)
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs(state, priority);
+"""
+
+
+class WorkQueue:
+    """
+    Durable queue of (company, source) jobs.
+
+    A worker leases a job before running it. The lease expires after
+    lease_seconds, so a job held by a crashed worker is handed out again;
+    leases held by processes on this host that are no longer alive are
+    reclaimed right away by reclaim_dead_leases(). A failed job goes to the
+    back of the queue until it has been attempted max_attempts times.
+
+    Every write is its own short IMMEDIATE transaction, so any number of
+    threads and processes can share the file.
+    """
+
+    def __init__(
+        self,
+        path: str = "scrape_queue.db",
+        lease_seconds: float = 900.0,
+        max_attempts: int = 3,
+        retry_backoff: float = 60.0,
+        max_backoff: float = 3600.0
+    ):
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.max_backoff = max_backoff
+        # Lease owner: host and pid identify the process, the suffix this queue object
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._local = threading.local()
+
+        conn = self._connection()
+        conn.executescript(SCHEMA)
+        # Queue files from before jobs were sharded between worker processes
+        if "shard" not in [row[1] for row in conn.execute("PRAGMA table_info(jobs)")]:
+            conn.execute("ALTER TABLE jobs ADD COLUMN shard INTEGER NOT NULL DEFAULT 0")
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread; sqlite3 connections are not shared between threads"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Short write transaction; IMMEDIATE takes the write lock up front"""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs in each state"""
+        rows = self._connection().execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall()
+        counts = {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        counts.update(dict(rows))
+        return counts
+
+    def has_work(self) -> bool:
+        """True while any job is pending or leased"""
+        counts = self.counts()
+        return counts[PENDING] + counts[LEASED] > 0
+
+    def companies(self) -> List[str]:
+        """Companies with a job not yet done"""
+        rows = self._connection().execute(
+            "SELECT DISTINCT company FROM jobs WHERE state IN (?, ?)", (PENDING, LEASED)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def fill(
+        self,
+        jobs: Iterable[Tuple[str, str]],
+        replace: bool = False,
+        shards: Optional[List[int]] = None
+    ) -> int:
+        """
+        Replace a finished queue with jobs, in priority order. Does nothing
+        if work remains (e.g. another process filled it first), unless
+        replace is set. shards optionally gives each job's worker shard.
+        Returns: number of jobs added
+        """
+        now = time.time()
+        jobs = list(jobs)
+        shards = shards or [0] * len(jobs)
+        rows = [
+            (company, source, priority, shard, now)
+            for priority, ((company, source), shard) in enumerate(zip(jobs, shards))
+        ]
+        with self._transaction() as conn:
+            remaining = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE state IN (?, ?)", (PENDING, LEASED)
+            ).fetchone()[0]
+            if remaining and not replace:
+                logger.info(f"Work queue already has {remaining} unfinished jobs, not refilling")
+                return 0
+            conn.execute("DELETE FROM jobs")
+            conn.executemany(
+                "INSERT OR IGNORE INTO jobs (company, source, priority, shard, updated_at) VALUES (?, ?, ?, ?, ?)", rows
+            )
+        logger.info(f"Work queue filled with {len(rows)} jobs ({self.path})")
+        return len(rows)
+
+    def reclaim_dead_leases(self) -> int:
+        """Put back jobs leased by processes on this host that no longer exist"""
+        host = socket.gethostname()
+        with self._transaction() as conn:
+            leases = conn.execute(
+                "SELECT DISTINCT lease_owner FROM jobs WHERE state = ?", (LEASED,)
+            ).fetchall()
+            dead = [owner for (owner,) in leases if owner and _is_dead_local_owner(owner, host)]
+            reclaimed = 0
+            for owner in dead:
+                reclaimed += conn.execute(
+                    "UPDATE jobs SET state = ?, lease_owner = NULL, lease_expires = NULL, "
+                    "attempts = MAX(attempts - 1, 0), updated_at = ? WHERE state = ? AND lease_owner = ?",
+                    (PENDING, time.time(), LEASED, owner)
+                ).rowcount
+        if reclaimed:
+            logger.info(f"Reclaimed {reclaimed} jobs leased by processes that are no longer running")
+        return reclaimed
+
+    def lease(self, shard: Optional[int] = None) -> Optional[Tuple[str, str]]:
+        """
+        Claim the highest-priority ready job (pending, or leased with an
+        expired lease) for this queue's owner. With a shard, that shard's
+        jobs come first and other shards' jobs are taken once it is empty.
+        Returns: (company, source), or None if nothing is ready
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT company, source FROM jobs "
+                "WHERE (state = ? AND not_before <= ?) OR (state = ? AND lease_expires < ?) "
+                "ORDER BY shard != ?, priority LIMIT 1",
+                (PENDING, now, LEASED, now, -1 if shard is None else shard)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET state = ?, lease_owner = ?, lease_expires = ?, attempts = attempts + 1, "
+                "updated_at = ? WHERE company = ? AND source = ?",
+                (LEASED, self.owner, now + self.lease_seconds, now, row[0], row[1])
+            )
+        return row[0], row[1]
+
+    def complete(self, company: str, source: str):
+        self._finish(company, source, DONE)
+
+    def fail(self, company: str, source: str, error: Optional[str] = None):
+        """
+        Send a failed job to the back of the queue, not handed out again
+        until its backoff has passed, or mark it failed after max_attempts
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT attempts FROM jobs WHERE company = ? AND source = ? AND lease_owner = ?",
+                (company, source, self.owner)
+            ).fetchone()
+            if row is None:
+                return
+            if row[0] >= self.max_attempts:
+                state, priority_sql, not_before = FAILED, "priority", now
+                logger.warning(f"Giving up on {company} / {source} after {row[0]} attempts: {error}")
+            else:
+                state, priority_sql = PENDING, "(SELECT MAX(priority) + 1 FROM jobs)"
+                not_before = now + self.backoff(row[0])
+            conn.execute(
+                f"UPDATE jobs SET state = ?, priority = {priority_sql}, not_before = ?, lease_owner = NULL, "
+                "lease_expires = NULL, last_error = ?, updated_at = ? WHERE company = ? AND source = ?",
+                (state, not_before, error, now, company, source)
+            )
+
+    def backoff(self, attempts: int) -> float:
+        """Seconds before a job that has failed `attempts` times is retried: doubling, capped at max_backoff"""
+        return min(self.retry_backoff * 2 ** max(attempts - 1, 0), self.max_backoff)
+
+    def release(self, company: str, source: str, delay: float = 0.0):
+        """Return a leased job unrun, without using up an attempt; not handed out again for delay seconds"""
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET state = ?, attempts = MAX(attempts - 1, 0), not_before = ?, lease_owner = NULL, "
+                "lease_expires = NULL, updated_at = ? WHERE company = ? AND source = ? AND lease_owner = ?",
+                (PENDING, now + delay, now, company, source, self.owner)
+            )
+
+    def finish(self, company: str, source: str, outcome: Optional[str], error: Optional[str] = None, retry_delay: float = 60.0):
+        """Record a pipeline outcome (success, unchanged, skipped, paused or failed)"""
+        if outcome in FINISHED_OUTCOMES:
+            self.complete(company, source)
+        elif outcome == "paused":
+            self.release(company, source, delay=retry_delay)
+        else:
+            self.fail(company, source, error or f"outcome: {outcome}")
+
+    def _finish(self, company: str, source: str, state: str):
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET state = ?, lease_owner = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE company = ? AND source = ? AND lease_owner = ?",
+                (state, time.time(), company, source, self.owner)
+            )
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def _is_dead_local_owner(owner: str, host: str) -> bool:
+    """True if owner is a process on this host that is no longer running"""
+    owner_host, _, rest = owner.partition(":")
+    pid = rest.partition(":")[0]
+    if owner_host != host or not pid.isdigit():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        return False
+    return False